@@ -0,0 +1,108 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lê variável de ambiente inteira com valor padrão"""
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lê variável de ambiente booleana com valor padrão"""
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class Settings:
+    """Configurações da aplicação lidas de variáveis de ambiente"""
+
+    def __init__(self):
+        # Banco de dados (trocar a URL para Postgres/MySQL não exige mudar código)
+        self.database_url = os.getenv("DATABASE_URL", "sqlite:///./ticket_marketplace.db")
+        self.db_echo = _env_bool("DB_ECHO", False)
+
+        # Rotas quentes com AsyncSession (requer driver async: aiosqlite/asyncpg)
+        self.db_async = _env_bool("DB_ASYNC", False)
+
+        # Pool dimensionado para o threadpool do uvicorn/starlette (~40 threads)
+        self.db_pool_size = _env_int("DB_POOL_SIZE", 40)
+        self.db_max_overflow = _env_int("DB_MAX_OVERFLOW", 10)
+        self.db_pool_timeout = _env_int("DB_POOL_TIMEOUT", 30)
+        self.db_pool_recycle = _env_int("DB_POOL_RECYCLE", 1800)
+
+        # PRAGMAs aplicados a cada conexão SQLite
+        self.sqlite_journal_mode = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+        self.sqlite_synchronous = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+        self.sqlite_mmap_size = _env_int("SQLITE_MMAP_SIZE", 268435456)  # 256 MB
+        self.sqlite_cache_size = _env_int("SQLITE_CACHE_SIZE", -65536)  # 64 MB (negativo = KiB)
+        self.sqlite_busy_timeout_ms = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+
+        # Sala de espera para vendas concorridas
+        self.queue_backend = os.getenv("QUEUE_BACKEND", "memory")  # memory | redis
+        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.queue_admit_rate = float(os.getenv("QUEUE_ADMIT_RATE", "50"))  # compradores/segundo
+        self.queue_token_ttl = _env_int("QUEUE_TOKEN_TTL", 300)  # segundos
+
+        # Expiração de reservas sem pagamento (intervalo 0 desliga a varredura)
+        self.reservation_hold_ttl = _env_int("RESERVATION_HOLD_TTL", 900)  # segundos
+        self.reservation_sweep_interval = _env_int("RESERVATION_SWEEP_INTERVAL", 60)  # segundos
+
+        # Liberação automática de escrow após o prazo de confirmação
+        self.escrow_release_days = _env_int("ESCROW_RELEASE_DAYS", 7)
+        self.escrow_release_interval = _env_int("ESCROW_RELEASE_INTERVAL", 3600)  # segundos
+        self.escrow_release_chunk = _env_int("ESCROW_RELEASE_CHUNK", 5000)
+
+        # Chat em tempo real: broker entre workers e fila de envio por conexão
+        self.chat_broker = os.getenv("CHAT_BROKER", "memory")  # memory | redis
+        self.chat_send_queue_size = _env_int("CHAT_SEND_QUEUE_SIZE", 256)
+
+        # Reconstrução dos contadores de não lidas a partir do histórico (0 desliga)
+        self.unread_repair_interval = _env_int("UNREAD_REPAIR_INTERVAL", 86400)  # segundos
+
+        # Histórico frio do chat: salas arquivadas ou paradas vão para segmentos comprimidos
+        self.chat_archive_idle_days = _env_int("CHAT_ARCHIVE_IDLE_DAYS", 90)
+        self.chat_archive_interval = _env_int("CHAT_ARCHIVE_INTERVAL", 3600)  # segundos
+        self.chat_archive_segment_size = _env_int("CHAT_ARCHIVE_SEGMENT_SIZE", 500)  # mensagens
+
+        # Logs de auditoria gravados em lote (AUDIT_LOG_SYNC=1 grava na hora; spill vazio desliga o arquivo)
+        self.audit_log_sync = _env_bool("AUDIT_LOG_SYNC", False)
+        self.audit_log_batch_size = _env_int("AUDIT_LOG_BATCH_SIZE", 500)
+        self.audit_log_flush_interval = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL", "1.0"))  # segundos
+        self.audit_log_spill_dir = os.getenv("AUDIT_LOG_SPILL_DIR", "./audit_spill")
+        self.audit_log_fsync = _env_bool("AUDIT_LOG_FSYNC", False)
+
+        # Retenção de system_logs: logs mais antigos vão para arquivos mensais (diretório vazio desliga)
+        self.log_retention_days = _env_int("LOG_RETENTION_DAYS", 180)
+        self.log_retention_days_security = _env_int("LOG_RETENTION_DAYS_SECURITY", 730)  # suspeitas, disputas, moderação
+        self.log_archive_dir = os.getenv("LOG_ARCHIVE_DIR", "./log_archive")
+        self.log_archive_interval = _env_int("LOG_ARCHIVE_INTERVAL", 86400)  # segundos
+
+        # Cache em processo dos valores de face usados na regra dos 120%
+        self.price_cache_max_events = _env_int("PRICE_CACHE_MAX_EVENTS", 10000)
+        self.price_cache_ttl = _env_int("PRICE_CACHE_TTL", 300)  # segundos
+
+        # Resumo de estoque por evento em memória e recarga periódica do banco
+        self.inventory_cache_max_events = _env_int("INVENTORY_CACHE_MAX_EVENTS", 1000)
+        self.inventory_rebuild_interval = _env_int("INVENTORY_REBUILD_INTERVAL", 300)  # segundos
+
+        # Cache de respostas dos endpoints de catálogo com ETag (TTL 0 desliga o cache; o ETag continua)
+        self.http_cache_max_entries = _env_int("HTTP_CACHE_MAX_ENTRIES", 1000)
+        self.http_cache_ttl = _env_int("HTTP_CACHE_TTL", 30)  # segundos
+
+        # Rotas de lista serializam projeções direto para JSON, sem modelos Pydantic (orjson se instalado)
+        self.fast_json = _env_bool("FAST_JSON", False)
+
+        # Frequência com que cada worker verifica se há ruleset de moderação novo
+        self.moderation_reload_interval = _env_int("MODERATION_RELOAD_INTERVAL", 5)  # segundos
+
+        # Verificação profunda das mensagens fora da requisição (0 workers = na thread do pipeline)
+        self.moderation_workers = _env_int("MODERATION_WORKERS", 2)
+        self.moderation_queue_size = _env_int("MODERATION_QUEUE_SIZE", 10000)
+        self.moderation_batch_size = _env_int("MODERATION_BATCH_SIZE", 200)
+        self.moderation_flush_interval = float(os.getenv("MODERATION_FLUSH_INTERVAL", "0.5"))  # segundos
+        self.moderation_max_retries = _env_int("MODERATION_MAX_RETRIES", 3)  # lotes com falha voltam à fila
+
+
+settings = Settings()
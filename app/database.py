@@ -1,23 +1,137 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from app.models.models import Base
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from app.config import settings
+
+# URL do banco de dados (configurável via DATABASE_URL)
+SQLALCHEMY_DATABASE_URL = settings.database_url
+
+
+def is_sqlite(url: str) -> bool:
+    """Indica se a URL aponta para um banco SQLite"""
+    return url.startswith("sqlite")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplica PRAGMAs de desempenho em cada nova conexão SQLite"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.execute(f"PRAGMA cache_size={settings.sqlite_cache_size}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.close()
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL) -> Engine:
+    """Cria o engine do SQLAlchemy de acordo com as configurações"""
+    if not is_sqlite(url):
+        return create_engine(
+            url,
+            echo=settings.db_echo,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True
+        )
+
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # Banco em memória: uma única conexão compartilhada
+        sqlite_engine = create_engine(
+            url,
+            echo=settings.db_echo,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    else:
+        sqlite_engine = create_engine(
+            url,
+            echo=settings.db_echo,
+            connect_args={
+                "check_same_thread": False,  # Necessário apenas para SQLite
+                "timeout": settings.sqlite_busy_timeout_ms / 1000
+            },
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+
+    event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+    return sqlite_engine
+
+
+# Drivers async equivalentes aos drivers síncronos padrão
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Converte a URL síncrona para o driver async correspondente"""
+    scheme, rest = url.split(":", 1)
+    if "+" in scheme:
+        return url
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}:{rest}"
+
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL) -> AsyncEngine:
+    """Cria o engine async com as mesmas configurações do engine síncrono"""
+    async_url = to_async_url(url)
+
+    if not is_sqlite(url):
+        return create_async_engine(
+            async_url,
+            echo=settings.db_echo,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True
+        )
+
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        sqlite_engine = create_async_engine(async_url, echo=settings.db_echo, poolclass=StaticPool)
+    else:
+        sqlite_engine = create_async_engine(
+            async_url,
+            echo=settings.db_echo,
+            connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000},
+            poolclass=AsyncAdaptedQueuePool,  # aiosqlite usa NullPool por padrão
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout
+        )
+
+    event.listen(sqlite_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return sqlite_engine
 
-# Configuração do banco de dados SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ticket_marketplace.db"
 
 # Cria o engine do SQLAlchemy
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Necessário apenas para SQLite
-)
+engine = create_db_engine()
 
 # Cria a sessão
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine e sessão async (apenas quando DB_ASYNC está habilitado)
+async_engine = create_async_db_engine() if settings.db_async else None
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False  # Evita lazy load implícito após commit
+)
+
 
 def init_db():
-    """Inicializa o banco de dados criando todas as tabelas"""
-    Base.metadata.create_all(bind=engine)
+    """Inicializa o banco de dados aplicando as migrações pendentes"""
+    from app.migrations import run_migrations
+    
+    run_migrations(engine)
 
 
 def get_db():
@@ -27,3 +141,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency para obter sessão async do banco de dados"""
+    async with AsyncSessionLocal() as db:
+        yield db
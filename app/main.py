@@ -1,7 +1,16 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import init_db
-from app.routes import users, events, listings, orders, chat, admin
+from app.config import settings
+from app.database import init_db, async_engine
+from app.middleware import HTTPCacheMiddleware
+from app.serialization import FastJSONResponse
+from app.services import order_service, moderation_service, chat_service, chat_archive, system_service, scheduler
+from app.services.realtime import chat_hub
+from app.services.audit_log import audit_writer
+from app.services.inventory_cache import INVENTORY_REBUILD_JOB, inventory_cache
+from app.services.http_cache import response_cache
+from app.routes import users, events, listings, orders, chat, admin, queue
 
 # Cria a aplicação FastAPI
 app = FastAPI(
@@ -31,9 +40,14 @@ app = FastAPI(
     """,
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse if settings.fast_json else JSONResponse
 )
 
+# Cache HTTP (ETag/304) dos GETs de catálogo; registrado antes do CORS para ficar
+# por dentro dele e não guardar headers que dependem da Origin
+app.add_middleware(HTTPCacheMiddleware, cache=response_cache)
+
 # Configuração de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -50,12 +64,74 @@ app.include_router(listings.router)
 app.include_router(orders.router)
 app.include_router(chat.router)
 app.include_router(admin.router)
+app.include_router(queue.router)
+
+
+# Jobs em background
+scheduler.register_job(scheduler.PeriodicJob(
+    "reservation-expiry",
+    settings.reservation_sweep_interval,
+    lambda db: order_service.release_expired_reservations(db, settings.reservation_hold_ttl)
+))
+scheduler.register_job(scheduler.PeriodicJob(
+    order_service.ESCROW_RELEASE_JOB,
+    settings.escrow_release_interval,
+    lambda db: order_service.release_due_escrows(
+        db, settings.escrow_release_days, chunk_size=settings.escrow_release_chunk
+    )
+))
+
+scheduler.register_job(scheduler.PeriodicJob(
+    moderation_service.MODERATION_RELOAD_JOB,
+    settings.moderation_reload_interval,
+    moderation_service.reload_rules
+))
+scheduler.register_job(scheduler.PeriodicJob(
+    chat_service.UNREAD_REPAIR_JOB,
+    settings.unread_repair_interval,
+    chat_service.repair_unread_counters
+))
+scheduler.register_job(scheduler.PeriodicJob(
+    chat_archive.CHAT_ARCHIVE_JOB,
+    settings.chat_archive_interval,
+    lambda db: chat_archive.compact_chat_history(
+        db, settings.chat_archive_idle_days, segment_size=settings.chat_archive_segment_size
+    )
+))
+scheduler.register_job(scheduler.PeriodicJob(
+    INVENTORY_REBUILD_JOB,
+    settings.inventory_rebuild_interval,
+    inventory_cache.rebuild
+))
+if settings.log_archive_dir:
+    scheduler.register_job(scheduler.PeriodicJob(
+        system_service.LOG_ARCHIVE_JOB,
+        settings.log_archive_interval,
+        lambda db: system_service.archive_old_logs(db, settings.log_archive_dir)
+    ))
 
 
 @app.on_event("startup")
 def on_startup():
-    """Inicializa o banco de dados ao iniciar a aplicação"""
+    """Inicializa o banco de dados e os jobs ao iniciar a aplicação"""
     init_db()
+    # Carrega o ruleset publicado antes de aceitar mensagens
+    scheduler.JOBS[moderation_service.MODERATION_RELOAD_JOB].run_once()
+    chat_service.moderation_pipeline.start()
+    if not settings.audit_log_sync:
+        audit_writer.start()
+    scheduler.start_all()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Para os jobs, drena a moderação e os logs de auditoria e fecha as conexões do engine async ao encerrar a aplicação"""
+    scheduler.stop_all()
+    chat_service.moderation_pipeline.stop()
+    audit_writer.stop()
+    chat_hub.close()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 @app.get("/")
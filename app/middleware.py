@@ -0,0 +1,113 @@
+"""
+Middleware de cache HTTP para os GETs de catálogo
+
+Cada rota de CACHE_POLICIES declara as tabelas de que a resposta depende e o
+Cache-Control enviado ao cliente. Respostas 200 recebem ETag (hash do corpo);
+If-None-Match igual devolve 304 sem corpo. O corpo serializado fica em
+response_cache até o TTL ou até um commit alterar uma das tabelas.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.models.models import User, Event, EventTicketMaster, Listing
+from app.services.http_cache import ResponseCache, CachedResponse, etag_matches
+
+
+class CachePolicy:
+    """Rota cacheável: padrão do caminho, tabelas de origem e Cache-Control"""
+
+    def __init__(self, pattern: str, tables: Tuple[str, ...], cache_control: str):
+        self.pattern = re.compile(pattern)
+        self.tables = tables
+        self.cache_control = cache_control.encode("latin-1")
+
+
+CACHE_POLICIES = [
+    CachePolicy(r"/events/", (Event.__tablename__,), "public, max-age=30"),
+    CachePolicy(r"/events/upcoming", (Event.__tablename__,), "public, max-age=30"),
+    CachePolicy(r"/events/\d+/ticket-masters", (EventTicketMaster.__tablename__,), "public, max-age=60"),
+    # Preços e disponibilidade mudam a todo momento: o cliente sempre revalida (304 se nada mudou)
+    CachePolicy(
+        r"/listings/active",
+        (Listing.__tablename__, EventTicketMaster.__tablename__, Event.__tablename__, User.__tablename__),
+        "public, no-cache"
+    ),
+]
+
+# Headers recalculados a cada resposta
+_REPLACED_HEADERS = {b"content-length", b"etag", b"cache-control"}
+
+
+class HTTPCacheMiddleware:
+    """ETag/304 e cache de corpo para as rotas de CACHE_POLICIES"""
+
+    def __init__(self, app: ASGIApp, cache: ResponseCache, policies: List[CachePolicy] = CACHE_POLICIES):
+        self.app = app
+        self.cache = cache
+        self.policies = policies
+
+    def _policy(self, path: str) -> Optional[CachePolicy]:
+        return next((policy for policy in self.policies if policy.pattern.fullmatch(path)), None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        policy = self._policy(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"])
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        entry = self.cache.get(key)
+        if entry is not None:
+            await self._respond(send, entry, policy, if_none_match, b"HIT")
+            return
+
+        # Versões lidas antes da rota: uma escrita durante a requisição impede guardar o corpo
+        versions = self.cache.versions(policy.tables)
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def capture(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        body = b"".join(chunks)
+        if start is None:
+            return
+        if start["status"] != 200:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [(name, value) for name, value in start["headers"] if name.lower() not in _REPLACED_HEADERS]
+        entry = self.cache.put(key, policy.tables, versions, start["status"], headers, body)
+        await self._respond(send, entry, policy, if_none_match, b"MISS")
+
+    async def _respond(self, send: Send, entry: CachedResponse, policy: CachePolicy,
+                       if_none_match: Optional[str], cache_status: bytes):
+        validators = [
+            (b"etag", entry.etag.encode("latin-1")),
+            (b"cache-control", policy.cache_control),
+            (b"x-cache", cache_status)
+        ]
+        not_modified = etag_matches(if_none_match, entry.etag)
+        self.cache.record_response(entry, not_modified)
+        if not_modified:
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": entry.status,
+            "headers": entry.headers + validators + [(b"content-length", str(len(entry.body)).encode("latin-1"))]
+        })
+        await send({"type": "http.response.body", "body": entry.body})
@@ -0,0 +1,446 @@
+"""
+Migrações versionadas do esquema
+
+Cada migração tem um número de versão crescente e é aplicada uma única vez,
+registrada na tabela schema_migrations. Para evoluir o esquema, adicione uma
+nova entrada no final de MIGRATIONS (nunca altere uma migração já publicada).
+
+Aplicar manualmente: python -m app.migrations
+"""
+
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import (
+    DDL, JSON, Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text,
+    false, func, inspect, select, union
+)
+from sqlalchemy.engine import Connection, Engine
+
+from app.models.models import Base
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+# ==================== HELPERS ====================
+
+def create_table(conn: Connection, table_name: str):
+    """Cria uma tabela declarada nos models (se ainda não existir)"""
+    Base.metadata.tables[table_name].create(bind=conn, checkfirst=True)
+
+
+def create_index(conn: Connection, table_name: str, index_name: str):
+    """Cria um índice declarado nos models (se ainda não existir)"""
+    table = Base.metadata.tables[table_name]
+    index = next(index for index in table.indexes if index.name == index_name)
+    index.create(bind=conn, checkfirst=True)
+
+
+def add_column(conn: Connection, table_name: str, column_name: str):
+    """Adiciona em uma tabela existente uma coluna declarada nos models"""
+    if column_name in {column["name"] for column in inspect(conn).get_columns(table_name)}:
+        return
+    column = Base.metadata.tables[table_name].c[column_name]
+    # Enum nativo (CREATE TYPE no PostgreSQL) precisa existir antes do ALTER; no SQLite não faz nada
+    if isinstance(column.type, Enum):
+        column.type.create(bind=conn, checkfirst=True)
+    conn.execute(DDL(
+        f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(conn.dialect)}"
+    ))
+
+
+# ==================== MIGRAÇÕES ====================
+
+# Esquema inicial congelado: as tabelas como eram antes das migrações, sem depender
+# dos models (que continuam evoluindo). Não altere: mudanças vão em novas migrações.
+baseline_metadata = MetaData()
+
+Table(
+    "users", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("full_name", String, nullable=False),
+    Column("cpf", String, nullable=False),
+    Column("email", String, nullable=False),
+    Column("password_hash", String, nullable=False),
+    Column("phone", String),
+    Column("phone_verified", Boolean),
+    Column("identity_verified", Boolean),
+    Column("role", Enum("USER", "ADMIN", name="userrole")),
+    Column("reputation_score", Float),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_users_id", "id"),
+    Index("ix_users_cpf", "cpf", unique=True),
+    Index("ix_users_email", "email", unique=True),
+)
+
+Table(
+    "events", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("title", String, nullable=False),
+    Column("description", Text),
+    Column("event_date", DateTime, nullable=False),
+    Column("venue", String, nullable=False),
+    Column("image_banner_url", String),
+    Column("is_active", Boolean),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_events_id", "id"),
+    Index("ix_events_title", "title"),
+)
+
+Table(
+    "user_documents", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("document_type", String, nullable=False),
+    Column("front_image_url", String),
+    Column("back_image_url", String),
+    Column("selfie_url", String),
+    Column("status", Enum("PENDING", "APPROVED", "REJECTED", name="documentstatus")),
+    Column("rejection_reason", Text),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_user_documents_id", "id"),
+)
+
+Table(
+    "event_tickets_master", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("event_id", Integer, ForeignKey("events.id"), nullable=False),
+    Column("category_name", String, nullable=False),
+    Column("face_value", Float, nullable=False),
+    Column("created_at", DateTime),
+    Index("ix_event_tickets_master_id", "id"),
+)
+
+Table(
+    "system_logs", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("action", String, nullable=False),
+    Column("ip_address", String),
+    Column("log_metadata", JSON),
+    Column("created_at", DateTime),
+    Index("ix_system_logs_id", "id"),
+)
+
+Table(
+    "listings", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("seller_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("event_ticket_master_id", Integer, ForeignKey("event_tickets_master.id"), nullable=False),
+    Column("price_asked", Float, nullable=False),
+    Column("ticket_proof_image_url", String),
+    Column("ticket_file_url", String),
+    Column("status", Enum("ACTIVE", "RESERVED", "SOLD", "CANCELLED", name="listingstatus")),
+    Column("description", Text),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Index("ix_listings_id", "id"),
+)
+
+Table(
+    "orders", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("buyer_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("listing_id", Integer, ForeignKey("listings.id"), nullable=False),
+    Column("total_amount", Float, nullable=False),
+    Column("platform_fee", Float),
+    Column("payment_status", Enum("PENDING", "PAID", "REFUNDED", name="paymentstatus")),
+    Column("escrow_status", Enum("HELD", "RELEASED_TO_SELLER", "DISPUTE", name="escrowstatus")),
+    Column("payment_method", String),
+    Column("payment_id", String),
+    Column("created_at", DateTime),
+    Column("completed_at", DateTime),
+    Index("ix_orders_id", "id"),
+)
+
+Table(
+    "chat_rooms", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("listing_id", Integer, ForeignKey("listings.id"), nullable=False),
+    Column("buyer_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("seller_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("status", Enum("OPEN", "ARCHIVED", "BLOCKED", name="chatstatus")),
+    Column("created_at", DateTime),
+    Index("ix_chat_rooms_id", "id"),
+)
+
+Table(
+    "chat_messages", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("chat_room_id", Integer, ForeignKey("chat_rooms.id"), nullable=False),
+    Column("sender_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("message_text", Text, nullable=False),
+    Column("message_type", Enum("TEXT", "IMAGE", "SYSTEM_ALERT", name="messagetype")),
+    Column("is_read", Boolean),
+    Column("flagged_by_system", Boolean),
+    Column("flagged_reason", String),
+    Column("sent_at", DateTime),
+    Index("ix_chat_messages_id", "id"),
+)
+
+Table(
+    "disputes", baseline_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", Integer, ForeignKey("orders.id")),
+    Column("reporter_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("reported_user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("reason", Text, nullable=False),
+    Column("status", Enum("OPEN", "RESOLVED", name="disputestatus")),
+    Column("admin_notes", Text),
+    Column("created_at", DateTime),
+    Column("resolved_at", DateTime),
+    Index("ix_disputes_id", "id"),
+)
+
+
+def _initial_schema(conn: Connection):
+    # Bancos criados antes das migrações já têm as tabelas (checkfirst)
+    baseline_metadata.create_all(bind=conn)
+
+
+HOT_QUERY_INDEXES = {
+    "user_documents": ["ix_user_documents_user_id"],
+    "events": ["ix_events_is_active_event_date_id"],
+    "event_tickets_master": ["ix_event_tickets_master_event_id"],
+    "listings": [
+        "ix_listings_created_at_id",
+        "ix_listings_status_created_at_id",
+        "ix_listings_seller_id_created_at_id",
+        "ix_listings_event_ticket_master_id_status_created_at_id",
+        "ix_listings_seller_id_status",
+    ],
+    "orders": [
+        "ix_orders_payment_status_created_at",
+        "ix_orders_escrow_status_payment_status_completed_at",
+        "ix_orders_buyer_id_created_at_id",
+        "ix_orders_buyer_id_payment_status",
+        "ix_orders_listing_id",
+    ],
+    "chat_rooms": [
+        "ix_chat_rooms_buyer_id_created_at_id",
+        "ix_chat_rooms_seller_id_created_at_id",
+        "ix_chat_rooms_listing_id_buyer_id",
+    ],
+    "chat_messages": [
+        "ix_chat_messages_chat_room_id_sent_at_id",
+        "ix_chat_messages_flagged_by_system_sent_at_id",
+        "ix_chat_messages_chat_room_id_is_read",
+    ],
+    "system_logs": [
+        "ix_system_logs_created_at_id",
+        "ix_system_logs_user_id_created_at_id",
+    ],
+    "disputes": [
+        "ix_disputes_order_id",
+        "ix_disputes_created_at_id",
+        "ix_disputes_status_created_at_id",
+        "ix_disputes_reporter_id_created_at_id",
+        "ix_disputes_reported_user_id_created_at_id",
+    ],
+}
+
+
+def _hot_query_indexes(conn: Connection):
+    for table_name, index_names in HOT_QUERY_INDEXES.items():
+        for index_name in index_names:
+            create_index(conn, table_name, index_name)
+
+
+# FTS5 com conteúdo externo: o índice guarda só os tokens e lê o texto de events.
+# remove_diacritics 2 faz "São Paulo" e "Sao Paulo" gerarem os mesmos tokens, e
+# os índices de prefixo de 2 e 3 caracteres aceleram a busca enquanto o usuário digita.
+EVENTS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, venue,
+        content='events', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, venue) VALUES (new.id, new.title, new.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, venue) VALUES ('delete', old.id, old.title, old.venue);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF title, venue ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, venue) VALUES ('delete', old.id, old.title, old.venue);
+        INSERT INTO events_fts(rowid, title, venue) VALUES (new.id, new.title, new.venue);
+    END
+    """,
+    "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+]
+
+
+def _events_full_text_search(conn: Connection):
+    # Outros bancos continuam com a busca por ILIKE (ver event_service.get_events)
+    if conn.dialect.name != "sqlite":
+        return
+    for statement in EVENTS_FTS_DDL:
+        conn.exec_driver_sql(statement)
+
+
+def _moderation_rulesets(conn: Connection):
+    create_table(conn, "moderation_rulesets")
+    add_column(conn, "chat_messages", "moderation_version")
+
+
+def _chat_unread_counters(conn: Connection):
+    create_table(conn, "chat_unread_counters")
+    # Contadores iniciais a partir do histórico: comprador e vendedor de cada sala
+    rooms = Base.metadata.tables["chat_rooms"]
+    messages = Base.metadata.tables["chat_messages"]
+    counters = Base.metadata.tables["chat_unread_counters"]
+    participants = union(
+        select(rooms.c.id.label("chat_room_id"), rooms.c.buyer_id.label("user_id")),
+        select(rooms.c.id, rooms.c.seller_id)
+    ).subquery()
+    unread = select(func.count())\
+        .where(
+            messages.c.chat_room_id == participants.c.chat_room_id,
+            messages.c.sender_id != participants.c.user_id,
+            messages.c.is_read == false()
+        )\
+        .scalar_subquery()
+    conn.execute(counters.insert().from_select(
+        ["chat_room_id", "user_id", "unread_count"],
+        select(participants.c.chat_room_id, participants.c.user_id, unread)
+    ))
+
+
+def _chat_room_last_activity(conn: Connection):
+    add_column(conn, "chat_rooms", "last_message_id")
+    add_column(conn, "chat_rooms", "last_activity_at")
+    rooms = Base.metadata.tables["chat_rooms"]
+    messages = Base.metadata.tables["chat_messages"]
+    conn.execute(rooms.update().values(
+        last_message_id=select(func.max(messages.c.id))
+            .where(messages.c.chat_room_id == rooms.c.id)
+            .scalar_subquery()
+    ))
+    conn.execute(rooms.update().values(
+        last_activity_at=func.coalesce(
+            select(messages.c.sent_at).where(messages.c.id == rooms.c.last_message_id).scalar_subquery(),
+            rooms.c.created_at
+        )
+    ))
+    create_index(conn, "chat_rooms", "ix_chat_rooms_buyer_id_last_activity_at_id")
+    create_index(conn, "chat_rooms", "ix_chat_rooms_seller_id_last_activity_at_id")
+
+
+def _chat_message_segments(conn: Connection):
+    create_table(conn, "chat_message_segments")
+    add_column(conn, "chat_rooms", "compacted_message_id")
+
+
+# Categoria dos logs já gravados, deduzida do texto da ação
+LOG_CATEGORY_BACKFILL = [
+    ("Mensagem suspeita%", "SUSPICIOUS_MESSAGE"),
+    ("Disputa%", "DISPUTE"),
+    ("Ruleset de moderação%", "MODERATION"),
+]
+
+
+def _system_log_categories(conn: Connection):
+    add_column(conn, "system_logs", "category")
+    logs = Base.metadata.tables["system_logs"]
+    for pattern, category in LOG_CATEGORY_BACKFILL:
+        conn.execute(
+            logs.update()
+            .where(logs.c.category.is_(None), logs.c.action.like(pattern))
+            .values(category=category)
+        )
+    conn.execute(logs.update().where(logs.c.category.is_(None)).values(category="GENERAL"))
+    create_index(conn, "system_logs", "ix_system_logs_category_created_at_id")
+
+
+def _orders_export_index(conn: Connection):
+    create_index(conn, "orders", "ix_orders_created_at_id")
+
+
+def _listing_order_book_index(conn: Connection):
+    create_index(conn, "listings", "ix_listings_event_ticket_master_id_status_price_asked_id")
+
+
+def _job_checkpoints(conn: Connection):
+    # Bancos migrados quando a versão 1 ainda usava os models já têm a tabela (checkfirst)
+    create_table(conn, "job_checkpoints")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Esquema inicial", _initial_schema),
+    Migration(2, "Índices compostos das consultas quentes", _hot_query_indexes),
+    Migration(3, "Busca full-text de eventos (FTS5)", _events_full_text_search),
+    Migration(4, "Rulesets de moderação versionados", _moderation_rulesets),
+    Migration(5, "Contadores de mensagens não lidas", _chat_unread_counters),
+    Migration(6, "Última atividade das salas de chat (inbox)", _chat_room_last_activity),
+    Migration(7, "Segmentos comprimidos do histórico frio do chat", _chat_message_segments),
+    Migration(8, "Categorias dos logs de auditoria", _system_log_categories),
+    Migration(9, "Índice de exportação de pedidos por data", _orders_export_index),
+    Migration(10, "Livro de ofertas por categoria (preço)", _listing_order_book_index),
+    Migration(11, "Checkpoints dos jobs em lote", _job_checkpoints),
+]
+
+
+# ==================== RUNNER ====================
+
+def get_current_version(conn: Connection) -> int:
+    """Maior versão aplicada (0 se o banco nunca foi migrado)"""
+    if not inspect(conn).has_table("schema_migrations"):
+        return 0
+    versions = conn.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Aplica as migrações pendentes, cada uma em sua própria transação"""
+    applied = []
+    with engine.begin() as conn:
+        migration_metadata.create_all(bind=conn)
+        current = get_current_version(conn)
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+        with engine.begin() as conn:
+            migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(migration.version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    applied = run_migrations(engine)
+    with engine.connect() as conn:
+        version = get_current_version(conn)
+    print(f"Migrações aplicadas: {applied or 'nenhuma'} (versão atual: {version})")
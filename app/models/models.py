@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum, Boolean, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum, Boolean, Text, JSON, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -56,6 +56,13 @@ class DisputeStatus(enum.Enum):
     RESOLVED = "RESOLVED"
 
 
+class LogCategory(enum.Enum):
+    GENERAL = "GENERAL"
+    SUSPICIOUS_MESSAGE = "SUSPICIOUS_MESSAGE"
+    DISPUTE = "DISPUTE"
+    MODERATION = "MODERATION"
+
+
 # ==================== MÓDULO 1: USUÁRIOS E SEGURANÇA ====================
 
 class User(Base):
@@ -90,7 +97,7 @@ class UserDocument(Base):
     __tablename__ = "user_documents"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     document_type = Column(String, nullable=False)  # RG, CNH, etc
     front_image_url = Column(String)
     back_image_url = Column(String)
@@ -119,6 +126,11 @@ class Event(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Paginação por (event_date, id) dos eventos ativos
+        Index("ix_events_is_active_event_date_id", "is_active", "event_date", "id"),
+    )
+    
     # Relationships
     ticket_masters = relationship("EventTicketMaster", back_populates="event")
 
@@ -128,7 +140,7 @@ class EventTicketMaster(Base):
     __tablename__ = "event_tickets_master"
 
     id = Column(Integer, primary_key=True, index=True)
-    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, index=True)
     category_name = Column(String, nullable=False)  # Ex: "Pista Premium - Lote 1"
     face_value = Column(Float, nullable=False)  # Valor original impresso no ingresso
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -155,6 +167,18 @@ class Listing(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Paginação por (created_at, id) com os filtros de status e vendedor
+        Index("ix_listings_created_at_id", "created_at", "id"),
+        Index("ix_listings_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_listings_seller_id_created_at_id", "seller_id", "created_at", "id"),
+        # Listings de um evento (join por ticket master) e estatísticas do vendedor
+        Index("ix_listings_event_ticket_master_id_status_created_at_id", "event_ticket_master_id", "status", "created_at", "id"),
+        Index("ix_listings_seller_id_status", "seller_id", "status"),
+        # Livro de ofertas por categoria: ACTIVE em ordem de (price_asked, id), sem tocar a tabela
+        Index("ix_listings_event_ticket_master_id_status_price_asked_id", "event_ticket_master_id", "status", "price_asked", "id"),
+    )
+    
     # Relationships
     seller = relationship("User", back_populates="listings", foreign_keys=[seller_id])
     ticket_master = relationship("EventTicketMaster", back_populates="listings")
@@ -178,6 +202,20 @@ class Order(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime)
     
+    __table_args__ = (
+        # Varredura de reservas expiradas (PENDING mais antigos que o TTL)
+        Index("ix_orders_payment_status_created_at", "payment_status", "created_at"),
+        # Liberação automática de escrow (PAID/HELD com prazo vencido)
+        Index("ix_orders_escrow_status_payment_status_completed_at", "escrow_status", "payment_status", "completed_at"),
+        # Exportação por intervalo de datas em ordem de (created_at, id)
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        # Paginação das compras por (created_at, id)
+        Index("ix_orders_buyer_id_created_at_id", "buyer_id", "created_at", "id"),
+        # Estatísticas do comprador e join listing -> orders (vendas)
+        Index("ix_orders_buyer_id_payment_status", "buyer_id", "payment_status"),
+        Index("ix_orders_listing_id", "listing_id"),
+    )
+    
     # Relationships
     buyer = relationship("User", back_populates="orders_as_buyer", foreign_keys=[buyer_id])
     listing = relationship("Listing", back_populates="orders")
@@ -196,6 +234,21 @@ class ChatRoom(Base):
     seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(SQLEnum(ChatStatus, values_callable=lambda obj: [e.value for e in obj]), default=ChatStatus.OPEN)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Última mensagem da sala, mantida no envio para o inbox não consultar chat_messages por sala
+    last_message_id = Column(Integer)
+    last_activity_at = Column(DateTime, default=datetime.utcnow)
+    # last_message_id visto na última compactação (mensagens anteriores estão em segmentos)
+    compacted_message_id = Column(Integer)
+    
+    __table_args__ = (
+        Index("ix_chat_rooms_buyer_id_created_at_id", "buyer_id", "created_at", "id"),
+        Index("ix_chat_rooms_seller_id_created_at_id", "seller_id", "created_at", "id"),
+        # Inbox por última atividade (uma faixa de índice para cada papel)
+        Index("ix_chat_rooms_buyer_id_last_activity_at_id", "buyer_id", "last_activity_at", "id"),
+        Index("ix_chat_rooms_seller_id_last_activity_at_id", "seller_id", "last_activity_at", "id"),
+        # Chat existente entre comprador e listing
+        Index("ix_chat_rooms_listing_id_buyer_id", "listing_id", "buyer_id"),
+    )
     
     # Relationships
     listing = relationship("Listing", back_populates="chat_rooms")
@@ -216,13 +269,56 @@ class ChatMessage(Base):
     is_read = Column(Boolean, default=False)
     flagged_by_system = Column(Boolean, default=False)  # Detecta palavras suspeitas
     flagged_reason = Column(String)
+    moderation_version = Column(Integer)  # Versão do ruleset que verificou a mensagem (0 = regras padrão)
     sent_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Histórico da sala por (sent_at, id) e fila de mensagens flagadas
+        Index("ix_chat_messages_chat_room_id_sent_at_id", "chat_room_id", "sent_at", "id"),
+        Index("ix_chat_messages_flagged_by_system_sent_at_id", "flagged_by_system", "sent_at", "id"),
+        # Contagem e marcação de não lidas
+        Index("ix_chat_messages_chat_room_id_is_read", "chat_room_id", "is_read"),
+    )
+    
     # Relationships
     chat_room = relationship("ChatRoom", back_populates="messages")
     sender = relationship("User", back_populates="messages_sent", foreign_keys=[sender_id])
 
 
+class ChatMessageSegment(Base):
+    """Histórico frio do chat: mensagens antigas de uma sala em bloco comprimido (append-only)"""
+    __tablename__ = "chat_message_segments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chat_room_id = Column(Integer, ForeignKey("chat_rooms.id"), nullable=False)
+    first_message_id = Column(Integer, nullable=False)
+    last_message_id = Column(Integer, nullable=False)
+    first_sent_at = Column(DateTime)
+    last_sent_at = Column(DateTime)
+    message_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)  # JSON das mensagens comprimido com zlib
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Leitura da sala em ordem (e a partir de um cursor) e consulta de disputas por sala
+        Index("ix_chat_message_segments_chat_room_id_last_message_id", "chat_room_id", "last_message_id"),
+    )
+
+
+class ChatUnreadCounter(Base):
+    """Mensagens não lidas por (sala, destinatário), mantidas na escrita"""
+    __tablename__ = "chat_unread_counters"
+
+    chat_room_id = Column(Integer, ForeignKey("chat_rooms.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Total e detalhamento por sala do usuário sem tocar em chat_messages
+        Index("ix_chat_unread_counters_user_id_chat_room_id_unread_count", "user_id", "chat_room_id", "unread_count"),
+    )
+
+
 # ==================== MÓDULO 5: AUDITORIA E LOGS ====================
 
 class SystemLog(Base):
@@ -231,11 +327,19 @@ class SystemLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    category = Column(SQLEnum(LogCategory, values_callable=lambda obj: [e.value for e in obj]), default=LogCategory.GENERAL)
     action = Column(String, nullable=False)
     ip_address = Column(String)
     log_metadata = Column(JSON)  # Detalhes técnicos em JSON
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index("ix_system_logs_created_at_id", "created_at", "id"),
+        Index("ix_system_logs_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Filtro por categoria (atividades suspeitas, disputas) e retenção por categoria
+        Index("ix_system_logs_category_created_at_id", "category", "created_at", "id"),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="logs")
 
@@ -245,7 +349,7 @@ class Dispute(Base):
     __tablename__ = "disputes"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True)  # Opcional
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=True, index=True)  # Opcional
     reporter_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     reported_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     reason = Column(Text, nullable=False)
@@ -254,7 +358,38 @@ class Dispute(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     resolved_at = Column(DateTime)
     
+    __table_args__ = (
+        Index("ix_disputes_created_at_id", "created_at", "id"),
+        Index("ix_disputes_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_disputes_reporter_id_created_at_id", "reporter_id", "created_at", "id"),
+        Index("ix_disputes_reported_user_id_created_at_id", "reported_user_id", "created_at", "id"),
+    )
+    
     # Relationships
     order = relationship("Order", back_populates="disputes")
     reporter = relationship("User", back_populates="disputes_reported", foreign_keys=[reporter_id])
     reported_user = relationship("User", back_populates="disputes_received", foreign_keys=[reported_user_id])
+
+
+class ModerationRuleset(Base):
+    """Versões publicadas das regras de moderação do chat (a maior é a ativa)"""
+    __tablename__ = "moderation_rulesets"
+
+    id = Column(Integer, primary_key=True, index=True)  # Versão
+    keywords = Column(JSON, nullable=False)
+    description = Column(String)
+    published_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_moderation_rulesets_created_at_id", "created_at", "id"),
+    )
+
+
+class JobCheckpoint(Base):
+    """Progresso de jobs em lote (permite retomar após falha)"""
+    __tablename__ = "job_checkpoints"
+
+    name = Column(String, primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
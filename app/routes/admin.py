@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
+import os
 
+from app.config import settings
 from app.database import get_db
 from app.schemas.schemas import (
     DisputeCreate, DisputeUpdate, DisputeResponse,
-    SystemLogResponse, DisputeStatus
+    SystemLogResponse, DisputeStatus, LogCategory, PaymentStatus,
+    ModerationRulesetCreate, ModerationRulesetResponse,
+    ChatMessageResponse
 )
-from app.services import system_service
+from app.services import system_service, moderation_service, chat_service, export_service, scheduler
+from app.services.price_cache import price_cache
+from app.services.inventory_cache import inventory_cache
+from app.services.http_cache import response_cache
+from app.services.realtime import chat_hub
+from app.services.audit_log import audit_writer
+from app.services.pagination import cursor_param, set_next_cursor
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -32,26 +44,39 @@ def create_dispute(
 
 @router.get("/disputes", response_model=List[DisputeResponse])
 def list_disputes(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status_filter: Optional[DisputeStatus] = Query(None, alias="status", description="Filtrar por status"),
     reported_user_id: Optional[int] = Query(None, description="Filtrar por usuário denunciado"),
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista disputas (ADMIN)"""
-    return system_service.get_disputes(
+    disputes = system_service.get_disputes(
         db,
         status=status_filter,
         reported_user_id=reported_user_id,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor
     )
+    set_next_cursor(response, disputes, limit, "created_at")
+    return disputes
 
 
 @router.get("/disputes/open", response_model=List[DisputeResponse])
-def list_open_disputes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def list_open_disputes(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
     """Lista disputas abertas (ADMIN)"""
-    return system_service.get_open_disputes(db, skip=skip, limit=limit)
+    disputes = system_service.get_open_disputes(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, disputes, limit, "created_at")
+    return disputes
 
 
 @router.get("/disputes/{dispute_id}", response_model=DisputeResponse)
@@ -66,26 +91,50 @@ def get_dispute(dispute_id: int, db: Session = Depends(get_db)):
     return db_dispute
 
 
+@router.get("/disputes/{dispute_id}/messages", response_model=List[ChatMessageResponse])
+def get_dispute_messages(
+    dispute_id: int,
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """Conversa entre denunciante e denunciado, incluindo o histórico compactado"""
+    db_dispute = system_service.get_dispute(db, dispute_id)
+    if not db_dispute:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Disputa não encontrada"
+        )
+    return chat_service.get_messages_between(db, db_dispute.reporter_id, db_dispute.reported_user_id, limit=limit)
+
+
 @router.get("/disputes/user/{user_id}/reported", response_model=List[DisputeResponse])
 def list_user_disputes_reported(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista disputas feitas por um usuário"""
-    return system_service.get_user_disputes(db, user_id, as_reporter=True, skip=skip, limit=limit)
+    disputes = system_service.get_user_disputes(db, user_id, as_reporter=True, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, disputes, limit, "created_at")
+    return disputes
 
 
 @router.get("/disputes/user/{user_id}/received", response_model=List[DisputeResponse])
 def list_user_disputes_received(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista disputas contra um usuário"""
-    return system_service.get_user_disputes(db, user_id, as_reporter=False, skip=skip, limit=limit)
+    disputes = system_service.get_user_disputes(db, user_id, as_reporter=False, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, disputes, limit, "created_at")
+    return disputes
 
 
 @router.put("/disputes/{dispute_id}", response_model=DisputeResponse)
@@ -125,13 +174,18 @@ def resolve_dispute(
 
 @router.get("/logs", response_model=List[SystemLogResponse])
 def list_logs(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     user_id: Optional[int] = Query(None, description="Filtrar por usuário"),
+    category: Optional[LogCategory] = Query(None, description="Filtrar por categoria"),
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista logs de auditoria (ADMIN)"""
-    return system_service.get_logs(db, user_id=user_id, skip=skip, limit=limit)
+    logs = system_service.get_logs(db, user_id=user_id, category=category, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, logs, limit, "created_at")
+    return logs
 
 
 @router.get("/logs/suspicious", response_model=List[SystemLogResponse])
@@ -140,7 +194,177 @@ def list_suspicious_activities(limit: int = 50, db: Session = Depends(get_db)):
     return system_service.get_recent_suspicious_activities(db, limit=limit)
 
 
+@router.get("/logs/archive")
+def list_log_archives():
+    """Lista os arquivos mensais de logs já retirados do banco (ADMIN)"""
+    return system_service.list_log_archives(settings.log_archive_dir)
+
+
+@router.get("/logs/archive/{month}")
+def download_log_archive(month: str):
+    """Baixa o arquivo mensal de logs (NDJSON gzip, mesmo formato de /admin/export/logs?gzip=true) (ADMIN)"""
+    try:
+        path = system_service.log_archive_path(settings.log_archive_dir, month)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not settings.log_archive_dir or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Nenhum arquivo de logs para {month}"
+        )
+    return FileResponse(path, media_type="application/gzip", filename=os.path.basename(path))
+
+
+# ==================== EXPORTS ====================
+
+def _export_response(kind: str, fmt: str, start: Optional[datetime], end: Optional[datetime], compress: bool, **filters):
+    try:
+        body = export_service.stream_export(kind, fmt, start=start, end=end, compress=compress, filters=filters)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    filename = export_service.export_filename(kind, fmt, compress)
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if compress else export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/export/logs")
+def export_logs(
+    format: str = Query("ndjson", description="ndjson ou csv"),
+    start: Optional[datetime] = Query(None, description="created_at >= start"),
+    end: Optional[datetime] = Query(None, description="created_at < end"),
+    gzip: bool = Query(False, description="Comprime a saída (arquivo .gz)"),
+    category: Optional[LogCategory] = Query(None),
+    user_id: Optional[int] = Query(None),
+):
+    """Exporta system_logs completo em streaming (ADMIN)"""
+    return _export_response(
+        "logs", format, start, end, gzip,
+        category=category.value if category else None, user_id=user_id
+    )
+
+
+@router.get("/export/orders")
+def export_orders(
+    format: str = Query("ndjson", description="ndjson ou csv"),
+    start: Optional[datetime] = Query(None, description="created_at >= start"),
+    end: Optional[datetime] = Query(None, description="created_at < end"),
+    gzip: bool = Query(False, description="Comprime a saída (arquivo .gz)"),
+    payment_status: Optional[PaymentStatus] = Query(None),
+    buyer_id: Optional[int] = Query(None),
+):
+    """Exporta orders completo em streaming (ADMIN)"""
+    return _export_response(
+        "orders", format, start, end, gzip,
+        payment_status=payment_status.value if payment_status else None, buyer_id=buyer_id
+    )
+
+
 @router.get("/users/{user_id}/reputation-impact")
 def get_user_reputation_impact(user_id: int, db: Session = Depends(get_db)):
     """Analisa impacto de disputas na reputação (ADMIN)"""
     return system_service.get_user_reputation_impact(db, user_id)
+
+
+# ==================== MODERATION ====================
+
+@router.post("/moderation/rulesets", response_model=ModerationRulesetResponse, status_code=status.HTTP_201_CREATED)
+def publish_moderation_ruleset(
+    ruleset: ModerationRulesetCreate,
+    admin_id: Optional[int] = Query(None, description="ID do admin que publica"),
+    db: Session = Depends(get_db)
+):
+    """Publica nova versão das regras de moderação do chat (ADMIN)"""
+    try:
+        return moderation_service.publish_ruleset(db, ruleset, published_by=admin_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/moderation/rulesets", response_model=List[ModerationRulesetResponse])
+def list_moderation_rulesets(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """Histórico de rulesets de moderação (ADMIN)"""
+    rulesets = moderation_service.get_rulesets(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, rulesets, limit, "created_at")
+    return rulesets
+
+
+@router.get("/moderation/rulesets/active")
+def get_active_moderation_ruleset():
+    """Ruleset em uso neste worker (ADMIN)"""
+    return moderation_service.get_active_ruleset_info()
+
+
+@router.get("/moderation/pipeline")
+def get_moderation_pipeline_stats():
+    """Fila e contadores da verificação profunda do chat (ADMIN)"""
+    return chat_service.moderation_pipeline.stats()
+
+
+@router.get("/realtime")
+def get_realtime_stats():
+    """Conexões WebSocket e eventos entregues neste worker (ADMIN)"""
+    return chat_hub.stats()
+
+
+@router.get("/audit-log")
+def get_audit_log_stats():
+    """Buffer de logs de auditoria deste worker: fila, lotes e latência do flush (ADMIN)"""
+    return audit_writer.stats()
+
+
+@router.get("/moderation/rulesets/{version}", response_model=ModerationRulesetResponse)
+def get_moderation_ruleset(version: int, db: Session = Depends(get_db)):
+    """Busca ruleset por versão (ADMIN)"""
+    ruleset = moderation_service.get_ruleset(db, version)
+    if not ruleset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ruleset não encontrado"
+        )
+    return ruleset
+
+
+# ==================== JOBS ====================
+
+@router.get("/jobs")
+def list_jobs():
+    """Métricas dos jobs em background (ADMIN)"""
+    return scheduler.get_metrics()
+
+
+@router.post("/jobs/{job_name}/run")
+def run_job(job_name: str):
+    """Executa um job imediatamente (ADMIN)"""
+    job = scheduler.JOBS.get(job_name)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado"
+        )
+    return {"job": job_name, "result": job.run_once()}
+
+
+# ==================== CACHES ====================
+
+@router.get("/caches")
+def cache_stats():
+    """Contadores de hit/miss dos caches em processo (ADMIN)"""
+    return {"price_ceilings": price_cache.stats(), "inventory": inventory_cache.stats(), "http": response_cache.stats()}
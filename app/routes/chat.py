@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, WebSocket
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.database import get_db
+from app.config import settings
+from app.database import SessionLocal, get_db, get_async_db
 from app.schemas.schemas import (
     ChatRoomCreate, ChatRoomResponse,
-    ChatMessageCreate, ChatMessageResponse
+    ChatMessageCreate, ChatMessageResponse,
+    ChatInboxItem, ChatInboxMessage
 )
 from app.services import chat_service
+from app.services.pagination import cursor_param, set_next_cursor
+from app.services.realtime import chat_hub
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -45,12 +51,50 @@ def get_chat_room(chat_room_id: int, db: Session = Depends(get_db)):
 @router.get("/rooms/user/{user_id}", response_model=List[ChatRoomResponse])
 def list_user_chat_rooms(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista chats de um usuário"""
-    return chat_service.get_user_chat_rooms(db, user_id, skip=skip, limit=limit)
+    chat_rooms = chat_service.get_user_chat_rooms(db, user_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, chat_rooms, limit, "created_at")
+    return chat_rooms
+
+
+@router.get("/user/{user_id}/inbox", response_model=List[ChatInboxItem])
+def get_inbox(
+    user_id: int,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """Caixa de entrada: salas por última atividade com prévia da última mensagem"""
+    rows = chat_service.get_inbox(db, user_id, limit=limit, cursor=cursor)
+    set_next_cursor(response, rows, limit, "last_activity_at")
+    return [
+        ChatInboxItem(
+            chat_room_id=row.id,
+            listing_id=row.listing_id,
+            event_title=row.event_title,
+            ticket_category=row.ticket_category,
+            counterpart_id=row.counterpart_id,
+            counterpart_name=row.counterpart_name,
+            status=row.status,
+            last_activity_at=row.last_activity_at,
+            unread_count=row.unread_count,
+            last_message=ChatInboxMessage(
+                id=row.last_message_id,
+                sender_id=row.last_message_sender_id,
+                message_text=row.last_message_text,
+                message_type=row.last_message_type,
+                sent_at=row.last_message_sent_at
+            ) if row.last_message_id is not None else None
+        )
+        for row in rows
+    ]
 
 
 @router.post("/rooms/{chat_room_id}/archive", response_model=ChatRoomResponse)
@@ -79,37 +123,76 @@ def block_chat_room(chat_room_id: int, db: Session = Depends(get_db)):
 
 # ==================== CHAT MESSAGES ====================
 
-@router.post("/rooms/{chat_room_id}/messages", response_model=ChatMessageResponse, status_code=status.HTTP_201_CREATED)
-def send_message(
-    chat_room_id: int,
-    message: ChatMessageCreate,
-    sender_id: int = Query(..., description="ID do remetente"),
-    db: Session = Depends(get_db)
-):
-    """Envia mensagem (com moderação automática)"""
-    try:
-        return chat_service.send_message(db, chat_room_id, sender_id, message)
-    except PermissionError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e)
-        )
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+if settings.db_async:
+    @router.post("/rooms/{chat_room_id}/messages", response_model=ChatMessageResponse, status_code=status.HTTP_201_CREATED)
+    async def send_message(
+        chat_room_id: int,
+        message: ChatMessageCreate,
+        sender_id: int = Query(..., description="ID do remetente"),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        """Envia mensagem (com moderação automática)"""
+        try:
+            return await chat_service.send_message_async(db, chat_room_id, sender_id, message)
+        except PermissionError as e:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
 
+    @router.get("/rooms/{chat_room_id}/messages", response_model=List[ChatMessageResponse])
+    async def list_chat_messages(
+        chat_room_id: int,
+        response: Response,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = Depends(cursor_param),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        """Lista mensagens de um chat"""
+        messages = await chat_service.get_chat_messages_async(db, chat_room_id, skip=skip, limit=limit, cursor=cursor)
+        set_next_cursor(response, messages, limit, "sent_at")
+        return messages
+else:
+    @router.post("/rooms/{chat_room_id}/messages", response_model=ChatMessageResponse, status_code=status.HTTP_201_CREATED)
+    def send_message(
+        chat_room_id: int,
+        message: ChatMessageCreate,
+        sender_id: int = Query(..., description="ID do remetente"),
+        db: Session = Depends(get_db)
+    ):
+        """Envia mensagem (com moderação automática)"""
+        try:
+            return chat_service.send_message(db, chat_room_id, sender_id, message)
+        except PermissionError as e:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=str(e)
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
 
-@router.get("/rooms/{chat_room_id}/messages", response_model=List[ChatMessageResponse])
-def list_chat_messages(
-    chat_room_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
-):
-    """Lista mensagens de um chat"""
-    return chat_service.get_chat_messages(db, chat_room_id, skip=skip, limit=limit)
+    @router.get("/rooms/{chat_room_id}/messages", response_model=List[ChatMessageResponse])
+    def list_chat_messages(
+        chat_room_id: int,
+        response: Response,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = Depends(cursor_param),
+        db: Session = Depends(get_db)
+    ):
+        """Lista mensagens de um chat"""
+        messages = chat_service.get_chat_messages(db, chat_room_id, skip=skip, limit=limit, cursor=cursor)
+        set_next_cursor(response, messages, limit, "sent_at")
+        return messages
 
 
 @router.post("/rooms/{chat_room_id}/mark-read")
@@ -124,9 +207,17 @@ def mark_messages_as_read(
 
 
 @router.get("/messages/flagged", response_model=List[ChatMessageResponse])
-def list_flagged_messages(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def list_flagged_messages(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
     """Lista mensagens flagadas (ADMIN)"""
-    return chat_service.get_flagged_messages(db, skip=skip, limit=limit)
+    messages = chat_service.get_flagged_messages(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, messages, limit, "sent_at")
+    return messages
 
 
 @router.get("/user/{user_id}/unread-count")
@@ -134,3 +225,54 @@ def get_unread_count(user_id: int, db: Session = Depends(get_db)):
     """Conta mensagens não lidas"""
     count = chat_service.get_unread_count(db, user_id)
     return {"unread_count": count}
+
+
+@router.get("/user/{user_id}/unread")
+def get_unread_by_room(user_id: int, db: Session = Depends(get_db)):
+    """Não lidas por sala (só as salas com mensagens pendentes)"""
+    counters = chat_service.get_unread_by_room(db, user_id)
+    return {
+        "unread_count": sum(counter.unread_count for counter in counters),
+        "rooms": [
+            {"chat_room_id": counter.chat_room_id, "unread_count": counter.unread_count}
+            for counter in counters
+        ]
+    }
+
+
+# ==================== REAL TIME ====================
+
+def _with_session(func, *args):
+    """Executa um service com sessão própria e curta (a conexão WebSocket dura muito mais)"""
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+def _room_participants(db: Session, chat_room_id: int) -> Optional[tuple]:
+    chat_room = chat_service.get_chat_room(db, chat_room_id)
+    return (chat_room.buyer_id, chat_room.seller_id) if chat_room else None
+
+
+@router.websocket("/rooms/{chat_room_id}/ws")
+async def chat_room_socket(
+    websocket: WebSocket,
+    chat_room_id: int,
+    user_id: int = Query(..., description="ID do participante")
+):
+    """Recebe em tempo real as novas mensagens e confirmações de leitura da sala.
+    
+    O cliente pode enviar {"type": "read"} para marcar as mensagens recebidas como lidas."""
+    participants = await run_in_threadpool(_with_session, _room_participants, chat_room_id)
+    if participants is None or user_id not in participants:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    async def on_receive(event: dict):
+        if event.get("type") == "read":
+            await run_in_threadpool(_with_session, chat_service.mark_messages_as_read, chat_room_id, user_id)
+    
+    await websocket.accept()
+    await chat_hub.serve(websocket, chat_room_id, on_receive)
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.config import settings
 from app.database import get_db
 from app.schemas.schemas import (
     EventCreate, EventUpdate, EventResponse,
-    EventTicketMasterCreate, EventTicketMasterResponse
+    EventTicketMasterCreate, EventTicketMasterResponse, EventInventoryResponse
 )
 from app.services import event_service
+from app.services.inventory_cache import inventory_cache
+from app.services.pagination import cursor_param, set_next_cursor
+from app.serialization import list_response
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -22,20 +26,42 @@ def create_event(event: EventCreate, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[EventResponse])
 def list_events(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    search: Optional[str] = Query(None, description="Buscar por título ou local"),
+    search: Optional[str] = Query(None, description="Buscar por título ou local (por relevância, paginado com skip)"),
     active_only: bool = Query(True, description="Apenas eventos ativos"),
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista eventos"""
-    return event_service.get_events(db, skip=skip, limit=limit, search=search, active_only=active_only)
+    if search and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A busca é ordenada por relevância: pagine com skip"
+        )
+    
+    events = event_service.get_events(
+        db, skip=skip, limit=limit, search=search, active_only=active_only, cursor=cursor,
+        as_rows=settings.fast_json
+    )
+    if not search:
+        set_next_cursor(response, events, limit, "event_date")
+    return list_response(events, response)
 
 
 @router.get("/upcoming", response_model=List[EventResponse])
-def list_upcoming_events(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def list_upcoming_events(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
     """Lista eventos futuros"""
-    return event_service.get_upcoming_events(db, skip=skip, limit=limit)
+    events = event_service.get_upcoming_events(db, skip=skip, limit=limit, cursor=cursor, as_rows=settings.fast_json)
+    set_next_cursor(response, events, limit, "event_date")
+    return list_response(events, response)
 
 
 @router.get("/{event_id}", response_model=EventResponse)
@@ -50,6 +76,18 @@ def get_event(event_id: int, db: Session = Depends(get_db)):
     return db_event
 
 
+@router.get("/{event_id}/inventory", response_model=EventInventoryResponse)
+def get_event_inventory(event_id: int, db: Session = Depends(get_db)):
+    """Ingressos disponíveis e reservados e faixa de preço, no total e por categoria"""
+    summary = inventory_cache.get_summary(db, event_id)
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado"
+        )
+    return summary
+
+
 @router.put("/{event_id}", response_model=EventResponse)
 def update_event(event_id: int, event_update: EventUpdate, db: Session = Depends(get_db)):
     """Atualiza evento (ADMIN)"""
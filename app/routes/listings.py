@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.database import get_db
-from app.schemas.schemas import ListingCreate, ListingUpdate, ListingResponse, ListingDetailResponse
+from app.config import settings
+from app.database import get_db, get_async_db
+from app.schemas.schemas import ListingCreate, ListingUpdate, ListingResponse, ListingDetailResponse, PriceLevel
 from app.services import listing_service
+from app.services.pagination import cursor_param, set_next_cursor
+from app.serialization import list_response
 from app.models.models import ListingStatus
 
 router = APIRouter(prefix="/listings", tags=["listings"])
@@ -26,52 +30,121 @@ def create_listing(
         )
 
 
-@router.get("/", response_model=List[ListingResponse])
+@router.get("/", response_model=List[ListingDetailResponse])
 def list_listings(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     event_id: Optional[int] = Query(None, description="Filtrar por evento"),
     status_filter: Optional[ListingStatus] = Query(None, alias="status", description="Filtrar por status"),
     seller_id: Optional[int] = Query(None, description="Filtrar por vendedor"),
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
-    """Lista anúncios com filtros"""
-    return listing_service.get_listings(
+    """Lista anúncios com filtros (com vendedor, categoria e evento)"""
+    listings = listing_service.get_listing_details(
         db,
         skip=skip,
         limit=limit,
         event_id=event_id,
         status=status_filter,
-        seller_id=seller_id
+        seller_id=seller_id,
+        cursor=cursor
     )
+    set_next_cursor(response, listings, limit, "created_at")
+    return list_response(listings, response)
+
+
+if settings.db_async:
+    @router.get("/active", response_model=List[ListingDetailResponse])
+    async def list_active_listings(
+        response: Response,
+        skip: int = 0,
+        limit: int = 100,
+        event_id: Optional[int] = Query(None, description="Filtrar por evento"),
+        cursor: Optional[str] = Depends(cursor_param),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        """Lista apenas anúncios ativos"""
+        listings = await listing_service.get_listing_details_async(
+            db, event_id=event_id, status=ListingStatus.ACTIVE, skip=skip, limit=limit, cursor=cursor
+        )
+        set_next_cursor(response, listings, limit, "created_at")
+        return list_response(listings, response)
+else:
+    @router.get("/active", response_model=List[ListingDetailResponse])
+    def list_active_listings(
+        response: Response,
+        skip: int = 0,
+        limit: int = 100,
+        event_id: Optional[int] = Query(None, description="Filtrar por evento"),
+        cursor: Optional[str] = Depends(cursor_param),
+        db: Session = Depends(get_db)
+    ):
+        """Lista apenas anúncios ativos"""
+        listings = listing_service.get_listing_details(
+            db, event_id=event_id, status=ListingStatus.ACTIVE, skip=skip, limit=limit, cursor=cursor
+        )
+        set_next_cursor(response, listings, limit, "created_at")
+        return list_response(listings, response)
 
 
-@router.get("/active", response_model=List[ListingResponse])
-def list_active_listings(
+@router.get("/seller/{seller_id}", response_model=List[ListingDetailResponse])
+def list_seller_listings(
+    seller_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    event_id: Optional[int] = Query(None, description="Filtrar por evento"),
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
-    """Lista apenas anúncios ativos"""
-    return listing_service.get_active_listings(db, event_id=event_id, skip=skip, limit=limit)
+    """Lista anúncios de um vendedor"""
+    listings = listing_service.get_listing_details(db, seller_id=seller_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, listings, limit, "created_at")
+    return list_response(listings, response)
 
 
-@router.get("/seller/{seller_id}", response_model=List[ListingResponse])
-def list_seller_listings(
-    seller_id: int,
-    skip: int = 0,
-    limit: int = 100,
+@router.get("/order-book/{ticket_master_id}", response_model=List[ListingDetailResponse])
+def list_cheapest_listings(
+    ticket_master_id: int,
+    response: Response,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
-    """Lista anúncios de um vendedor"""
-    return listing_service.get_seller_listings(db, seller_id, skip=skip, limit=limit)
+    """Próximos N anúncios ativos mais baratos da categoria (cursor para os seguintes)"""
+    listings = listing_service.get_cheapest_listings(db, ticket_master_id, limit=limit, cursor=cursor)
+    set_next_cursor(response, listings, limit, "price_asked")
+    return list_response(listings, response)
+
+
+@router.get("/order-book/{ticket_master_id}/best", response_model=ListingDetailResponse)
+def get_best_offer(ticket_master_id: int, db: Session = Depends(get_db)):
+    """Anúncio ativo mais barato da categoria"""
+    db_listing = listing_service.get_best_offer(db, ticket_master_id)
+    if not db_listing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Nenhum anúncio ativo nesta categoria"
+        )
+    return db_listing
+
+
+@router.get("/order-book/{ticket_master_id}/depth", response_model=List[PriceLevel])
+def get_price_depth(
+    ticket_master_id: int,
+    bucket_size: float = Query(10.0, gt=0, description="Largura de cada faixa de preço (R$)"),
+    levels: int = Query(10, ge=1, le=100, description="Número de faixas a partir do melhor preço"),
+    db: Session = Depends(get_db)
+):
+    """Profundidade do livro de ofertas: anúncios ativos por faixa de preço"""
+    return listing_service.get_price_depth(db, ticket_master_id, bucket_size=bucket_size, levels=levels)
 
 
-@router.get("/{listing_id}", response_model=ListingResponse)
+@router.get("/{listing_id}", response_model=ListingDetailResponse)
 def get_listing(listing_id: int, db: Session = Depends(get_db)):
-    """Busca anúncio por ID"""
-    db_listing = listing_service.get_listing(db, listing_id)
+    """Busca anúncio por ID (com vendedor, categoria e evento)"""
+    db_listing = listing_service.get_listing_detail(db, listing_id)
     if not db_listing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
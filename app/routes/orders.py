@@ -1,28 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Callable, List, Optional, Union
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_async_db
 from app.schemas.schemas import OrderCreate, OrderResponse, OrderDetailResponse, SellerStats, BuyerStats
-from app.services import order_service
+from app.services import order_service, listing_service
+from app.services.queue_service import waiting_room
+from app.services.pagination import cursor_param, set_next_cursor
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
+def _claim_admission(event_id: Optional[int], buyer_id: int, admission_token: Optional[str]) -> bool:
+    """Valida o token da sala de espera quando o evento exige admissão"""
+    if event_id is None or not waiting_room.requires_admission(event_id):
+        return False
+    
+    waiting_room.claim(event_id, buyer_id, admission_token)
+    return True
+
+
+def _checkout_error(e: Exception) -> HTTPException:
+    """Status HTTP dos erros do checkout (conflito de estoque, admissão, validação)"""
+    if isinstance(e, order_service.CheckoutConflictError):
+        code = status.HTTP_409_CONFLICT
+    elif isinstance(e, PermissionError):
+        code = status.HTTP_403_FORBIDDEN
+    else:
+        code = status.HTTP_400_BAD_REQUEST
+    return HTTPException(status_code=code, detail=str(e))
+
+
+async def _run(db: Union[Session, AsyncSession], sync_fn: Callable, async_fn: Callable, *args):
+    """Chama a versão async do serviço ou a síncrona no threadpool, conforme a sessão"""
+    if isinstance(db, AsyncSession):
+        return await async_fn(db, *args)
+    return await run_in_threadpool(sync_fn, db, *args)
+
+
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(
+async def create_order(
     order: OrderCreate,
     buyer_id: int = Query(..., description="ID do comprador"),
-    db: Session = Depends(get_db)
+    admission_token: Optional[str] = Query(None, description="Token da sala de espera (eventos concorridos)"),
+    db: Union[Session, AsyncSession] = Depends(get_async_db if settings.db_async else get_db)
 ):
     """Cria pedido (dinheiro em escrow)"""
+    claimed = created = False
     try:
-        return order_service.create_order(db, buyer_id, order)
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
+        event_id = await _run(
+            db, listing_service.get_listing_event_id, listing_service.get_listing_event_id_async, order.listing_id
         )
+        # O store (Redis) é síncrono: fora do event loop
+        claimed = await run_in_threadpool(_claim_admission, event_id, buyer_id, admission_token)
+        db_order = await _run(db, order_service.create_order, order_service.create_order_async, buyer_id, order)
+        created = True
+        return db_order
+    except (ValueError, PermissionError) as e:
+        raise _checkout_error(e)
+    finally:
+        if claimed:
+            await run_in_threadpool(waiting_room.release, admission_token, used=created)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -40,23 +81,31 @@ def get_order(order_id: int, db: Session = Depends(get_db)):
 @router.get("/user/{user_id}/purchases", response_model=List[OrderResponse])
 def list_user_purchases(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista compras de um usuário"""
-    return order_service.get_user_orders(db, user_id, as_buyer=True, skip=skip, limit=limit)
+    orders = order_service.get_user_orders(db, user_id, as_buyer=True, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, orders, limit, "created_at")
+    return orders
 
 
 @router.get("/user/{user_id}/sales", response_model=List[OrderResponse])
 def list_user_sales(
     user_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """Lista vendas de um usuário"""
-    return order_service.get_user_orders(db, user_id, as_buyer=False, skip=skip, limit=limit)
+    orders = order_service.get_user_orders(db, user_id, as_buyer=False, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, orders, limit, "created_at")
+    return orders
 
 
 @router.post("/{order_id}/complete-payment", response_model=OrderResponse)
@@ -70,6 +119,11 @@ def complete_payment(order_id: int, db: Session = Depends(get_db)):
                 detail="Pedido não encontrado"
             )
         return db_order
+    except order_service.OrderStateConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -110,6 +164,11 @@ def cancel_order(
                 detail="Pedido não encontrado"
             )
         return db_order
+    except order_service.OrderStateConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
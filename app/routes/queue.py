@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, status, Query
+from typing import Optional
+
+from app.config import settings
+from app.schemas.schemas import WaitingRoomResponse, QueueTicketResponse
+from app.services.queue_service import waiting_room
+
+router = APIRouter(prefix="/queue", tags=["queue"])
+
+
+# ==================== SALA DE ESPERA (ADMIN) ====================
+
+@router.post("/events/{event_id}/open", response_model=WaitingRoomResponse)
+def open_waiting_room(
+    event_id: int,
+    admit_rate: Optional[float] = Query(None, description="Compradores admitidos por segundo"),
+    token_ttl: Optional[int] = Query(None, description="Validade do token de admissão (segundos)")
+):
+    """Abre sala de espera para um evento (ADMIN)"""
+    try:
+        return waiting_room.open_room(
+            event_id,
+            admit_rate=admit_rate or settings.queue_admit_rate,
+            token_ttl=token_ttl or settings.queue_token_ttl
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/events/{event_id}/close")
+def close_waiting_room(event_id: int):
+    """Fecha sala de espera de um evento (ADMIN)"""
+    if not waiting_room.close_room(event_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sala de espera não encontrada"
+        )
+    return {"closed": True}
+
+
+@router.get("/events/{event_id}", response_model=WaitingRoomResponse)
+def get_waiting_room(event_id: int):
+    """Busca configuração da sala de espera"""
+    room = waiting_room.get_room(event_id)
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sala de espera não encontrada"
+        )
+    return room
+
+
+# ==================== FILA (COMPRADOR) ====================
+
+@router.post("/events/{event_id}/join", response_model=QueueTicketResponse, status_code=status.HTTP_201_CREATED)
+def join_queue(event_id: int, user_id: int = Query(..., description="ID do comprador")):
+    """Entra na fila do evento"""
+    try:
+        return waiting_room.join(event_id, user_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/tickets/{token}", response_model=QueueTicketResponse)
+def get_queue_status(token: str):
+    """Consulta posição na fila e estado do token de admissão"""
+    ticket = waiting_room.status(token)
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Token não encontrado"
+        )
+    return ticket
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.schemas.schemas import (
@@ -8,6 +8,7 @@ from app.schemas.schemas import (
     UserDocumentCreate, UserDocumentResponse
 )
 from app.services import user_service
+from app.services.pagination import cursor_param, set_next_cursor
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -33,9 +34,17 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[UserResponse])
-def list_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista usuários"""
-    return user_service.get_users(db, skip=skip, limit=limit)
+def list_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """Lista usuários (paginação por skip ou cursor)"""
+    users = user_service.get_users(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, users, limit, "id")
+    return users
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -53,6 +53,20 @@ class DisputeStatus(str, Enum):
     RESOLVED = "RESOLVED"
 
 
+class LogCategory(str, Enum):
+    GENERAL = "GENERAL"
+    SUSPICIOUS_MESSAGE = "SUSPICIOUS_MESSAGE"
+    DISPUTE = "DISPUTE"
+    MODERATION = "MODERATION"
+
+
+class QueueStatus(str, Enum):
+    WAITING = "WAITING"
+    ADMITTED = "ADMITTED"
+    USED = "USED"
+    EXPIRED = "EXPIRED"
+
+
 # ==================== USER SCHEMAS ====================
 
 class UserBase(BaseModel):
@@ -158,6 +172,25 @@ class EventTicketMasterResponse(EventTicketMasterBase):
         from_attributes = True
 
 
+class InventorySummary(BaseModel):
+    active_count: int
+    reserved_count: int
+    min_price: Optional[float] = None
+    median_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+
+class CategoryInventory(InventorySummary):
+    ticket_master_id: int
+    category_name: str
+
+
+class EventInventoryResponse(InventorySummary):
+    # Totais do evento e resumo de cada categoria (inventory_cache)
+    event_id: int
+    categories: List[CategoryInventory]
+
+
 # ==================== LISTING SCHEMAS ====================
 
 class ListingBase(BaseModel):
@@ -190,8 +223,24 @@ class ListingResponse(ListingBase):
 
 
 class ListingDetailResponse(ListingResponse):
-    seller: Optional[UserResponse] = None
-    ticket_master: Optional[EventTicketMasterResponse] = None
+    # Vendedor, categoria e evento achatados (listing_service.LISTING_DETAIL_COLUMNS)
+    seller_name: str
+    seller_reputation: float
+    seller_identity_verified: bool
+    category_name: str
+    face_value: float
+    max_allowed_price: float
+    event_id: int
+    event_title: str
+    event_venue: str
+    event_date: datetime
+
+
+class PriceLevel(BaseModel):
+    # Faixa [price_from, price_to) do livro de ofertas de uma categoria
+    price_from: float
+    price_to: float
+    listings: int
 
 
 # ==================== ORDER SCHEMAS ====================
@@ -223,6 +272,25 @@ class OrderDetailResponse(OrderResponse):
     buyer: Optional[UserResponse] = None
 
 
+# ==================== WAITING ROOM SCHEMAS ====================
+
+class WaitingRoomResponse(BaseModel):
+    event_id: int
+    admit_rate: float
+    token_ttl: int
+    admitted: float
+
+
+class QueueTicketResponse(BaseModel):
+    token: str
+    event_id: int
+    user_id: int
+    status: QueueStatus
+    position: int
+    estimated_wait_seconds: float
+    expires_at: Optional[float] = None  # Timestamp UNIX
+
+
 # ==================== CHAT SCHEMAS ====================
 
 class ChatRoomCreate(BaseModel):
@@ -255,8 +323,46 @@ class ChatMessageResponse(BaseModel):
     is_read: bool
     flagged_by_system: bool
     flagged_reason: Optional[str] = None
+    moderation_version: Optional[int] = None
+    sent_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ChatInboxMessage(BaseModel):
+    id: int
+    sender_id: int
+    message_text: str
+    message_type: MessageType
     sent_at: datetime
 
+
+class ChatInboxItem(BaseModel):
+    chat_room_id: int
+    listing_id: int
+    event_title: str
+    ticket_category: str
+    counterpart_id: int
+    counterpart_name: str
+    status: ChatStatus
+    last_activity_at: datetime
+    unread_count: int
+    last_message: Optional[ChatInboxMessage] = None
+
+
+class ModerationRulesetCreate(BaseModel):
+    keywords: List[str] = Field(..., min_length=1)
+    description: Optional[str] = None
+
+
+class ModerationRulesetResponse(BaseModel):
+    id: int
+    keywords: List[str]
+    description: Optional[str] = None
+    published_by: Optional[int] = None
+    created_at: datetime
+
     class Config:
         from_attributes = True
 
@@ -300,6 +406,7 @@ class SystemLogCreate(BaseModel):
 class SystemLogResponse(BaseModel):
     id: int
     user_id: Optional[int] = None
+    category: Optional[LogCategory] = None
     action: str
     ip_address: Optional[str] = None
     log_metadata: Optional[Dict[str, Any]] = None
@@ -0,0 +1,61 @@
+"""
+Serialização rápida das listas (FAST_JSON=1)
+
+Por padrão cada linha devolvida por uma rota com response_model=List[...] é
+validada num modelo Pydantic e depois convertida em JSON. Com FAST_JSON as rotas
+de lista consultam só as colunas do schema (tuplas, sem objetos ORM) e as linhas
+vão direto para o encoder; a conformidade com o schema é garantida pelos testes
+(test_fast_json.py) em vez de validada a cada requisição.
+
+Usa orjson quando instalado (pip install orjson); sem ele, json da biblioteca padrão.
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Sequence
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON compacto em UTF-8; datetimes em ISO 8601 e enums pelo valor, como o Pydantic"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse renderizado com orjson (default_response_class com FAST_JSON)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def list_response(rows: Sequence[Any], response: Response):
+    """Com FAST_JSON serializa as linhas (Row das projeções) direto; senão devolve para o response_model validar.
+
+    Os headers já definidos na response da rota (X-Next-Cursor) são copiados."""
+    if not settings.fast_json:
+        return rows
+
+    return FastJSONResponse(
+        content=[row._asdict() for row in rows],
+        headers=dict(response.headers)
+    )
@@ -0,0 +1,318 @@
+"""
+Gravação em lote dos logs de auditoria (system_logs)
+
+create_log não abre mais uma transação por linha: o registro vai para um buffer
+em memória e uma thread grava o buffer com um INSERT em lote quando atinge
+`batch_size` registros ou a cada `flush_interval` segundos.
+
+Durabilidade: antes de entrar no buffer cada registro é anexado a um arquivo de
+spill local (JSON por linha). Cada lote tem o seu arquivo, apagado só depois do
+commit; no start, arquivos deixados por um processo que caiu são regravados no
+banco (entrega pelo menos uma vez: uma queda entre o commit e a remoção do
+arquivo duplica o lote). O arquivo ativo fica com flock exclusivo, então vários
+workers podem usar o mesmo diretório sem regravar o lote um do outro.
+
+Parado (testes, scripts) ou com AUDIT_LOG_SYNC=1, create_log grava na hora.
+"""
+
+import enum
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.models.models import LogCategory, SystemLog
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem spill em disco
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def json_default(value: Any):
+    """Serializa enums e datas dos metadados (json.dumps default)"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_record(
+    action: str,
+    user_id: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    category: LogCategory = LogCategory.GENERAL,
+    created_at: Optional[datetime] = None
+) -> str:
+    """Serializa o log em uma linha JSON (o horário é o da chamada, não o do flush)"""
+    return json.dumps({
+        "user_id": user_id,
+        "category": category.value,
+        "action": action,
+        "ip_address": ip_address,
+        "log_metadata": metadata,
+        "created_at": (created_at or datetime.utcnow()).isoformat()
+    }, default=json_default, ensure_ascii=False)
+
+
+def decode_record(line: str) -> Dict[str, Any]:
+    """Linha JSON -> parâmetros do INSERT em system_logs"""
+    record = json.loads(line)
+    record["category"] = LogCategory(record.get("category", LogCategory.GENERAL.value))
+    record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return record
+
+
+def _is_complete(line: str) -> bool:
+    """Descarta a linha cortada no fim do spill (registro sendo escrito na queda)"""
+    try:
+        json.loads(line)
+    except ValueError:
+        return False
+    return True
+
+
+class _SpillFile:
+    """Arquivo de spill de um lote, com flock exclusivo enquanto o lote não é gravado"""
+
+    def __init__(self, directory: str, fsync: bool):
+        self.fsync = fsync
+        name = f"{os.getpid()}-{time.time_ns()}.jsonl"
+        self.path = os.path.join(directory, name)
+        # Trava antes de ficar visível com a extensão que a recuperação procura
+        self._file = open(self.path + ".new", "a", encoding="utf-8")
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        os.rename(self.path + ".new", self.path)
+
+    def append(self, line: str):
+        self._file.write(line + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def discard(self):
+        """Lote gravado no banco: remove o arquivo e solta a trava"""
+        os.unlink(self.path)
+        self._file.close()
+
+
+class _Batch:
+    def __init__(self, lines: List[str], spill: Optional[_SpillFile]):
+        self.lines = lines
+        self.spill = spill
+
+
+class AuditLogWriter:
+    """Buffer de logs de auditoria gravado em lote por uma thread"""
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        spill_dir: Optional[str] = None,
+        fsync: bool = False,
+        session_factory: Optional[Callable] = None
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_dir = spill_dir if spill_dir and fcntl is not None else None
+        self.fsync = fsync
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._lines: List[str] = []
+        self._spill: Optional[_SpillFile] = None
+        self._failed: List[_Batch] = []
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self.stats_counters = {
+            "written": 0,
+            "flushed": 0,
+            "batches": 0,
+            "failures": 0,
+            "recovered": 0
+        }
+        self.last_flush_ms: Optional[float] = None
+        self.max_flush_ms = 0.0
+        self._flush_ms_total = 0.0
+
+    def _count(self, **increments: int):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats_counters[key] += value
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    # ----- Ciclo de vida -----
+
+    def start(self):
+        if self.running:
+            return
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self.recover()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Para a thread e grava o que estiver no buffer"""
+        if self.running:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def recover(self) -> int:
+        """Regrava os lotes de spill sem dono (processo que caiu antes do flush)"""
+        recovered = 0
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "*.jsonl"))):
+            with open(path, encoding="utf-8") as spill:
+                try:
+                    fcntl.flock(spill.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    continue  # Lote de um worker vivo
+                if not os.path.exists(path):
+                    continue  # Gravado e removido enquanto esperávamos a trava
+                lines = [line for line in spill.read().splitlines() if _is_complete(line)]
+                try:
+                    if lines:
+                        self._insert(lines)
+                except Exception:
+                    logger.exception("Falha ao recuperar o spill %s (fica para o próximo start)", path)
+                    self._count(failures=1)
+                    continue
+                os.unlink(path)
+            recovered += len(lines)
+        if recovered:
+            logger.warning("Logs de auditoria recuperados do spill: %d", recovered)
+            self._count(recovered=recovered)
+        return recovered
+
+    # ----- Entrada -----
+
+    def write(self, line: str):
+        """Enfileira um registro de encode_record (grava na hora se parado)"""
+        if not self.running:
+            self._insert([line])
+            self._count(written=1, flushed=1)
+            return
+
+        with self._lock:
+            if self.spill_dir:
+                if self._spill is None:
+                    self._spill = _SpillFile(self.spill_dir, self.fsync)
+                self._spill.append(line)
+            self._lines.append(line)
+            full = len(self._lines) >= self.batch_size
+        self._count(written=1)
+        if full:
+            self._wakeup.set()
+
+    # ----- Gravação -----
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _take(self) -> Optional[_Batch]:
+        """Troca o buffer (e o arquivo de spill) por um vazio"""
+        with self._lock:
+            if not self._lines:
+                return None
+            batch = _Batch(self._lines, self._spill)
+            self._lines = []
+            self._spill = None
+            return batch
+
+    def flush(self) -> int:
+        """Grava os lotes pendentes; lotes que falharem ficam para a próxima vez"""
+        with self._flush_lock:
+            batches = self._failed
+            self._failed = []
+            batch = self._take()
+            if batch is not None:
+                batches.append(batch)
+
+            flushed = 0
+            for index, batch in enumerate(batches):
+                start = time.perf_counter()
+                try:
+                    self._insert(batch.lines)
+                except Exception:
+                    logger.exception("Falha ao gravar %d logs de auditoria", len(batch.lines))
+                    self._count(failures=1)
+                    self._failed = batches[index:]
+                    break
+                if batch.spill is not None:
+                    batch.spill.discard()
+                self._record_latency((time.perf_counter() - start) * 1000)
+                self._count(flushed=len(batch.lines), batches=1)
+                flushed += len(batch.lines)
+            return flushed
+
+    def _insert(self, lines: List[str]):
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+
+        db = self.session_factory()
+        try:
+            db.execute(insert(SystemLog), [decode_record(line) for line in lines])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _record_latency(self, elapsed_ms: float):
+        with self._stats_lock:
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self._flush_ms_total += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            counters = dict(self.stats_counters)
+            batches = counters["batches"]
+            counters.update({
+                "last_flush_ms": round(self.last_flush_ms, 2) if self.last_flush_ms is not None else None,
+                "avg_flush_ms": round(self._flush_ms_total / batches, 2) if batches else None,
+                "max_flush_ms": round(self.max_flush_ms, 2)
+            })
+        with self._lock:
+            queue_depth = len(self._lines)
+        counters.update({
+            "running": self.running,
+            "queue_depth": queue_depth + sum(len(batch.lines) for batch in self._failed),
+            "failed_batches": len(self._failed),
+            "spill_dir": self.spill_dir
+        })
+        return counters
+
+
+audit_writer = AuditLogWriter(
+    batch_size=settings.audit_log_batch_size,
+    flush_interval=settings.audit_log_flush_interval,
+    spill_dir=settings.audit_log_spill_dir or None,
+    fsync=settings.audit_log_fsync
+)
@@ -0,0 +1,300 @@
+"""
+Histórico frio do chat (tiering)
+
+A compactação tira de chat_messages as mensagens de salas arquivadas ou paradas
+e grava em chat_message_segments, em blocos JSON comprimidos com zlib que nunca
+são alterados. A última mensagem de cada sala fica na tabela quente (prévia do
+inbox) e só um prefixo do histórico é movido, então todo segmento de uma sala é
+mais antigo que qualquer mensagem quente dela: a leitura percorre os segmentos
+e continua na tabela quente (ver chat_service.get_chat_messages).
+
+Mensagens compactadas contam como lidas: os contadores de não lidas da sala são
+descontados na mesma transação.
+"""
+
+import json
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import (
+    ChatRoom, ChatMessage, ChatMessageSegment, ChatStatus, ChatUnreadCounter, MessageType
+)
+from app.services import scheduler
+from app.services.pagination import decode_cursor
+
+CHAT_ARCHIVE_JOB = "chat-archive"
+
+# Salas arquivadas esperam um dia: a moderação profunda e reaberturas rápidas ainda usam a tabela quente
+ARCHIVED_ROOM_GRACE = timedelta(days=1)
+
+MESSAGE_COLUMNS = (
+    ChatMessage.id, ChatMessage.sender_id, ChatMessage.message_text, ChatMessage.message_type,
+    ChatMessage.flagged_by_system, ChatMessage.flagged_reason, ChatMessage.moderation_version,
+    ChatMessage.is_read, ChatMessage.sent_at
+)
+
+
+# ==================== SEGMENTOS ====================
+
+def encode_segment(rows) -> bytes:
+    """Serializa as mensagens (linhas de MESSAGE_COLUMNS) em JSON comprimido"""
+    return zlib.compress(json.dumps([
+        [row.id, row.sender_id, row.message_text, row.message_type.value,
+         row.flagged_by_system, row.flagged_reason, row.moderation_version,
+         row.sent_at.isoformat() if row.sent_at else None]
+        for row in rows
+    ], separators=(",", ":")).encode())
+
+
+def decode_segment(segment: ChatMessageSegment) -> List[ChatMessage]:
+    """Reconstrói as mensagens do segmento (objetos fora da sessão, só leitura)"""
+    return [
+        ChatMessage(
+            id=message_id,
+            chat_room_id=segment.chat_room_id,
+            sender_id=sender_id,
+            message_text=message_text,
+            message_type=MessageType(message_type),
+            is_read=True,
+            flagged_by_system=flagged_by_system,
+            flagged_reason=flagged_reason,
+            moderation_version=moderation_version,
+            sent_at=datetime.fromisoformat(sent_at) if sent_at else None
+        )
+        for (message_id, sender_id, message_text, message_type, flagged_by_system,
+             flagged_reason, moderation_version, sent_at) in json.loads(zlib.decompress(segment.payload))
+    ]
+
+
+# ==================== LEITURA ====================
+# Cursor, skip e limit valem para o histórico inteiro da sala (segmentos e depois
+# a tabela quente), com a mesma regra de paginate: com cursor o skip é ignorado.
+# O plano da página usa só os metadados dos segmentos (contagens e posições):
+# os segmentos inteiros dentro do skip não são descomprimidos.
+
+class ArchivedPage(NamedTuple):
+    messages: List[ChatMessage]  # mensagens compactadas da página, em ordem de envio
+    hot_skip: int  # skip que sobra para a tabela quente (já descontadas as compactadas)
+
+
+def _segments_after(chat_room_id: int, cursor: Optional[str]):
+    """Metadados dos segmentos da sala em ordem, a partir do que contém a posição do cursor"""
+    query = select(ChatMessageSegment.id, ChatMessageSegment.message_count)\
+        .where(ChatMessageSegment.chat_room_id == chat_room_id)\
+        .order_by(ChatMessageSegment.last_message_id)
+    if cursor:
+        sent_at, last_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(ChatMessageSegment.last_sent_at, ChatMessageSegment.last_message_id) > (sent_at, last_id)
+        )
+    return query
+
+
+def _plan_page(rows, skip: int, limit: int, partial_first: bool) -> Tuple[List[int], int, int]:
+    """Segmentos a descomprimir para a página, mensagens a pular no primeiro deles e total compactado.
+    
+    Com cursor o primeiro segmento pode ter mensagens antes da posição (partial_first):
+    ele é lido mas não conta para completar a página."""
+    total = sum(message_count for _, message_count in rows)
+    segment_ids: List[int] = []
+    first_skip = collected = 0
+    for index, (segment_id, message_count) in enumerate(rows):
+        if not segment_ids and skip >= message_count:
+            skip -= message_count
+            continue
+        if not segment_ids:
+            first_skip, skip = skip, 0
+        segment_ids.append(segment_id)
+        if not (partial_first and index == 0):
+            collected += message_count - (first_skip if len(segment_ids) == 1 else 0)
+        if collected >= limit:
+            break
+    return segment_ids, first_skip, total
+
+
+def _page_from_segments(segments, cursor: Optional[str], first_skip: int, limit: int) -> List[ChatMessage]:
+    """Descomprime os segmentos planejados e devolve até `limit` mensagens após o cursor"""
+    position = decode_cursor(cursor) if cursor else None
+    messages = []
+    for index, segment in enumerate(segments):
+        decoded = decode_segment(segment)
+        if index == 0:
+            decoded = decoded[first_skip:]
+        messages.extend(
+            message for message in decoded
+            if position is None or (message.sent_at, message.id) > position
+        )
+        if len(messages) >= limit:
+            break
+    return messages[:limit]
+
+
+def _segments_by_id(segment_ids: List[int]):
+    return select(ChatMessageSegment)\
+        .where(ChatMessageSegment.id.in_(segment_ids))\
+        .order_by(ChatMessageSegment.last_message_id)
+
+
+def get_archived_page(
+    db: Session,
+    chat_room_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> ArchivedPage:
+    """Parte compactada de uma página do histórico da sala"""
+    skip = 0 if cursor else skip
+    rows = db.execute(_segments_after(chat_room_id, cursor)).all()
+    segment_ids, first_skip, total = _plan_page(rows, skip, limit, partial_first=bool(cursor))
+    segments = db.scalars(_segments_by_id(segment_ids)).all() if segment_ids else []
+    return ArchivedPage(_page_from_segments(segments, cursor, first_skip, limit), max(skip - total, 0))
+
+
+async def get_archived_page_async(
+    db: AsyncSession,
+    chat_room_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> ArchivedPage:
+    """Parte compactada de uma página do histórico da sala (versão async)"""
+    skip = 0 if cursor else skip
+    rows = (await db.execute(_segments_after(chat_room_id, cursor))).all()
+    segment_ids, first_skip, total = _plan_page(rows, skip, limit, partial_first=bool(cursor))
+    segments = (await db.scalars(_segments_by_id(segment_ids))).all() if segment_ids else []
+    return ArchivedPage(_page_from_segments(segments, cursor, first_skip, limit), max(skip - total, 0))
+
+
+def get_first_archived_messages_in_rooms(
+    db: Session,
+    chat_room_ids,
+    limit: int,
+    until: Optional[tuple] = None
+) -> List[ChatMessage]:
+    """As `limit` primeiras mensagens compactadas das salas (lista ou subconsulta de ids), em ordem de envio.
+    
+    Segmentos de salas diferentes se intercalam no tempo: eles são lidos em ordem de
+    início e a leitura para quando o próximo começa depois da última mensagem que
+    ainda cabe na página. `until` (sent_at, id) descarta de saída os segmentos que
+    começam depois dessa posição (ex.: a última mensagem quente que já completa a página)."""
+    query = select(ChatMessageSegment.id, ChatMessageSegment.first_sent_at, ChatMessageSegment.first_message_id)\
+        .where(ChatMessageSegment.chat_room_id.in_(chat_room_ids))\
+        .order_by(ChatMessageSegment.first_sent_at, ChatMessageSegment.first_message_id)
+    if until is not None:
+        query = query.where(tuple_(ChatMessageSegment.first_sent_at, ChatMessageSegment.first_message_id) <= until)
+
+    messages: List[ChatMessage] = []
+    for segment_id, first_sent_at, first_message_id in db.execute(query).all():
+        if len(messages) >= limit and (first_sent_at, first_message_id) > (messages[-1].sent_at, messages[-1].id):
+            break
+        messages.extend(decode_segment(db.get(ChatMessageSegment, segment_id)))
+        messages.sort(key=lambda message: (message.sent_at, message.id))
+        del messages[limit:]
+    return messages
+
+
+# ==================== COMPACTAÇÃO ====================
+
+def compact_chat_history(
+    db: Session,
+    idle_days: int,
+    segment_size: int = 500,
+    chunk_size: int = 100
+) -> dict:
+    """Move para segmentos o histórico de salas arquivadas ou sem atividade há `idle_days` dias"""
+    now = datetime.utcnow()
+    eligible = and_(
+        ChatRoom.last_message_id.isnot(None),
+        or_(ChatRoom.compacted_message_id.is_(None), ChatRoom.last_message_id > ChatRoom.compacted_message_id),
+        or_(
+            ChatRoom.last_activity_at < now - timedelta(days=idle_days),
+            and_(ChatRoom.status == ChatStatus.ARCHIVED, ChatRoom.last_activity_at < now - ARCHIVED_ROOM_GRACE)
+        )
+    )
+
+    rooms_compacted = messages_moved = segments_written = raw_bytes = compressed_bytes = 0
+    last_id = scheduler.get_checkpoint(db, CHAT_ARCHIVE_JOB)
+
+    while True:
+        rooms = db.execute(
+            select(ChatRoom.id, ChatRoom.buyer_id, ChatRoom.seller_id, ChatRoom.last_message_id)
+            .where(ChatRoom.id > last_id, eligible)
+            .order_by(ChatRoom.id)
+            .limit(chunk_size)
+        ).all()
+
+        if not rooms:
+            # Todas as salas elegíveis processadas: a próxima execução recomeça do início
+            scheduler.set_checkpoint(db, CHAT_ARCHIVE_JOB, 0)
+            db.commit()
+            break
+
+        for room in rooms:
+            # Tudo antes da última mensagem; envios concorrentes recebem ids maiores e não entram
+            rows = db.execute(
+                select(*MESSAGE_COLUMNS)
+                .where(ChatMessage.chat_room_id == room.id, ChatMessage.id < room.last_message_id)
+                .order_by(ChatMessage.id)
+            ).all()
+
+            for offset in range(0, len(rows), segment_size):
+                batch = rows[offset:offset + segment_size]
+                payload = encode_segment(batch)
+                db.add(ChatMessageSegment(
+                    chat_room_id=room.id,
+                    first_message_id=batch[0].id,
+                    last_message_id=batch[-1].id,
+                    first_sent_at=batch[0].sent_at,
+                    last_sent_at=batch[-1].sent_at,
+                    message_count=len(batch),
+                    payload=payload
+                ))
+                segments_written += 1
+                raw_bytes += sum(len(row.message_text.encode()) for row in batch)
+                compressed_bytes += len(payload)
+
+            if rows:
+                db.execute(delete(ChatMessage).where(
+                    ChatMessage.chat_room_id == room.id,
+                    ChatMessage.id <= rows[-1].id
+                ))
+                # Desconta as não lidas que foram para o histórico frio
+                unread = Counter(
+                    room.seller_id if row.sender_id == room.buyer_id else room.buyer_id
+                    for row in rows if not row.is_read
+                )
+                for user_id, count in unread.items():
+                    db.execute(
+                        update(ChatUnreadCounter)
+                        .where(ChatUnreadCounter.chat_room_id == room.id, ChatUnreadCounter.user_id == user_id)
+                        .values(unread_count=case(
+                            (ChatUnreadCounter.unread_count > count, ChatUnreadCounter.unread_count - count),
+                            else_=0
+                        ))
+                    )
+                rooms_compacted += 1
+                messages_moved += len(rows)
+
+            db.execute(
+                update(ChatRoom)
+                .where(ChatRoom.id == room.id)
+                .values(compacted_message_id=room.last_message_id)
+            )
+
+        last_id = rooms[-1].id
+        scheduler.set_checkpoint(db, CHAT_ARCHIVE_JOB, last_id)
+        db.commit()
+
+    return {
+        "rooms_compacted": rooms_compacted,
+        "messages_archived": messages_moved,
+        "segments_written": segments_written,
+        "text_bytes": raw_bytes,
+        "compressed_bytes": compressed_bytes
+    }
@@ -1,11 +1,25 @@
-from sqlalchemy.orm import Session
-from app.models.models import ChatRoom, ChatMessage, ChatStatus, MessageType
-from app.schemas.schemas import ChatRoomCreate, ChatMessageCreate
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, case, func, and_, or_, union_all
+from app.models.models import (
+    ChatRoom, ChatMessage, ChatStatus, ChatUnreadCounter, MessageType, SystemLog, LogCategory,
+    User, Listing, Event, EventTicketMaster
+)
+from app.schemas.schemas import ChatRoomCreate, ChatMessageCreate, ChatMessageResponse
+from app.services.pagination import paginate
+from app.services import chat_archive
+from app.services.moderation import ModerationRules
+from app.services.moderation_pipeline import ModerationPipeline, ModerationTask
+from app.services.realtime import chat_hub
+from app.config import settings
 from typing import Optional, List
-import re
+from datetime import datetime
+import asyncio
 
 
-# Palavras suspeitas para moderação automática
+UNREAD_REPAIR_JOB = "unread-repair"
+
+# Palavras suspeitas padrão (versão 0), usadas até o primeiro ruleset publicado
 SUSPICIOUS_KEYWORDS = [
     'pix', 'whatsapp', 'zap', 'telegram', 'fora do app',
     'transferencia', 'deposito', 'conta bancaria', 'cpf',
@@ -13,26 +27,54 @@ SUSPICIOUS_KEYWORDS = [
     'direto', 'particular', 'pessoal', 'contato'
 ]
 
+# Ruleset ativo neste worker (recarregado pelo job de moderation_service)
+moderation_rules = ModerationRules(SUSPICIOUS_KEYWORDS)
+
+# Verificação profunda assíncrona das mensagens que passaram pelo filtro inline
+moderation_pipeline = ModerationPipeline(
+    moderation_rules,
+    workers=settings.moderation_workers,
+    queue_size=settings.moderation_queue_size,
+    batch_size=settings.moderation_batch_size,
+    flush_interval=settings.moderation_flush_interval,
+    max_retries=settings.moderation_max_retries
+)
+
 
 def detect_suspicious_content(message_text: str) -> tuple[bool, Optional[str]]:
-    """Detecta conteúdo suspeito na mensagem"""
-    message_lower = message_text.lower()
-    
-    for keyword in SUSPICIOUS_KEYWORDS:
-        if keyword in message_lower:
-            return True, f"Palavra suspeita detectada: '{keyword}'"
-    
-    # Detecta padrões de telefone
-    phone_pattern = r'\b\d{2,3}[-.\s]?\d{4,5}[-.\s]?\d{4}\b'
-    if re.search(phone_pattern, message_text):
-        return True, "Número de telefone detectado"
-    
-    # Detecta padrões de email
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    if re.search(email_pattern, message_text):
-        return True, "Email detectado"
-    
-    return False, None
+    """Detecta conteúdo suspeito na mensagem (todos os motivos, separados por '; ')"""
+    return moderation_rules.active.engine.check(message_text)
+
+
+def publish_message(db_message: ChatMessage):
+    """Entrega a mensagem aos participantes conectados via WebSocket"""
+    chat_hub.publish(db_message.chat_room_id, {
+        "type": "message",
+        "message": ChatMessageResponse.model_validate(db_message).model_dump(mode="json")
+    })
+
+
+def _unread_recipient(chat_room: ChatRoom, sender_id: int) -> int:
+    """Participante que recebe a mensagem enviada por sender_id"""
+    return chat_room.seller_id if sender_id == chat_room.buyer_id else chat_room.buyer_id
+
+
+def _increment_unread(chat_room_id: int, user_id: int):
+    """UPDATE que soma 1 ao contador de não lidas do destinatário"""
+    return update(ChatUnreadCounter)\
+        .where(ChatUnreadCounter.chat_room_id == chat_room_id, ChatUnreadCounter.user_id == user_id)\
+        .values(unread_count=ChatUnreadCounter.unread_count + 1)
+
+
+def _touch_room(db_message: ChatMessage):
+    """UPDATE que registra a mensagem como última da sala (envios concorrentes: vence o maior id)"""
+    return update(ChatRoom)\
+        .where(
+            ChatRoom.id == db_message.chat_room_id,
+            or_(ChatRoom.last_message_id.is_(None), ChatRoom.last_message_id < db_message.id)
+        )\
+        .values(last_message_id=db_message.id, last_activity_at=db_message.sent_at)\
+        .execution_options(synchronize_session=False)
 
 
 # ==================== CHAT ROOMS ====================
@@ -65,6 +107,11 @@ def create_chat_room(db: Session, buyer_id: int, chat_room: ChatRoomCreate) -> C
     )
     
     db.add(db_chat_room)
+    db.flush()
+    db.add_all([
+        ChatUnreadCounter(chat_room_id=db_chat_room.id, user_id=buyer_id, unread_count=0),
+        ChatUnreadCounter(chat_room_id=db_chat_room.id, user_id=listing.seller_id, unread_count=0)
+    ])
     db.commit()
     db.refresh(db_chat_room)
     return db_chat_room
@@ -75,11 +122,69 @@ def get_chat_room(db: Session, chat_room_id: int) -> Optional[ChatRoom]:
     return db.query(ChatRoom).filter(ChatRoom.id == chat_room_id).first()
 
 
-def get_user_chat_rooms(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[ChatRoom]:
+def get_user_chat_rooms(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[ChatRoom]:
     """Lista chat rooms de um usuário"""
-    return db.query(ChatRoom).filter(
+    query = db.query(ChatRoom).filter(
         (ChatRoom.buyer_id == user_id) | (ChatRoom.seller_id == user_id)
-    ).order_by(ChatRoom.created_at.desc()).offset(skip).limit(limit).all()
+    )
+    return paginate(query, ChatRoom.created_at, ChatRoom.id, skip=skip, limit=limit, cursor=cursor).all()
+
+
+def get_inbox(db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None) -> list:
+    """Salas do usuário por última atividade, com última mensagem, não lidas,
+    evento do anúncio e nome do outro participante, em uma única consulta"""
+    # Uma faixa de índice por papel (comprador/vendedor) em vez de OR; cada
+    # ramo já vem ordenado e limitado, e o UNION junta no máximo 2 * limit salas
+    branches = [
+        select(paginate(
+            select(ChatRoom.id, ChatRoom.last_activity_at).where(participant == user_id),
+            ChatRoom.last_activity_at, ChatRoom.id, limit=limit, cursor=cursor
+        ).subquery())
+        for participant in (ChatRoom.buyer_id, ChatRoom.seller_id)
+    ]
+    page = union_all(*branches).subquery()
+    
+    counterpart = aliased(User)
+    last_message = aliased(ChatMessage)
+    query = select(
+            ChatRoom.id,
+            ChatRoom.listing_id,
+            ChatRoom.status,
+            ChatRoom.last_activity_at,
+            Event.title.label("event_title"),
+            EventTicketMaster.category_name.label("ticket_category"),
+            counterpart.id.label("counterpart_id"),
+            counterpart.full_name.label("counterpart_name"),
+            func.coalesce(ChatUnreadCounter.unread_count, 0).label("unread_count"),
+            last_message.id.label("last_message_id"),
+            last_message.sender_id.label("last_message_sender_id"),
+            last_message.message_text.label("last_message_text"),
+            last_message.message_type.label("last_message_type"),
+            last_message.sent_at.label("last_message_sent_at")
+        )\
+        .select_from(page)\
+        .join(ChatRoom, ChatRoom.id == page.c.id)\
+        .join(Listing, Listing.id == ChatRoom.listing_id)\
+        .join(EventTicketMaster, EventTicketMaster.id == Listing.event_ticket_master_id)\
+        .join(Event, Event.id == EventTicketMaster.event_id)\
+        .join(counterpart, counterpart.id == case(
+            (ChatRoom.buyer_id == user_id, ChatRoom.seller_id),
+            else_=ChatRoom.buyer_id
+        ))\
+        .outerjoin(ChatUnreadCounter, and_(
+            ChatUnreadCounter.chat_room_id == ChatRoom.id,
+            ChatUnreadCounter.user_id == user_id
+        ))\
+        .outerjoin(last_message, last_message.id == ChatRoom.last_message_id)\
+        .order_by(page.c.last_activity_at.desc(), page.c.id.desc())\
+        .limit(limit)
+    return db.execute(query).all()
 
 
 def archive_chat_room(db: Session, chat_room_id: int) -> Optional[ChatRoom]:
@@ -108,67 +213,162 @@ def block_chat_room(db: Session, chat_room_id: int) -> Optional[ChatRoom]:
 
 # ==================== CHAT MESSAGES ====================
 
-def send_message(
-    db: Session,
-    chat_room_id: int,
-    sender_id: int,
-    message: ChatMessageCreate
-) -> ChatMessage:
-    """Envia mensagem com moderação automática"""
-    # Verifica se chat room existe e está aberto
-    chat_room = get_chat_room(db, chat_room_id)
+def _check_sender(chat_room: Optional[ChatRoom], sender_id: int):
+    """Valida se a sala existe, está aberta e se o remetente participa dela"""
     if not chat_room:
         raise ValueError("Chat não encontrado")
     
     if chat_room.status == ChatStatus.BLOCKED:
         raise ValueError("Este chat está bloqueado")
     
-    # Verifica se sender é participante
     if sender_id not in [chat_room.buyer_id, chat_room.seller_id]:
         raise PermissionError("Você não faz parte deste chat")
-    
-    # Moderação automática
-    is_flagged, flag_reason = detect_suspicious_content(message.message_text)
-    
-    db_message = ChatMessage(
+
+
+def _new_message(chat_room_id: int, sender_id: int, message: ChatMessageCreate) -> ChatMessage:
+    """Monta a mensagem já com o filtro inline do ruleset ativo no momento do envio"""
+    ruleset = moderation_rules.active
+    is_flagged, flag_reason = ruleset.engine.check(message.message_text)
+    return ChatMessage(
         chat_room_id=chat_room_id,
         sender_id=sender_id,
         message_text=message.message_text,
         message_type=message.message_type,
         flagged_by_system=is_flagged,
-        flagged_reason=flag_reason
+        flagged_reason=flag_reason,
+        moderation_version=ruleset.version
+    )
+
+
+def _suspicious_message_log(db_message: ChatMessage) -> SystemLog:
+    """Log de auditoria da mensagem barrada no filtro inline (mesmo commit da mensagem)"""
+    return SystemLog(
+        user_id=db_message.sender_id,
+        category=LogCategory.SUSPICIOUS_MESSAGE,
+        action=f"Mensagem suspeita no chat {db_message.chat_room_id}",
+        log_metadata={
+            "reason": db_message.flagged_reason,
+            "message_id": db_message.id,
+            "moderation_version": db_message.moderation_version
+        }
     )
+
+
+def _moderation_task(db_message: ChatMessage) -> ModerationTask:
+    return ModerationTask(db_message.id, db_message.chat_room_id, db_message.sender_id, db_message.message_text)
+
+
+def send_message(
+    db: Session,
+    chat_room_id: int,
+    sender_id: int,
+    message: ChatMessageCreate
+) -> ChatMessage:
+    """Envia mensagem com moderação automática"""
+    chat_room = get_chat_room(db, chat_room_id)
+    _check_sender(chat_room, sender_id)
     
+    db_message = _new_message(chat_room_id, sender_id, message)
     db.add(db_message)
+    
+    # Contador de não lidas do destinatário no mesmo commit da mensagem
+    recipient_id = _unread_recipient(chat_room, sender_id)
+    if not db.execute(_increment_unread(chat_room_id, recipient_id)).rowcount:
+        db.add(ChatUnreadCounter(chat_room_id=chat_room_id, user_id=recipient_id, unread_count=1))
+    
+    db.flush()
+    db.execute(_touch_room(db_message))
+    if db_message.flagged_by_system:
+        db.add(_suspicious_message_log(db_message))
+    
     db.commit()
     db.refresh(db_message)
     
-    # Se mensagem foi flagged, pode criar log de auditoria
-    if is_flagged:
-        from app.services import system_service
-        system_service.create_log(
-            db,
-            user_id=sender_id,
-            action=f"Mensagem suspeita no chat {chat_room_id}",
-            metadata={"reason": flag_reason, "message_id": db_message.id}
-        )
+    # Passou no filtro inline: verificação profunda fora da requisição
+    if not db_message.flagged_by_system:
+        if not moderation_pipeline.submit(_moderation_task(db_message)):
+            db.refresh(db_message)
     
+    publish_message(db_message)
     return db_message
 
 
+async def send_message_async(
+    db: AsyncSession,
+    chat_room_id: int,
+    sender_id: int,
+    message: ChatMessageCreate
+) -> ChatMessage:
+    """Envia mensagem com moderação automática (versão async)"""
+    chat_room = await db.get(ChatRoom, chat_room_id)
+    _check_sender(chat_room, sender_id)
+    
+    db_message = _new_message(chat_room_id, sender_id, message)
+    db.add(db_message)
+    
+    recipient_id = _unread_recipient(chat_room, sender_id)
+    if not (await db.execute(_increment_unread(chat_room_id, recipient_id))).rowcount:
+        db.add(ChatUnreadCounter(chat_room_id=chat_room_id, user_id=recipient_id, unread_count=1))
+    
+    await db.flush()
+    await db.execute(_touch_room(db_message))
+    if db_message.flagged_by_system:
+        db.add(_suspicious_message_log(db_message))
+    
+    await db.commit()
+    await db.refresh(db_message)
+    
+    if not db_message.flagged_by_system:
+        task = _moderation_task(db_message)
+        if not moderation_pipeline.try_submit(task):
+            # Fila cheia: verifica em thread para não bloquear o event loop
+            await asyncio.to_thread(moderation_pipeline.process_now, [task])
+            await db.refresh(db_message)
+    
+    publish_message(db_message)
+    return db_message
+
+
+def _hot_messages(chat_room_id: int, archived: chat_archive.ArchivedPage, limit: int, cursor: Optional[str]):
+    """SELECT da continuação da página na tabela quente (None se as compactadas já a completam)"""
+    if len(archived.messages) == limit:
+        return None
+    
+    query = select(ChatMessage).where(ChatMessage.chat_room_id == chat_room_id)
+    return paginate(
+        query, ChatMessage.sent_at, ChatMessage.id,
+        skip=archived.hot_skip, limit=limit - len(archived.messages), cursor=cursor, descending=False
+    )
+
+
 def get_chat_messages(
     db: Session,
     chat_room_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[ChatMessage]:
-    """Lista mensagens de um chat"""
-    return db.query(ChatMessage)\
-        .filter(ChatMessage.chat_room_id == chat_room_id)\
-        .order_by(ChatMessage.sent_at.asc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+    """Lista mensagens de um chat (histórico compactado primeiro, depois a tabela quente)"""
+    archived = chat_archive.get_archived_page(db, chat_room_id, skip, limit, cursor)
+    hot = _hot_messages(chat_room_id, archived, limit, cursor)
+    if hot is None:
+        return archived.messages
+    return archived.messages + list(db.scalars(hot).all())
+
+
+async def get_chat_messages_async(
+    db: AsyncSession,
+    chat_room_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[ChatMessage]:
+    """Lista mensagens de um chat (versão async)"""
+    archived = await chat_archive.get_archived_page_async(db, chat_room_id, skip, limit, cursor)
+    hot = _hot_messages(chat_room_id, archived, limit, cursor)
+    if hot is None:
+        return archived.messages
+    return archived.messages + list((await db.scalars(hot)).all())
 
 
 def mark_messages_as_read(db: Session, chat_room_id: int, user_id: int) -> int:
@@ -186,33 +386,125 @@ def mark_messages_as_read(db: Session, chat_room_id: int, user_id: int) -> int:
         )\
         .update({"is_read": True})
     
+    db.query(ChatUnreadCounter)\
+        .filter(ChatUnreadCounter.chat_room_id == chat_room_id, ChatUnreadCounter.user_id == user_id)\
+        .update({"unread_count": 0}, synchronize_session=False)
+    
     db.commit()
+    
+    # Confirmação de leitura para o remetente conectado
+    if updated:
+        chat_hub.publish(chat_room_id, {
+            "type": "read",
+            "chat_room_id": chat_room_id,
+            "user_id": user_id,
+            "marked_as_read": updated,
+            "read_at": datetime.utcnow().isoformat()
+        })
     return updated
 
 
-def get_flagged_messages(db: Session, skip: int = 0, limit: int = 100) -> List[ChatMessage]:
+def get_flagged_messages(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[ChatMessage]:
     """Lista mensagens flagadas pelo sistema (para admin)"""
-    return db.query(ChatMessage)\
-        .filter(ChatMessage.flagged_by_system == True)\
-        .order_by(ChatMessage.sent_at.desc())\
-        .offset(skip)\
+    query = db.query(ChatMessage).filter(ChatMessage.flagged_by_system == True)
+    return paginate(query, ChatMessage.sent_at, ChatMessage.id, skip=skip, limit=limit, cursor=cursor).all()
+
+
+def get_messages_between(db: Session, user_id: int, other_user_id: int, limit: int = 1000) -> List[ChatMessage]:
+    """Mensagens trocadas entre dois usuários em todas as salas, incluindo o histórico compactado (disputas)"""
+    rooms = select(ChatRoom.id)\
+        .where(or_(
+            and_(ChatRoom.buyer_id == user_id, ChatRoom.seller_id == other_user_id),
+            and_(ChatRoom.buyer_id == other_user_id, ChatRoom.seller_id == user_id)
+        ))\
+        .scalar_subquery()
+    
+    # Primeiro as quentes: se já completam a página, segmentos que começam depois delas nem são lidos
+    hot = db.query(ChatMessage)\
+        .filter(ChatMessage.chat_room_id.in_(rooms))\
+        .order_by(ChatMessage.sent_at, ChatMessage.id)\
         .limit(limit)\
         .all()
+    until = (hot[-1].sent_at, hot[-1].id) if len(hot) == limit else None
+    messages = chat_archive.get_first_archived_messages_in_rooms(db, rooms, limit, until) + hot
+    messages.sort(key=lambda message: (message.sent_at, message.id))
+    return messages[:limit]
 
 
 def get_unread_count(db: Session, user_id: int) -> int:
-    """Conta mensagens não lidas de um usuário"""
-    # Busca chat rooms do usuário
-    chat_rooms = get_user_chat_rooms(db, user_id)
-    chat_room_ids = [room.id for room in chat_rooms]
+    """Conta mensagens não lidas de um usuário (soma dos contadores por sala)"""
+    return db.query(func.coalesce(func.sum(ChatUnreadCounter.unread_count), 0))\
+        .filter(ChatUnreadCounter.user_id == user_id)\
+        .scalar()
+
+
+def get_unread_by_room(db: Session, user_id: int) -> List[ChatUnreadCounter]:
+    """Salas com mensagens não lidas do usuário e a contagem de cada uma"""
+    return db.query(ChatUnreadCounter)\
+        .filter(ChatUnreadCounter.user_id == user_id, ChatUnreadCounter.unread_count > 0)\
+        .order_by(ChatUnreadCounter.chat_room_id)\
+        .all()
+
+
+def repair_unread_counters(db: Session, chunk_size: int = 1000) -> dict:
+    """Recalcula os contadores de não lidas a partir de chat_messages, em lotes de salas"""
+    recipient = case(
+        (ChatMessage.sender_id == ChatRoom.buyer_id, ChatRoom.seller_id),
+        else_=ChatRoom.buyer_id
+    )
+    checked = 0
+    repaired = 0
+    last_id = 0
     
-    if not chat_room_ids:
-        return 0
+    while True:
+        rooms = db.query(ChatRoom.id, ChatRoom.buyer_id, ChatRoom.seller_id)\
+            .filter(ChatRoom.id > last_id)\
+            .order_by(ChatRoom.id)\
+            .limit(chunk_size)\
+            .all()
+        if not rooms:
+            break
+        first_id, last_id = rooms[0].id, rooms[-1].id
+        
+        # Lê os contadores antes das mensagens: uma mensagem enviada entre as duas
+        # leituras entra no valor esperado e a correção continua certa
+        stored = {
+            (counter.chat_room_id, counter.user_id): counter.unread_count
+            for counter in db.query(ChatUnreadCounter)
+                .filter(ChatUnreadCounter.chat_room_id.between(first_id, last_id))
+        }
+        expected = {
+            (room_id, user_id): count
+            for room_id, user_id, count in db.query(ChatMessage.chat_room_id, recipient, func.count())
+                .join(ChatRoom, ChatRoom.id == ChatMessage.chat_room_id)
+                .filter(ChatMessage.chat_room_id.between(first_id, last_id), ChatMessage.is_read == False)
+                .group_by(ChatMessage.chat_room_id, recipient)
+        }
+        
+        for room in rooms:
+            for user_id in (room.buyer_id, room.seller_id):
+                key = (room.id, user_id)
+                count = expected.get(key, 0)
+                current = stored.get(key)
+                if current is None:
+                    db.add(ChatUnreadCounter(chat_room_id=room.id, user_id=user_id, unread_count=count))
+                    repaired += 1
+                elif current != count:
+                    # Só corrige se o contador não mudou desde a leitura (senão fica para a próxima execução)
+                    repaired += db.query(ChatUnreadCounter)\
+                        .filter(
+                            ChatUnreadCounter.chat_room_id == room.id,
+                            ChatUnreadCounter.user_id == user_id,
+                            ChatUnreadCounter.unread_count == current
+                        )\
+                        .update({"unread_count": count}, synchronize_session=False)
+        
+        db.commit()
+        checked += len(rooms)
     
-    return db.query(ChatMessage)\
-        .filter(
-            ChatMessage.chat_room_id.in_(chat_room_ids),
-            ChatMessage.sender_id != user_id,
-            ChatMessage.is_read == False
-        )\
-        .count()
+    return {"rooms": checked, "repaired": repaired}
@@ -1,8 +1,22 @@
+from sqlalchemy import column, func, literal_column, select, table
 from sqlalchemy.orm import Session
 from app.models.models import Event, EventTicketMaster
-from app.schemas.schemas import EventCreate, EventUpdate, EventTicketMasterCreate
+from app.schemas.schemas import EventCreate, EventUpdate, EventTicketMasterCreate, EventResponse
+from app.services.pagination import paginate
+from app.services.price_cache import price_cache
 from typing import Optional, List
 from datetime import datetime
+import re
+
+
+# Índice FTS5 mantido por triggers (migração 3); rowid = events.id
+events_fts = table("events_fts", column("rowid"), column("title"), column("venue"))
+
+# Pesos do bm25 por coluna do índice: título conta mais que local
+FTS_WEIGHTS = (10.0, 5.0)
+
+# Projeção com exatamente as colunas de EventResponse (listas com FAST_JSON)
+EVENT_COLUMNS = tuple(getattr(Event, name) for name in EventResponse.model_fields)
 
 
 # ==================== EVENTS ====================
@@ -32,35 +46,79 @@ def get_events(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
-    active_only: bool = True
+    active_only: bool = True,
+    cursor: Optional[str] = None,
+    as_rows: bool = False
 ) -> List[Event]:
-    """Lista eventos com filtros"""
-    query = db.query(Event)
+    """Lista eventos com filtros (as_rows: tuplas de EVENT_COLUMNS em vez de objetos ORM)"""
+    query = db.query(*EVENT_COLUMNS) if as_rows else db.query(Event)
     
     if active_only:
         query = query.filter(Event.is_active == True)
     
     if search:
+        match = build_fts_query(search)
+        if match and db.get_bind().dialect.name == "sqlite":
+            return search_events(db, query, match, skip=skip, limit=limit)
+        
         query = query.filter(
             (Event.title.ilike(f"%{search}%")) |
             (Event.venue.ilike(f"%{search}%"))
         )
     
-    return query.order_by(Event.event_date.asc()).offset(skip).limit(limit).all()
+    return paginate(
+        query, Event.event_date, Event.id,
+        skip=skip, limit=limit, cursor=cursor, descending=False
+    ).all()
 
 
-def get_upcoming_events(db: Session, skip: int = 0, limit: int = 100) -> List[Event]:
-    """Lista eventos futuros"""
-    now = datetime.utcnow()
-    return db.query(Event)\
-        .filter(Event.is_active == True)\
-        .filter(Event.event_date > now)\
-        .order_by(Event.event_date.asc())\
+def build_fts_query(search: str) -> Optional[str]:
+    """Converte o texto digitado em expressão MATCH do FTS5.
+    
+    Cada palavra vira um termo entre aspas (neutraliza a sintaxe do FTS5) e a
+    última recebe * para casar prefixos enquanto o usuário digita."""
+    terms = re.findall(r"\w+", search.lower())
+    if not terms:
+        return None
+    
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= 2:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_events(db: Session, query, match: str, skip: int = 0, limit: int = 100) -> List[Event]:
+    """Busca no índice full-text ordenando por relevância e depois pela data"""
+    # Todo o conjunto do MATCH é ranqueado (com os filtros da listagem): cortar
+    # candidatos antes do bm25 descartaria o melhor resultado ou o desempate pela data
+    score = func.bm25(literal_column("events_fts"), *FTS_WEIGHTS)
+    return query\
+        .join(events_fts, events_fts.c.rowid == Event.id)\
+        .filter(literal_column("events_fts").op("MATCH")(match))\
+        .order_by(score, Event.event_date.asc(), Event.id.asc())\
         .offset(skip)\
         .limit(limit)\
         .all()
 
 
+def get_upcoming_events(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    as_rows: bool = False
+) -> List[Event]:
+    """Lista eventos futuros (as_rows: tuplas de EVENT_COLUMNS em vez de objetos ORM)"""
+    now = datetime.utcnow()
+    query = (db.query(*EVENT_COLUMNS) if as_rows else db.query(Event))\
+        .filter(Event.is_active == True)\
+        .filter(Event.event_date > now)
+    return paginate(
+        query, Event.event_date, Event.id,
+        skip=skip, limit=limit, cursor=cursor, descending=False
+    ).all()
+
+
 def update_event(db: Session, event_id: int, event_update: EventUpdate) -> Optional[Event]:
     """Atualiza evento"""
     db_event = get_event(db, event_id)
@@ -117,8 +175,8 @@ def get_ticket_masters_by_event(db: Session, event_id: int) -> List[EventTicketM
 
 def get_max_allowed_price(db: Session, ticket_master_id: int) -> Optional[float]:
     """Calcula o preço máximo permitido (face_value * 1.20)"""
-    ticket_master = get_ticket_master(db, ticket_master_id)
-    if not ticket_master:
+    face_value = price_cache.get_face_value(db, ticket_master_id)
+    if face_value is None:
         return None
     
-    return ticket_master.face_value * 1.20
+    return face_value * 1.20
@@ -0,0 +1,163 @@
+"""
+Exportação completa de tabelas em streaming (NDJSON ou CSV, opcionalmente gzip)
+
+As linhas saem do banco por um cursor lido em blocos (yield_per) direto para o
+texto de saída, sem instanciar objetos ORM nem modelos Pydantic, e são enviadas
+em pedaços de ~256 KB: a memória fica constante qualquer que seja o tamanho da
+tabela. A exportação usa uma sessão própria, aberta e fechada pelo gerador, que
+vive mais que a requisição.
+"""
+
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import JSON, Table, Text, select, type_coerce
+
+from app.models.models import Order, SystemLog
+from app.services.audit_log import json_default
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_FLUSH_BYTES = 256 * 1024
+
+# Tabelas exportáveis, sempre em ordem de (created_at, id)
+EXPORT_TABLES: Dict[str, Table] = {
+    "logs": SystemLog.__table__,
+    "orders": Order.__table__,
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _export_columns(table: Table) -> List:
+    """Colunas na ordem de saída: as JSON por último (ver _encode_rows)"""
+    return sorted(table.columns, key=lambda column: isinstance(column.type, JSON))
+
+
+def export_query(table: Table, start: Optional[datetime] = None, end: Optional[datetime] = None, **filters: Any):
+    """SELECT da exportação: intervalo [start, end) em created_at e filtros de igualdade
+
+    Colunas JSON saem como o texto gravado, sem json.loads só para serializar de novo.
+    """
+    query = select(*[
+        type_coerce(column, Text).label(column.name) if isinstance(column.type, JSON) else column
+        for column in _export_columns(table)
+    ]).order_by(table.c.created_at, table.c.id)
+    if start is not None:
+        query = query.where(table.c.created_at >= start)
+    if end is not None:
+        query = query.where(table.c.created_at < end)
+    for column, value in filters.items():
+        if value is not None:
+            query = query.where(table.c[column] == value)
+    return query
+
+
+def _cell(value: Any) -> Any:
+    """Valor de uma célula CSV (enums pelo valor, datas em ISO 8601)"""
+    if value is None:
+        return ""
+    if isinstance(value, (enum.Enum, datetime)):
+        return json_default(value)
+    return value
+
+
+def _encode_rows(fmt: str, columns: List[str], raw_json: int, rows: Iterator[tuple]) -> Iterator[str]:
+    """Texto de saída em blocos de linhas (o cabeçalho CSV vai no primeiro bloco)
+
+    As últimas `raw_json` colunas já são texto JSON: no CSV vão como estão, no
+    NDJSON são coladas no objeto sem passar pelo encoder.
+    """
+    if fmt == "ndjson":
+        dumps = json.JSONEncoder(default=json_default, ensure_ascii=False).encode
+        plain = len(columns) - raw_json
+        keys = [dumps(name) for name in columns[plain:]]
+
+        def line(row) -> str:
+            text = dumps(dict(zip(columns[:plain], row[:plain])))
+            if not raw_json:
+                return text + "\n"
+            raw = "".join(f", {key}: {value or 'null'}" for key, value in zip(keys, row[plain:]))
+            return text[:-1] + raw + "}\n"
+
+        for chunk in rows:
+            yield "".join(map(line, chunk))
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in rows:
+        writer.writerows([_cell(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_export(
+    kind: str,
+    fmt: str = "ndjson",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    compress: bool = False,
+    filters: Optional[Dict[str, Any]] = None,
+    session_factory: Optional[Callable] = None
+) -> Iterator[bytes]:
+    """Gera os bytes da exportação de `kind` (ver EXPORT_TABLES) no formato pedido"""
+    if kind not in EXPORT_TABLES:
+        raise ValueError(f"Exportação desconhecida: {kind}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {fmt} (use {' ou '.join(EXPORT_FORMATS)})")
+    if start is not None and end is not None and start >= end:
+        raise ValueError("O início do intervalo deve ser anterior ao fim")
+
+    table = EXPORT_TABLES[kind]
+    query = export_query(table, start, end, **(filters or {}))
+    columns = [column.name for column in _export_columns(table)]
+    raw_json = sum(isinstance(column.type, JSON) for column in table.columns)
+    if session_factory is None:
+        from app.database import SessionLocal
+        session_factory = SessionLocal
+
+    def generate() -> Iterator[bytes]:
+        # gzip no formato de arquivo (wbits=31) comprimido à medida que sai
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        pending: List[bytes] = []
+        pending_size = 0
+
+        db = session_factory()
+        try:
+            result = db.execute(query, execution_options={"yield_per": EXPORT_CHUNK_ROWS, "stream_results": True})
+            for text in _encode_rows(fmt, columns, raw_json, result.partitions()):
+                data = text.encode()
+                if compressor is not None:
+                    data = compressor.compress(data)
+                pending.append(data)
+                pending_size += len(data)
+                if pending_size >= EXPORT_FLUSH_BYTES:
+                    yield b"".join(pending)
+                    pending, pending_size = [], 0
+        finally:
+            db.close()
+
+        if compressor is not None:
+            pending.append(compressor.flush())
+        if pending:
+            yield b"".join(pending)
+
+    return generate()
+
+
+def export_filename(kind: str, fmt: str, compress: bool) -> str:
+    """Nome sugerido do arquivo baixado"""
+    return f"{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}" + (".gz" if compress else "")
@@ -0,0 +1,213 @@
+"""
+Cache em processo das respostas dos endpoints de catálogo
+
+Guarda o corpo já serializado de GETs públicos (lista de eventos, categorias,
+anúncios ativos) por caminho + query string, com TTL e limite de entradas (LRU).
+Cada entrada depende de um conjunto de tabelas; um commit que altera uma delas
+incrementa a versão da tabela e descarta só as entradas que dependem dela.
+
+A versão também protege contra a corrida leitura/escrita: o middleware lê as
+versões antes de chamar a rota e a resposta só é guardada se nenhuma delas
+mudou até o fim. O TTL limita o tempo de uma entrada desatualizada em outros
+workers, que não recebem a invalidação.
+
+O ETag é o hash do corpo (forte e igual entre workers para o mesmo conteúdo);
+com a entrada em cache, um If-None-Match válido vira 304 sem ir ao banco.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import User, Event, EventTicketMaster, Listing
+
+# Respostas maiores que isso são servidas normalmente, sem ocupar o cache
+MAX_BODY_BYTES = 1 << 20
+
+
+def compute_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110): W/ é ignorado e * casa com qualquer ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class CachedResponse:
+    """Status, headers e corpo serializado de uma resposta 200"""
+
+    __slots__ = ("tables", "stored_at", "status", "headers", "body", "etag")
+
+    def __init__(self, tables: FrozenSet[str], stored_at: float, status: int,
+                 headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.tables = tables
+        self.stored_at = stored_at
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = compute_etag(body)
+
+
+class ResponseCache:
+    """Corpos de resposta por chave, invalidados pelas tabelas de que dependem"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Any, CachedResponse]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.bytes_served = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def versions(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Versões atuais das tabelas, lidas antes de executar a rota"""
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+    def get(self, key) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry.stored_at >= self.ttl_seconds:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, tables: Tuple[str, ...], versions: Tuple[int, ...],
+            status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> CachedResponse:
+        """Guarda a resposta se nenhuma tabela mudou desde `versions`; sempre retorna a entrada (com ETag)"""
+        entry = CachedResponse(frozenset(tables), self.clock(), status, headers, body)
+        if not self.enabled or len(body) > MAX_BODY_BYTES:
+            return entry
+
+        with self._lock:
+            if tuple(self._versions.get(table, 0) for table in tables) != versions:
+                return entry
+            self._drop(key)
+            self._entries[key] = entry
+            self._size += len(body)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.body)
+
+    def record_response(self, entry: CachedResponse, not_modified: bool):
+        with self._lock:
+            if not_modified:
+                self.not_modified += 1
+                self.bytes_saved += len(entry.body)
+            else:
+                self.bytes_served += len(entry.body)
+
+    def invalidate_tables(self, tables: Set[str]):
+        """Incrementa a versão das tabelas e descarta as entradas que dependem delas"""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry.tables & tables]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "not_modified": self.not_modified,
+                "bytes_served": self.bytes_served,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "table_versions": dict(self._versions)
+            }
+
+
+response_cache = ResponseCache(settings.http_cache_max_entries, settings.http_cache_ttl)
+
+
+# ==================== INVALIDAÇÃO ====================
+# Escritas pelo ORM são capturadas pelos eventos do mapper e UPDATE/INSERT/DELETE
+# em lote executados pela sessão pelo do_orm_execute. As tabelas ficam na sessão
+# e as versões só mudam após o commit; rollback descarta.
+
+_PENDING_KEY = "http_cache_tables"
+
+CATALOG_TABLES = frozenset(model.__tablename__ for model in (User, Event, EventTicketMaster, Listing))
+
+
+def _mark_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(mapper.local_table.name)
+
+
+for _model in (User, Event, EventTicketMaster, Listing):
+    for _operation in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _operation, _mark_changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement.table, "name", None)
+        if table in CATALOG_TABLES:
+            orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(table)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    tables = session.info.pop(_PENDING_KEY, None)
+    if tables:
+        response_cache.invalidate_tables(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,376 @@
+"""
+Resumo de estoque por evento e por categoria, mantido em memória
+
+A página do evento mostra "X ingressos a partir de R$ Y" por categoria. O resumo
+de um evento é carregado do banco no primeiro acesso (uma leitura da faixa do
+índice do livro de ofertas) e daí em diante mantido por deltas: cada transição
+de um listing (criação, preço, reserva, venda, cancelamento, liberação) é
+anotada na sessão e aplicada só após o commit, como na invalidação do
+price_cache. Cada categoria guarda os preços ACTIVE ordenados, então contagem,
+mínimo, mediana e máximo saem em tempo constante.
+
+Outros workers não recebem os deltas: o job de rebuild recarrega do banco os
+eventos em cache a cada INVENTORY_REBUILD_INTERVAL segundos, o que também
+corrige qualquer divergência.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import Event, EventTicketMaster, Listing, ListingStatus
+
+INVENTORY_REBUILD_JOB = "inventory-rebuild"
+
+# Delta: (ticket_master_id, status, price_asked, +1 entrada / -1 saída)
+Delta = Tuple[int, Any, float, int]
+
+# Categorias tocadas pelos últimos deltas, para detectar carga concorrente
+RECENT_DELTAS = 10000
+LOAD_ATTEMPTS = 3
+
+
+def _status(value) -> Optional[ListingStatus]:
+    """Normaliza o status (o enum do schema também chega pelo update_listing)"""
+    return ListingStatus(getattr(value, "value", value)) if value is not None else None
+
+
+class _Book:
+    """Preços ACTIVE ordenados e quantidade de RESERVED de uma categoria (ou do evento)"""
+
+    __slots__ = ("prices", "reserved")
+
+    def __init__(self, prices: Optional[List[float]] = None, reserved: int = 0):
+        self.prices = prices or []
+        self.reserved = reserved
+
+    def apply(self, status: ListingStatus, price: float, sign: int) -> bool:
+        """Aplica uma entrada/saída; False se a saída não tinha par (divergência)"""
+        if status == ListingStatus.ACTIVE:
+            if sign > 0:
+                insort(self.prices, price)
+                return True
+            index = bisect_left(self.prices, price)
+            if index == len(self.prices) or self.prices[index] != price:
+                return False
+            del self.prices[index]
+        elif status == ListingStatus.RESERVED:
+            if sign < 0 and not self.reserved:
+                return False
+            self.reserved += sign
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        prices = self.prices
+        count = len(prices)
+        median = None
+        if count:
+            middle = count // 2
+            median = prices[middle] if count % 2 else (prices[middle - 1] + prices[middle]) / 2
+        return {
+            "active_count": count,
+            "reserved_count": self.reserved,
+            "min_price": prices[0] if count else None,
+            "median_price": median,
+            "max_price": prices[-1] if count else None
+        }
+
+
+class _EventInventory:
+    __slots__ = ("total", "categories", "names")
+
+    def __init__(self, categories: Dict[int, _Book], names: Dict[int, str]):
+        self.categories = categories
+        self.names = names
+        self.total = _Book(
+            list(heapq.merge(*(book.prices for book in categories.values()))),
+            sum(book.reserved for book in categories.values())
+        )
+
+
+class InventoryCache:
+    """Resumo de estoque por evento (LRU), mantido por deltas após o commit"""
+
+    def __init__(self, max_events: int):
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        self._events: "OrderedDict[int, _EventInventory]" = OrderedDict()
+        self._event_of: Dict[int, int] = {}  # ticket_master_id -> event_id
+        self._seq = 0
+        self._recent: deque = deque(maxlen=RECENT_DELTAS)  # (seq, ticket_master_id)
+        self._reset_seq = 0  # Última invalidação: cargas iniciadas antes são descartadas
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.deltas_applied = 0
+        self.drift = 0
+        self.loads_retried = 0
+
+    # ----- Leitura -----
+
+    def get_summary(self, db: Session, event_id: int) -> Optional[Dict[str, Any]]:
+        """Resumo do evento e de cada categoria (None se o evento não existir)"""
+        with self._lock:
+            inventory = self._events.get(event_id)
+            if inventory is not None:
+                self._events.move_to_end(event_id)
+                self.hits += 1
+                return self._render(event_id, inventory)
+            self.misses += 1
+
+        inventory = self._load(db, event_id)
+        if inventory is None:
+            return None
+        with self._lock:
+            return self._render(event_id, inventory)
+
+    def _render(self, event_id: int, inventory: _EventInventory) -> Dict[str, Any]:
+        return {
+            "event_id": event_id,
+            **inventory.total.summary(),
+            "categories": [
+                {"ticket_master_id": ticket_master_id, "category_name": inventory.names[ticket_master_id], **book.summary()}
+                for ticket_master_id, book in inventory.categories.items()
+            ]
+        }
+
+    # ----- Carga do banco -----
+
+    def _load(self, db: Session, event_id: int) -> Optional[_EventInventory]:
+        """Lê o evento do banco e guarda no cache.
+        
+        Um delta commitado durante a leitura pode ou não estar no snapshot: a
+        carga é refeita até LOAD_ATTEMPTS vezes e, se o evento continuar
+        recebendo deltas, guardada assim mesmo (o rebuild corrige o resto)."""
+        for attempt in range(1, LOAD_ATTEMPTS + 1):
+            with self._lock:
+                start_seq = self._seq
+
+            inventory = self._read(db, event_id)
+            if inventory is None:
+                return None
+
+            with self._lock:
+                if attempt == LOAD_ATTEMPTS or not self._touched_since(start_seq, inventory.categories):
+                    self._store(event_id, inventory)
+                    return inventory
+                self.loads_retried += 1
+        return inventory
+
+    def _read(self, db: Session, event_id: int) -> Optional[_EventInventory]:
+        categories = db.execute(
+            select(EventTicketMaster.id, EventTicketMaster.category_name)
+            .where(EventTicketMaster.event_id == event_id)
+            .order_by(EventTicketMaster.id)
+        ).all()
+        if not categories and db.query(Event.id).filter(Event.id == event_id).first() is None:
+            return None
+
+        books = {category.id: _Book() for category in categories}
+        rows = db.execute(
+            select(Listing.event_ticket_master_id, Listing.status, Listing.price_asked)
+            .where(
+                Listing.event_ticket_master_id.in_(list(books)),
+                Listing.status.in_((ListingStatus.ACTIVE, ListingStatus.RESERVED))
+            )
+            .order_by(Listing.event_ticket_master_id, Listing.status, Listing.price_asked)
+        ).all()
+        for row in rows:
+            book = books[row.event_ticket_master_id]
+            if row.status == ListingStatus.ACTIVE:
+                book.prices.append(row.price_asked)  # Já em ordem de preço
+            else:
+                book.reserved += 1
+
+        return _EventInventory(books, {category.id: category.category_name for category in categories})
+
+    def _touched_since(self, start_seq: int, ticket_master_ids) -> bool:
+        if self._seq == start_seq:
+            return False
+        if self._reset_seq > start_seq:
+            return True
+        if len(self._recent) == self._recent.maxlen and self._recent[0][0] > start_seq:
+            return True  # Deltas descartados do histórico: não dá para saber
+        return any(seq > start_seq and ticket_master_id in ticket_master_ids for seq, ticket_master_id in self._recent)
+
+    def _store(self, event_id: int, inventory: _EventInventory):
+        self._drop(event_id)
+        self._events[event_id] = inventory
+        for ticket_master_id in inventory.categories:
+            self._event_of[ticket_master_id] = event_id
+
+        while len(self._events) > self.max_events:
+            self._drop(next(iter(self._events)))
+            self.evictions += 1
+
+    def _drop(self, event_id: int):
+        inventory = self._events.pop(event_id, None)
+        if inventory is not None:
+            for ticket_master_id in inventory.categories:
+                self._event_of.pop(ticket_master_id, None)
+
+    # ----- Manutenção -----
+
+    def apply(self, deltas: List[Delta]):
+        """Aplica deltas commitados aos eventos em cache"""
+        with self._lock:
+            self._seq += 1
+            for ticket_master_id, status, price, sign in deltas:
+                status = _status(status)
+                if status not in (ListingStatus.ACTIVE, ListingStatus.RESERVED):
+                    continue
+                self._recent.append((self._seq, ticket_master_id))
+                event_id = self._event_of.get(ticket_master_id)
+                if event_id is None:
+                    continue
+                inventory = self._events[event_id]
+                consistent = inventory.categories[ticket_master_id].apply(status, price, sign)
+                if consistent:
+                    inventory.total.apply(status, price, sign)
+                    self.deltas_applied += 1
+                else:
+                    self.drift += 1
+
+    def invalidate_event(self, event_id: int):
+        """Descarta o resumo de um evento (recarregado no próximo acesso)"""
+        with self._lock:
+            self._drop(event_id)
+            self._seq += 1
+            self._reset_seq = self._seq
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self._event_of.clear()
+            self._seq += 1
+            self._reset_seq = self._seq
+
+    def rebuild(self, db: Session) -> Dict[str, int]:
+        """Recarrega do banco os eventos em cache (job periódico)"""
+        with self._lock:
+            event_ids = list(self._events)
+            drift = self.drift
+        reloaded = 0
+        for event_id in event_ids:
+            if self._load(db, event_id) is None:
+                self.invalidate_event(event_id)  # Evento removido
+            else:
+                reloaded += 1
+        return {"events_reloaded": reloaded, "drift_since_last_rebuild": self.drift - drift}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "events": len(self._events),
+                "max_events": self.max_events,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "deltas_applied": self.deltas_applied,
+                "drift": self.drift,
+                "loads_retried": self.loads_retried
+            }
+
+
+inventory_cache = InventoryCache(settings.inventory_cache_max_events)
+
+
+# ==================== DELTAS ====================
+# Transições feitas pelo ORM são capturadas pelos eventos do mapper; UPDATEs em
+# lote (reserva por compare-and-swap, expiração de reservas) chamam record().
+# Tudo fica na sessão até o commit; rollback descarta.
+
+_PENDING_KEY = "inventory_deltas"
+_STALE_KEY = "inventory_stale"
+_CHANGED_EVENTS_KEY = "inventory_changed_events"
+
+
+def _pending(session) -> List[Delta]:
+    return session.info.setdefault(_PENDING_KEY, [])
+
+
+def record(db, ticket_master_id: int, price: float, old_status, new_status):
+    """Anota a transição de um listing feita fora do ORM (Session ou AsyncSession)"""
+    pending = _pending(getattr(db, "sync_session", db))
+    if old_status is not None:
+        pending.append((ticket_master_id, old_status, price, -1))
+    if new_status is not None:
+        pending.append((ticket_master_id, new_status, price, 1))
+
+
+def mark_stale(db):
+    """Transições em lote sem as linhas afetadas: descarta o cache inteiro após o commit"""
+    getattr(db, "sync_session", db).info[_STALE_KEY] = True
+
+
+def _previous(state, attribute: str):
+    history = state.attrs[attribute].history
+    return history.deleted[0] if history.deleted else getattr(state.object, attribute)
+
+
+def _listing_inserted(mapper, connection, target: Listing):
+    session = Session.object_session(target)
+    if session is not None:
+        _pending(session).append((target.event_ticket_master_id, target.status or ListingStatus.ACTIVE, target.price_asked, 1))
+
+
+def _listing_updated(mapper, connection, target: Listing):
+    session = Session.object_session(target)
+    if session is None:
+        return
+
+    state = inspect(target)
+    old = (_previous(state, "event_ticket_master_id"), _status(_previous(state, "status")), _previous(state, "price_asked"))
+    new = (target.event_ticket_master_id, _status(target.status), target.price_asked)
+    if old != new:
+        _pending(session).extend([(*old, -1), (*new, 1)])
+
+
+def _listing_deleted(mapper, connection, target: Listing):
+    session = Session.object_session(target)
+    if session is not None:
+        state = inspect(target)
+        _pending(session).append((
+            _previous(state, "event_ticket_master_id"), _status(_previous(state, "status")), _previous(state, "price_asked"), -1
+        ))
+
+
+def _ticket_master_changed(mapper, connection, target: EventTicketMaster):
+    # Categoria nova ou renomeada: o evento é recarregado por inteiro
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_EVENTS_KEY, set()).add(target.event_id)
+
+
+event.listen(Listing, "after_insert", _listing_inserted)
+event.listen(Listing, "after_update", _listing_updated)
+event.listen(Listing, "after_delete", _listing_deleted)
+for _operation in ("after_insert", "after_update", "after_delete"):
+    event.listen(EventTicketMaster, _operation, _ticket_master_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session):
+    if session.info.pop(_STALE_KEY, False):
+        session.info.pop(_PENDING_KEY, None)
+        inventory_cache.clear()
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        inventory_cache.apply(deltas)
+    for event_id in session.info.pop(_CHANGED_EVENTS_KEY, ()):
+        inventory_cache.invalidate_event(event_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_STALE_KEY, None)
+    session.info.pop(_CHANGED_EVENTS_KEY, None)
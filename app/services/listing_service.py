@@ -1,9 +1,14 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.models.models import Listing, ListingStatus
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, and_, cast, func, select, update
+from app.models.models import Listing, ListingStatus, EventTicketMaster, Event, User
 from app.schemas.schemas import ListingCreate, ListingUpdate
 from app.services import event_service
+from app.services.pagination import paginate
+from app.services.price_cache import price_cache
+from app.services import inventory_cache
 from typing import Optional, List
+from datetime import datetime
 
 
 def validate_price(db: Session, ticket_master_id: int, price_asked: float) -> bool:
@@ -19,12 +24,13 @@ def create_listing(db: Session, seller_id: int, listing: ListingCreate) -> Listi
     """Cria anúncio de venda com validação de preço"""
     # Validação da regra dos 20%
     if not validate_price(db, listing.event_ticket_master_id, listing.price_asked):
-        ticket_master = event_service.get_ticket_master(db, listing.event_ticket_master_id)
-        max_price = ticket_master.face_value * 1.20 if ticket_master else 0
+        face_value = price_cache.get_face_value(db, listing.event_ticket_master_id)
+        if face_value is None:
+            raise ValueError("Categoria de ingresso não encontrada")
         raise ValueError(
             f"Preço excede o limite permitido. "
-            f"Valor original: R$ {ticket_master.face_value:.2f}, "
-            f"Máximo permitido (120%): R$ {max_price:.2f}"
+            f"Valor original: R$ {face_value:.2f}, "
+            f"Máximo permitido (120%): R$ {face_value * 1.20:.2f}"
         )
     
     db_listing = Listing(
@@ -48,20 +54,38 @@ def get_listing(db: Session, listing_id: int) -> Optional[Listing]:
     return db.query(Listing).filter(Listing.id == listing_id).first()
 
 
+def get_listing_event_id(db: Session, listing_id: int) -> Optional[int]:
+    """Busca o evento de um listing sem carregar os objetos"""
+    return db.query(EventTicketMaster.event_id)\
+        .join(Listing, Listing.event_ticket_master_id == EventTicketMaster.id)\
+        .filter(Listing.id == listing_id)\
+        .scalar()
+
+
+async def get_listing_event_id_async(db: AsyncSession, listing_id: int) -> Optional[int]:
+    """Busca o evento de um listing sem carregar os objetos (versão async)"""
+    result = await db.execute(
+        select(EventTicketMaster.event_id)
+        .join(Listing, Listing.event_ticket_master_id == EventTicketMaster.id)
+        .where(Listing.id == listing_id)
+    )
+    return result.scalar()
+
+
 def get_listings(
     db: Session,
     skip: int = 0,
     limit: int = 100,
     event_id: Optional[int] = None,
     status: Optional[ListingStatus] = None,
-    seller_id: Optional[int] = None
+    seller_id: Optional[int] = None,
+    cursor: Optional[str] = None
 ) -> List[Listing]:
     """Lista listings com filtros"""
     query = db.query(Listing)
     
     if event_id:
         # Join com ticket_master para filtrar por evento
-        from app.models.models import EventTicketMaster
         query = query.join(EventTicketMaster).filter(EventTicketMaster.event_id == event_id)
     
     if status:
@@ -70,14 +94,148 @@ def get_listings(
     if seller_id:
         query = query.filter(Listing.seller_id == seller_id)
     
-    return query.order_by(Listing.created_at.desc()).offset(skip).limit(limit).all()
+    return paginate(query, Listing.created_at, Listing.id, skip=skip, limit=limit, cursor=cursor).all()
+
+
+# Anúncio + vendedor + categoria + evento em linhas planas (ListingDetailResponse)
+LISTING_DETAIL_COLUMNS = (
+    Listing.id, Listing.seller_id, Listing.event_ticket_master_id, Listing.price_asked,
+    Listing.description, Listing.status, Listing.ticket_proof_image_url,
+    Listing.created_at, Listing.updated_at,
+    User.full_name.label("seller_name"),
+    User.reputation_score.label("seller_reputation"),
+    User.identity_verified.label("seller_identity_verified"),
+    EventTicketMaster.category_name,
+    EventTicketMaster.face_value,
+    (EventTicketMaster.face_value * 1.20).label("max_allowed_price"),
+    Event.id.label("event_id"),
+    Event.title.label("event_title"),
+    Event.venue.label("event_venue"),
+    Event.event_date
+)
+
+
+def _listing_details_query(
+    event_id: Optional[int] = None,
+    status: Optional[ListingStatus] = None,
+    seller_id: Optional[int] = None
+):
+    """SELECT das linhas de detalhe: um join por relacionamento em vez de lazy loads por linha"""
+    query = select(*LISTING_DETAIL_COLUMNS)\
+        .join(User, User.id == Listing.seller_id)\
+        .join(EventTicketMaster, EventTicketMaster.id == Listing.event_ticket_master_id)\
+        .join(Event, Event.id == EventTicketMaster.event_id)
+    
+    if event_id:
+        query = query.where(EventTicketMaster.event_id == event_id)
+    
+    if status:
+        query = query.where(Listing.status == status)
+    
+    if seller_id:
+        query = query.where(Listing.seller_id == seller_id)
+    
+    return query
+
+
+def get_listing_detail(db: Session, listing_id: int):
+    """Busca listing por ID com vendedor, categoria e evento"""
+    return db.execute(_listing_details_query().where(Listing.id == listing_id)).first()
+
+
+def get_listing_details(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    event_id: Optional[int] = None,
+    status: Optional[ListingStatus] = None,
+    seller_id: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> list:
+    """Lista listings com vendedor, categoria e evento em uma única consulta"""
+    query = _listing_details_query(event_id=event_id, status=status, seller_id=seller_id)
+    return db.execute(paginate(query, Listing.created_at, Listing.id, skip=skip, limit=limit, cursor=cursor)).all()
+
+
+async def get_listing_details_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    event_id: Optional[int] = None,
+    status: Optional[ListingStatus] = None,
+    cursor: Optional[str] = None
+) -> list:
+    """Lista listings com vendedor, categoria e evento em uma única consulta (versão async)"""
+    query = _listing_details_query(event_id=event_id, status=status)
+    result = await db.execute(paginate(query, Listing.created_at, Listing.id, skip=skip, limit=limit, cursor=cursor))
+    return list(result.all())
+
+
+def _order_book_query(ticket_master_id: int):
+    """Listings ACTIVE da categoria, na faixa do índice (event_ticket_master_id, status, price_asked, id)"""
+    return _listing_details_query(status=ListingStatus.ACTIVE)\
+        .where(Listing.event_ticket_master_id == ticket_master_id)
+
+
+def get_best_offer(db: Session, ticket_master_id: int):
+    """Listing ACTIVE mais barato da categoria (primeira entrada do índice)"""
+    query = _order_book_query(ticket_master_id).order_by(Listing.price_asked, Listing.id).limit(1)
+    return db.execute(query).first()
+
+
+def get_cheapest_listings(
+    db: Session,
+    ticket_master_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> list:
+    """Próximos `limit` listings ACTIVE da categoria em ordem de preço (cursor por (price_asked, id))"""
+    query = paginate(
+        _order_book_query(ticket_master_id), Listing.price_asked, Listing.id,
+        limit=limit, cursor=cursor, descending=False
+    )
+    return db.execute(query).all()
+
+
+def get_price_depth(db: Session, ticket_master_id: int, bucket_size: float = 10.0, levels: int = 10) -> list:
+    """Quantidade de listings ACTIVE por faixa de preço, a partir da faixa do melhor preço.
+    
+    Faixas de largura `bucket_size` alinhadas em múltiplos dela; só a parte do
+    índice dentro das `levels` primeiras faixas é lida."""
+    if bucket_size <= 0:
+        raise ValueError("bucket_size deve ser maior que zero")
+    
+    active = and_(
+        Listing.event_ticket_master_id == ticket_master_id,
+        Listing.status == ListingStatus.ACTIVE
+    )
+    best_price = db.query(Listing.price_asked).filter(active).order_by(Listing.price_asked).limit(1).scalar()
+    if best_price is None:
+        return []
+    
+    first_bucket = int(best_price // bucket_size)
+    bucket = cast(Listing.price_asked / bucket_size, Integer)
+    rows = db.query(bucket.label("bucket"), func.count(Listing.id).label("listings"))\
+        .filter(active, Listing.price_asked < (first_bucket + levels) * bucket_size)\
+        .group_by(bucket)\
+        .order_by(bucket)\
+        .all()
+    return [
+        {
+            "price_from": round(row.bucket * bucket_size, 2),
+            "price_to": round((row.bucket + 1) * bucket_size, 2),
+            "listings": row.listings
+        }
+        for row in rows
+    ]
 
 
 def get_active_listings(
     db: Session,
     event_id: Optional[int] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Listing]:
     """Lista apenas listings ativos"""
     return get_listings(
@@ -85,13 +243,20 @@ def get_active_listings(
         skip=skip,
         limit=limit,
         event_id=event_id,
-        status=ListingStatus.ACTIVE
+        status=ListingStatus.ACTIVE,
+        cursor=cursor
     )
 
 
-def get_seller_listings(db: Session, seller_id: int, skip: int = 0, limit: int = 100) -> List[Listing]:
+def get_seller_listings(
+    db: Session,
+    seller_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Listing]:
     """Lista todos os listings de um vendedor"""
-    return get_listings(db, skip=skip, limit=limit, seller_id=seller_id)
+    return get_listings(db, skip=skip, limit=limit, seller_id=seller_id, cursor=cursor)
 
 
 def update_listing(
@@ -118,10 +283,9 @@ def update_listing(
     
     # Valida novo preço se estiver sendo atualizado
     if 'price_asked' in update_data:
-        if not validate_price(db, db_listing.event_ticket_master_id, update_data['price_asked']):
-            ticket_master = event_service.get_ticket_master(db, db_listing.event_ticket_master_id)
-            max_price = ticket_master.face_value * 1.20 if ticket_master else 0
-            raise ValueError(f"Preço excede o limite de 120% (máximo: R$ {max_price:.2f})")
+        max_price = event_service.get_max_allowed_price(db, db_listing.event_ticket_master_id)
+        if max_price is None or update_data['price_asked'] > max_price:
+            raise ValueError(f"Preço excede o limite de 120% (máximo: R$ {max_price or 0:.2f})")
     
     for field, value in update_data.items():
         setattr(db_listing, field, value)
@@ -166,6 +330,77 @@ def reserve_listing(db: Session, listing_id: int) -> Optional[Listing]:
     return db_listing
 
 
+def _checkout_reserve_statement(listing_id: int, buyer_id: int):
+    """UPDATE condicional (compare-and-swap) ACTIVE -> RESERVED"""
+    return update(Listing)\
+        .where(
+            Listing.id == listing_id,
+            Listing.status == ListingStatus.ACTIVE,
+            Listing.seller_id != buyer_id
+        )\
+        .values(status=ListingStatus.RESERVED, updated_at=datetime.utcnow())
+
+
+def try_reserve_listing(db: Session, listing_id: int, buyer_id: int) -> Optional[float]:
+    """Reserva o listing se ainda estiver ACTIVE, sem commit.
+    
+    Retorna o preço pedido ou None se outro comprador reservou antes."""
+    stmt = _checkout_reserve_statement(listing_id, buyer_id)
+    
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(Listing.price_asked, Listing.event_ticket_master_id)).first()
+    elif db.execute(stmt).rowcount == 0:
+        row = None
+    else:
+        row = db.query(Listing.price_asked, Listing.event_ticket_master_id).filter(Listing.id == listing_id).first()
+    
+    if row is None:
+        return None
+    inventory_cache.record(db, row.event_ticket_master_id, row.price_asked, ListingStatus.ACTIVE, ListingStatus.RESERVED)
+    return row.price_asked
+
+
+async def try_reserve_listing_async(db: AsyncSession, listing_id: int, buyer_id: int) -> Optional[float]:
+    """Reserva o listing se ainda estiver ACTIVE, sem commit (versão async)"""
+    stmt = _checkout_reserve_statement(listing_id, buyer_id)
+    
+    if db.bind.dialect.update_returning:
+        row = (await db.execute(stmt.returning(Listing.price_asked, Listing.event_ticket_master_id))).first()
+    elif (await db.execute(stmt)).rowcount == 0:
+        row = None
+    else:
+        row = (await db.execute(
+            select(Listing.price_asked, Listing.event_ticket_master_id).where(Listing.id == listing_id)
+        )).first()
+    
+    if row is None:
+        return None
+    inventory_cache.record(db, row.event_ticket_master_id, row.price_asked, ListingStatus.ACTIVE, ListingStatus.RESERVED)
+    return row.price_asked
+
+
+def try_transition_listing(db: Session, listing_id: int, from_status: ListingStatus, to_status: ListingStatus) -> bool:
+    """UPDATE condicional do status do listing, sem commit.
+    
+    Retorna False se o listing não estava mais em `from_status` (ex.: a
+    varredura de reservas expiradas já o devolveu para ACTIVE)."""
+    stmt = update(Listing)\
+        .where(Listing.id == listing_id, Listing.status == from_status)\
+        .values(status=to_status, updated_at=datetime.utcnow())
+    
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(Listing.price_asked, Listing.event_ticket_master_id)).first()
+    elif db.execute(stmt).rowcount == 0:
+        row = None
+    else:
+        row = db.query(Listing.price_asked, Listing.event_ticket_master_id).filter(Listing.id == listing_id).first()
+    
+    if row is None:
+        return False
+    inventory_cache.record(db, row.event_ticket_master_id, row.price_asked, from_status, to_status)
+    return True
+
+
 def mark_as_sold(db: Session, listing_id: int) -> Optional[Listing]:
     """Marca listing como vendido"""
     db_listing = get_listing(db, listing_id)
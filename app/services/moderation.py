@@ -0,0 +1,274 @@
+"""
+Motor de moderação automática das mensagens de chat
+
+As palavras suspeitas são compiladas uma única vez em um autômato
+Aho-Corasick: cada mensagem é percorrida uma vez, caractere a caractere,
+encontrando todas as palavras ao mesmo tempo (custo linear no tamanho da
+mensagem, independente do tamanho da lista). Os padrões de telefone, email e
+chave PIX são expressões regulares pré-compiladas.
+
+O ruleset ativo (versão + motor compilado) é trocado atomicamente quando uma
+nova versão é publicada: a compilação acontece fora do caminho das mensagens
+e quem já pegou o ruleset anterior termina a verificação com ele.
+
+A verificação profunda (DeepModerationEngine) desfaz ofuscações ("w h a t s a p p",
+"z4p", números por extenso) e aceita palavras com um erro de digitação. Ela é
+mais cara e roda fora da requisição (ver moderation_pipeline).
+"""
+
+import re
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+PHONE_PATTERN = re.compile(r'\b\d{2,3}[-.\s]?\d{4,5}[-.\s]?\d{4}\b')
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Chaves PIX que não são telefone/email: CPF e CNPJ formatados e chave aleatória (EVP)
+PIX_KEY_PATTERN = re.compile(
+    r'\b\d{3}\.\d{3}\.\d{3}-\d{2}\b'
+    r'|\b\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}\b'
+    r'|\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b',
+    re.IGNORECASE
+)
+
+PATTERN_REASONS = [
+    (PHONE_PATTERN, "Número de telefone detectado"),
+    (EMAIL_PATTERN, "Email detectado"),
+    (PIX_KEY_PATTERN, "Chave PIX detectada"),
+]
+
+
+class KeywordAutomaton:
+    """Autômato Aho-Corasick para busca simultânea de várias palavras"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(k.lower() for k in keywords if k))
+
+        # Trie: transições por estado, link de falha e palavras que terminam no estado
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (index,)
+
+        # Links de falha em largura; cada estado herda as saídas do seu link
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[str]:
+        """Palavras encontradas no texto (já em minúsculas), na ordem da primeira ocorrência"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Dict[int, None] = {}
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for index in output[state]:
+                    found[index] = None
+
+        return [self.keywords[index] for index in found]
+
+
+class ModerationEngine:
+    """Palavras suspeitas + padrões de contato compilados uma única vez"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.automaton = KeywordAutomaton(keywords)
+
+    def find_reasons(self, message_text: str) -> List[str]:
+        """Todos os motivos de suspeita encontrados na mensagem"""
+        reasons = [
+            f"Palavra suspeita detectada: '{keyword}'"
+            for keyword in self.automaton.find_all(message_text.lower())
+        ]
+        for pattern, reason in PATTERN_REASONS:
+            if pattern.search(message_text):
+                reasons.append(reason)
+        return reasons
+
+    def check(self, message_text: str) -> Tuple[bool, Optional[str]]:
+        """(suspeita?, motivos separados por '; ')"""
+        reasons = self.find_reasons(message_text)
+        if not reasons:
+            return False, None
+        return True, "; ".join(reasons)
+
+
+class ActiveRuleset(NamedTuple):
+    version: int
+    engine: ModerationEngine
+
+
+class ModerationRules:
+    """Ruleset em uso neste worker"""
+
+    def __init__(self, default_keywords: Iterable[str]):
+        # Versão 0 = regras padrão do código, até o primeiro ruleset publicado
+        self._default_keywords = tuple(default_keywords)
+        self._active = ActiveRuleset(0, ModerationEngine(self._default_keywords))
+        self._swap_lock = threading.Lock()
+
+    @property
+    def active(self) -> ActiveRuleset:
+        """Leitura sem lock: a referência é trocada de uma vez"""
+        return self._active
+
+    @property
+    def version(self) -> int:
+        return self._active.version
+
+    def swap(self, version: int, keywords: Iterable[str]) -> ActiveRuleset:
+        """Compila o ruleset e o coloca em uso se for mais novo que o ativo (retorna o ruleset em uso)"""
+        ruleset = ActiveRuleset(version, ModerationEngine(keywords))
+        # A recarga periódica pode ter lido uma versão antes de uma publicação
+        # concorrente; sem a comparação ela voltaria para a versão anterior
+        with self._swap_lock:
+            if version > self._active.version:
+                self._active = ruleset
+            return self._active
+
+    def reset(self) -> ActiveRuleset:
+        """Volta para as regras padrão (banco sem rulesets publicados)"""
+        ruleset = ActiveRuleset(0, ModerationEngine(self._default_keywords))
+        with self._swap_lock:
+            self._active = ruleset
+        return ruleset
+
+
+# ==================== VERIFICAÇÃO PROFUNDA ====================
+
+# Letras soltas separadas por espaço/pontuação: "w h a t s a p p", "p.i.x"
+SPACED_LETTERS = re.compile(r'\b(?:\w[\s.\-_*|]+){2,}\w\b')
+SEPARATORS = re.compile(r'[\s.\-_*|]+')
+REPEATED_CHARS = re.compile(r'(\w)\1+')
+LEET_TABLE = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "$": "s"})
+
+NUMBER_WORDS = {
+    "zero": "0", "um": "1", "uma": "1", "dois": "2", "duas": "2", "tres": "3", "quatro": "4",
+    "cinco": "5", "seis": "6", "meia": "6", "sete": "7", "oito": "8", "nove": "9"
+}
+# Artigos e "meia entrada": só valem como dígito no meio de outros números
+AMBIGUOUS_NUMBER_WORDS = {"um", "uma", "meia"}
+NUMBER_TOKEN = r'(?:\d+|' + "|".join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r')\b'
+# Sequência de números (por extenso ou dígitos) separados por espaço/pontuação
+NUMBER_RUN = re.compile(r'\b' + NUMBER_TOKEN + r'(?:[\s,.\-]+' + NUMBER_TOKEN + r')*')
+NUMBER_TOKENS = re.compile(r'\b' + NUMBER_TOKEN)
+SPELLED_PHONE = re.compile(r'\d{8,}')
+
+# Palavras curtas têm vizinhas legítimas demais ("pessoal" ~ "pessoas")
+FUZZY_MIN_LENGTH = 8
+
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def collapse(text: str) -> str:
+    """Forma canônica comparada na verificação profunda (sem acentos, sem letras repetidas)"""
+    return REPEATED_CHARS.sub(r"\1", strip_accents(text.lower()))
+
+
+def normalize_obfuscation(text: str) -> str:
+    """Desfaz as ofuscações mais comuns antes de procurar as palavras"""
+    text = strip_accents(text.lower())
+    text = SPACED_LETTERS.sub(lambda m: SEPARATORS.sub("", m.group()), text)
+    return REPEATED_CHARS.sub(r"\1", text.translate(LEET_TABLE))
+
+
+def _deletions(word: str) -> Set[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+class DeepModerationEngine:
+    """Busca de palavras ofuscadas, aproximadas e telefones por extenso"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.original: Dict[str, str] = {}
+        for keyword in keywords:
+            canonical = collapse(keyword)
+            if canonical:
+                self.original.setdefault(canonical, keyword.lower())
+        self.automaton = KeywordAutomaton(self.original)
+
+        # Índice de deleções (SymSpell): variantes com um caractere a menos
+        # encontram candidatos a distância 1 sem comparar com cada palavra
+        self.deletions: Dict[str, Set[str]] = {}
+        for canonical in self.original:
+            if len(self.original[canonical]) >= FUZZY_MIN_LENGTH and canonical.isalpha():
+                for variant in _deletions(canonical) | {canonical}:
+                    self.deletions.setdefault(variant, set()).add(canonical)
+
+    def _fuzzy_matches(self, text: str, exact: Set[str]) -> List[Tuple[str, str]]:
+        matches = []
+        for token in dict.fromkeys(re.findall(r"[a-z]{%d,}" % (FUZZY_MIN_LENGTH - 2), text)):
+            candidates: Set[str] = set()
+            for variant in _deletions(token) | {token}:
+                candidates |= self.deletions.get(variant, set())
+            for canonical in sorted(candidates - exact):
+                if canonical not in token:
+                    matches.append((self.original[canonical], token))
+        return matches
+
+    def find_reasons(self, message_text: str) -> List[str]:
+        """Motivos que só aparecem depois de normalizar a mensagem"""
+        normalized = normalize_obfuscation(message_text)
+        exact = self.automaton.find_all(normalized)
+        reasons = [f"Palavra suspeita ofuscada: '{self.original[canonical]}'" for canonical in exact]
+        reasons += [
+            f"Palavra suspeita aproximada: '{keyword}' ~ '{token}'"
+            for keyword, token in self._fuzzy_matches(normalized, set(exact))
+        ]
+
+        if any(SPELLED_PHONE.search(digits) for digits in spelled_numbers(message_text)):
+            reasons.append("Número de telefone por extenso detectado")
+        return reasons
+
+
+def spelled_numbers(message_text: str) -> List[str]:
+    """Dígitos de cada sequência de números que tem ao menos um por extenso ("nove 9 oito..." -> "998...")"""
+    runs = []
+    for run in NUMBER_RUN.finditer(strip_accents(message_text.lower())):
+        tokens = NUMBER_TOKENS.findall(run.group())
+        words = [token for token in tokens if token in NUMBER_WORDS]
+        if not words or (len(tokens) == 1 and tokens[0] in AMBIGUOUS_NUMBER_WORDS):
+            continue
+        runs.append("".join(NUMBER_WORDS.get(token, token) for token in tokens))
+    return runs
+
+
+# Um motor por processo, recompilado só quando a versão do ruleset muda
+_deep_engine: Optional[Tuple[int, DeepModerationEngine]] = None
+
+
+def deep_check_batch(version: int, keywords: Sequence[str], texts: Sequence[str]) -> List[List[str]]:
+    """Verificação profunda de um lote (executada nos processos do pool)"""
+    global _deep_engine
+    if _deep_engine is None or _deep_engine[0] != version:
+        _deep_engine = (version, DeepModerationEngine(keywords))
+    engine = _deep_engine[1]
+    return [engine.find_reasons(text) for text in texts]
@@ -0,0 +1,327 @@
+"""
+Segunda etapa da moderação do chat, fora da requisição
+
+send_message aplica só o filtro barato (Aho-Corasick do ruleset ativo) e
+commita. Mensagens que passaram entram numa fila limitada; uma thread
+despachante agrupa a fila em lotes, executa a verificação profunda em um pool
+de processos e grava, em uma única transação por lote, os campos
+flagged_by_system/flagged_reason e os logs de auditoria.
+
+Backpressure: com a fila cheia (ou o pipeline parado) a verificação profunda
+roda na própria requisição, que fica mais lenta mas nenhuma mensagem deixa de
+ser verificada. No shutdown a fila é drenada antes de encerrar o pool.
+
+Falhas: um lote que falha (processo do pool morto, erro no banco) volta para a
+fila até max_retries vezes; um pool quebrado é recriado. Esgotadas as
+tentativas, as mensagens são marcadas para revisão manual em vez de perdidas.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import bindparam, update
+
+from app.models.models import ChatMessage, LogCategory, SystemLog
+from app.services.moderation import ModerationRules, deep_check_batch
+
+logger = logging.getLogger(__name__)
+
+
+class ModerationTask(NamedTuple):
+    message_id: int
+    chat_room_id: int
+    sender_id: int
+    message_text: str
+    attempts: int = 0  # lotes que já falharam com esta mensagem
+
+
+_STOP = object()
+
+# Motivo gravado quando a verificação profunda não conseguiu rodar
+MANUAL_REVIEW_REASON = "Revisão manual: verificação automática falhou"
+
+
+class ModerationPipeline:
+    """Fila limitada + pool de processos para a verificação profunda"""
+
+    def __init__(
+        self,
+        rules: ModerationRules,
+        workers: int,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        session_factory: Optional[Callable] = None,
+        max_retries: int = 3
+    ):
+        self.rules = rules
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self.max_retries = max_retries
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self.stats_counters = {
+            "submitted": 0,
+            "inline_fallbacks": 0,
+            "processed": 0,
+            "flagged": 0,
+            "batches": 0,
+            "failures": 0,
+            "retries": 0,
+            "pool_restarts": 0,
+            "manual_review": 0
+        }
+
+    def _count(self, **increments: int):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats_counters[key] += value
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    # ----- Ciclo de vida -----
+
+    def start(self):
+        if self.running:
+            return
+        if self.workers > 0:
+            self._executor = self._new_executor()
+        self._thread = threading.Thread(target=self._loop, name="moderation-pipeline", daemon=True)
+        self._thread.start()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        # Sobe os processos agora, antes das demais threads da aplicação
+        list(executor.map(int, range(self.workers)))
+        return executor
+
+    def _restart_executor(self, broken: ProcessPoolExecutor):
+        """Troca um pool quebrado (processo morto) por um novo; chamado só pela thread do pipeline"""
+        if self._executor is not broken:
+            return  # outro lote do mesmo pool já o recriou
+        broken.shutdown(wait=False)
+        try:
+            self._executor = self._new_executor()
+        except Exception:
+            # Sem pool, os lotes seguintes rodam na thread do pipeline
+            self._executor = None
+            logger.exception("Falha ao recriar o pool da moderação")
+        self._count(pool_restarts=1)
+
+    def stop(self, timeout: float = 30.0):
+        """Drena a fila e encerra o pool"""
+        if self.running:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # ----- Entrada -----
+
+    def try_submit(self, task: ModerationTask) -> bool:
+        """Enfileira sem bloquear; False se parado ou com a fila cheia"""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(task)
+        except queue.Full:
+            return False
+        self._count(submitted=1)
+        return True
+
+    def submit(self, task: ModerationTask) -> bool:
+        """Enfileira ou, sem espaço, verifica na hora (backpressure).
+        
+        Retorna False quando a verificação já foi feita no chamador."""
+        if self.try_submit(task):
+            return True
+        self.process_now([task])
+        return False
+
+    def process_now(self, tasks: List[ModerationTask]):
+        """Verificação profunda síncrona, no chamador"""
+        self._count(inline_fallbacks=len(tasks))
+        self._finish(*self._dispatch(tasks, use_pool=False))
+
+    # ----- Processamento -----
+
+    def _next_batch(self, block: bool) -> tuple:
+        """Espera o primeiro item e junta o que chegar até o lote encher ou o prazo vencer"""
+        batch: List[ModerationTask] = []
+        try:
+            first = self._queue.get(timeout=None if block else self.flush_interval)
+        except queue.Empty:
+            return batch, False
+        if first is _STOP:
+            return batch, True
+
+        batch.append(first)
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _loop(self):
+        # Até `workers` lotes em paralelo no pool; os resultados são gravados aqui
+        in_flight: List[tuple] = []
+        stopping = False
+        while not stopping:
+            # Com lotes pendentes, a espera por mensagens novas tem prazo
+            batch, stopping = self._next_batch(block=not in_flight)
+            if batch:
+                in_flight.append(self._dispatch(batch))
+
+            limit = 0 if stopping else max(self.workers, 1) - 1
+            while in_flight:
+                pending = [entry[0] for entry in in_flight]
+                done, _ = wait(pending, timeout=None if len(in_flight) > limit else 0, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for entry in [entry for entry in in_flight if entry[0] in done]:
+                    in_flight.remove(entry)
+                    self._finish(*entry)
+
+        # Drena o que ainda estiver na fila (inclusive lotes devolvidos por falha)
+        while True:
+            leftover = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    leftover.append(item)
+            if not leftover:
+                break
+            for start in range(0, len(leftover), self.batch_size):
+                self._finish(*self._dispatch(leftover[start:start + self.batch_size]))
+
+    def _dispatch(self, tasks: List[ModerationTask], use_pool: bool = True) -> tuple:
+        """Envia o lote para o pool (ou verifica aqui se não houver pool)"""
+        active = self.rules.active
+        texts = [task.message_text for task in tasks]
+        keywords = active.engine.automaton.keywords
+        executor = self._executor if use_pool else None
+        if executor is not None:
+            try:
+                return executor.submit(deep_check_batch, active.version, keywords, texts), tasks, active.version, executor
+            except BrokenProcessPool:
+                self._restart_executor(executor)
+                return self._dispatch(tasks, use_pool)
+
+        future = Future()
+        try:
+            future.set_result(deep_check_batch(active.version, keywords, texts))
+        except Exception as e:
+            future.set_exception(e)
+        return future, tasks, active.version, None
+
+    def _finish(self, future: Future, tasks: List[ModerationTask], version: int,
+                executor: Optional[ProcessPoolExecutor] = None):
+        try:
+            flagged = [(task, reasons) for task, reasons in zip(tasks, future.result()) if reasons]
+            if flagged:
+                self._apply(flagged, version)
+        except Exception as e:
+            self._count(failures=len(tasks))
+            logger.exception("Falha na moderação de %d mensagens", len(tasks))
+            if isinstance(e, BrokenProcessPool) and executor is not None:
+                self._restart_executor(executor)
+            self._retry(tasks)
+            return
+
+        self._count(processed=len(tasks), flagged=len(flagged), batches=1)
+
+    def _retry(self, tasks: List[ModerationTask]):
+        """Devolve à fila as mensagens de um lote que falhou; sem tentativas (ou sem espaço), revisão manual"""
+        exhausted = []
+        for task in tasks:
+            if task.attempts >= self.max_retries or not self.running:
+                exhausted.append(task)
+                continue
+            try:
+                self._queue.put_nowait(task._replace(attempts=task.attempts + 1))
+            except queue.Full:
+                exhausted.append(task)
+                continue
+            self._count(retries=1)
+
+        if exhausted:
+            self._flag_for_review(exhausted)
+
+    def _flag_for_review(self, tasks: List[ModerationTask]):
+        """Marca como suspeitas, para um moderador, mensagens que a verificação profunda não conseguiu checar"""
+        try:
+            self._apply([(task, [MANUAL_REVIEW_REASON]) for task in tasks], version=None, stage="review")
+        except Exception:
+            logger.exception("Mensagens sem verificação profunda: %s", [task.message_id for task in tasks])
+            return
+        self._count(manual_review=len(tasks))
+
+    def _apply(self, flagged: List[tuple], version: Optional[int], stage: str = "deep"):
+        """Marca as mensagens e grava os logs do lote em uma transação"""
+        if self.session_factory is None:
+            from app.database import SessionLocal
+            self.session_factory = SessionLocal
+
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(ChatMessage.__table__)
+                .where(ChatMessage.__table__.c.id == bindparam("message_id"))
+                .values(flagged_by_system=True, flagged_reason=bindparam("reason")),
+                [{"message_id": task.message_id, "reason": "; ".join(reasons)} for task, reasons in flagged]
+            )
+            db.add_all([
+                SystemLog(
+                    user_id=task.sender_id,
+                    category=LogCategory.SUSPICIOUS_MESSAGE,
+                    action=f"Mensagem suspeita no chat {task.chat_room_id}",
+                    log_metadata={
+                        "reason": "; ".join(reasons),
+                        "message_id": task.message_id,
+                        "moderation_version": version,
+                        "stage": stage
+                    }
+                )
+                for task, reasons in flagged
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            counters = dict(self.stats_counters)
+        counters.update({
+            "running": self.running,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize
+        })
+        return counters
@@ -0,0 +1,100 @@
+"""
+Publicação e recarga dos rulesets de moderação do chat
+
+Os rulesets ficam na tabela moderation_rulesets (id = versão). Cada worker
+consulta só a maior versão a cada MODERATION_RELOAD_INTERVAL segundos e, se
+mudou, carrega e compila o novo ruleset e troca o ativo. O envio de mensagens
+nunca lê o banco para moderar.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import LogCategory, ModerationRuleset, SystemLog
+from app.schemas.schemas import ModerationRulesetCreate
+from app.services.chat_service import moderation_rules
+from app.services.pagination import paginate
+
+MODERATION_RELOAD_JOB = "moderation-reload"
+
+
+def normalize_keywords(keywords: List[str]) -> List[str]:
+    """Minúsculas, sem espaços nas pontas, sem vazios nem repetidas"""
+    return list(dict.fromkeys(k.strip().lower() for k in keywords if k.strip()))
+
+
+def publish_ruleset(
+    db: Session,
+    ruleset: ModerationRulesetCreate,
+    published_by: Optional[int] = None
+) -> ModerationRuleset:
+    """Publica nova versão das regras e a ativa neste worker"""
+    keywords = normalize_keywords(ruleset.keywords)
+    if not keywords:
+        raise ValueError("O ruleset precisa de ao menos uma palavra")
+    
+    db_ruleset = ModerationRuleset(
+        keywords=keywords,
+        description=ruleset.description,
+        published_by=published_by
+    )
+    db.add(db_ruleset)
+    db.flush()
+    
+    db.add(SystemLog(
+        user_id=published_by,
+        category=LogCategory.MODERATION,
+        action=f"Ruleset de moderação v{db_ruleset.id} publicado",
+        log_metadata={"moderation_version": db_ruleset.id, "keywords": len(keywords)}
+    ))
+    db.commit()
+    db.refresh(db_ruleset)
+    
+    # Os demais workers trocam no próximo ciclo do job de recarga
+    moderation_rules.swap(db_ruleset.id, db_ruleset.keywords)
+    return db_ruleset
+
+
+def get_ruleset(db: Session, version: int) -> Optional[ModerationRuleset]:
+    """Busca ruleset por versão"""
+    return db.get(ModerationRuleset, version)
+
+
+def get_rulesets(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[ModerationRuleset]:
+    """Histórico de rulesets publicados (mais recentes primeiro)"""
+    query = db.query(ModerationRuleset)
+    return paginate(
+        query, ModerationRuleset.created_at, ModerationRuleset.id,
+        skip=skip, limit=limit, cursor=cursor
+    ).all()
+
+
+def reload_rules(db: Session) -> Dict[str, Any]:
+    """Troca o ruleset ativo se a versão publicada mudou (job periódico)"""
+    latest_version = db.scalar(select(func.max(ModerationRuleset.id))) or 0
+    if latest_version == moderation_rules.version:
+        return {"version": latest_version, "reloaded": 0}
+    
+    if latest_version == 0:
+        moderation_rules.reset()
+        return {"version": 0, "reloaded": 1}
+    
+    # Só troca para versões mais novas que a ativa (publish_ruleset pode ter passado na frente)
+    active = moderation_rules.swap(latest_version, get_ruleset(db, latest_version).keywords)
+    return {"version": active.version, "reloaded": int(active.version == latest_version)}
+
+
+def get_active_ruleset_info() -> Dict[str, Any]:
+    """Versão e tamanho do ruleset em uso neste worker"""
+    active = moderation_rules.active
+    return {
+        "version": active.version,
+        "keywords": len(active.engine.automaton.keywords)
+    }
@@ -1,14 +1,24 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
-from app.models.models import Order, PaymentStatus, EscrowStatus, Listing
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, func, select, update, bindparam
+from app.config import settings
+from app.models.models import (
+    Order, PaymentStatus, EscrowStatus, Listing, ListingStatus,
+    User, Dispute, DisputeStatus
+)
 from app.schemas.schemas import OrderCreate, SellerStats, BuyerStats
-from app.services import listing_service
-from typing import Optional, List
-from datetime import datetime
+from app.services import inventory_cache, listing_service, scheduler
+from app.services.pagination import paginate
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta
+from collections import Counter
 import secrets
+import time
 
 
 PLATFORM_FEE_PERCENTAGE = 0.05  # 5% de taxa
+REPUTATION_PER_SALE = 1.0  # Pontos de reputação por escrow liberado
+ESCROW_RELEASE_JOB = "escrow-release"
 
 
 def generate_payment_id() -> str:
@@ -16,40 +26,53 @@ def generate_payment_id() -> str:
     return f"PAY-{secrets.token_urlsafe(12)}"
 
 
-def create_order(db: Session, buyer_id: int, order: OrderCreate) -> Order:
-    """Cria pedido com escrow"""
-    # Busca listing
-    listing = listing_service.get_listing(db, order.listing_id)
-    
+class CheckoutConflictError(ValueError):
+    """Outro comprador reservou o anúncio primeiro"""
+
+
+class OrderStateConflictError(ValueError):
+    """O pedido mudou de estado (pago, cancelado ou expirado) antes desta transição"""
+
+
+def _checkout_failure(listing: Optional[Listing], buyer_id: int) -> ValueError:
+    """Explica por que a reserva condicional não afetou nenhuma linha"""
     if not listing:
-        raise ValueError("Anúncio não encontrado")
-    
-    from app.models.models import ListingStatus
-    if listing.status != ListingStatus.ACTIVE:
-        raise ValueError("Este anúncio não está disponível")
+        return ValueError("Anúncio não encontrado")
     
     if listing.seller_id == buyer_id:
-        raise ValueError("Você não pode comprar seu próprio anúncio")
-    
-    # Reserva o listing
-    listing_service.reserve_listing(db, listing.id)
+        return ValueError("Você não pode comprar seu próprio anúncio")
     
-    # Calcula valores
-    amount = listing.price_asked
-    platform_fee = amount * PLATFORM_FEE_PERCENTAGE
-    total_amount = amount + platform_fee
+    return CheckoutConflictError("Este anúncio não está disponível")
+
+
+def _build_order(buyer_id: int, listing_id: int, price_asked: float, payment_method: Optional[str]) -> Order:
+    """Monta a order com escrow HELD a partir do preço reservado"""
+    platform_fee = price_asked * PLATFORM_FEE_PERCENTAGE
     
-    # Cria order com escrow HELD
-    db_order = Order(
+    return Order(
         buyer_id=buyer_id,
-        listing_id=listing.id,
-        total_amount=total_amount,
+        listing_id=listing_id,
+        total_amount=price_asked + platform_fee,
         platform_fee=platform_fee,
         payment_status=PaymentStatus.PENDING,
         escrow_status=EscrowStatus.HELD,  # Dinheiro retido
-        payment_method=order.payment_method,
+        payment_method=payment_method,
         payment_id=generate_payment_id()
     )
+
+
+def create_order(db: Session, buyer_id: int, order: OrderCreate) -> Order:
+    """Cria pedido com escrow em uma única transação.
+    
+    A reserva é um UPDATE condicional (status ACTIVE -> RESERVED); se nenhuma
+    linha for afetada, outro comprador chegou antes e a transação é desfeita."""
+    price_asked = listing_service.try_reserve_listing(db, order.listing_id, buyer_id)
+    
+    if price_asked is None:
+        db.rollback()
+        raise _checkout_failure(listing_service.get_listing(db, order.listing_id), buyer_id)
+    
+    db_order = _build_order(buyer_id, order.listing_id, price_asked, order.payment_method)
     
     db.add(db_order)
     db.commit()
@@ -57,6 +80,23 @@ def create_order(db: Session, buyer_id: int, order: OrderCreate) -> Order:
     return db_order
 
 
+async def create_order_async(db: AsyncSession, buyer_id: int, order: OrderCreate) -> Order:
+    """Cria pedido com escrow em uma única transação (versão async)"""
+    price_asked = await listing_service.try_reserve_listing_async(db, order.listing_id, buyer_id)
+    
+    if price_asked is None:
+        await db.rollback()
+        listing = (await db.execute(select(Listing).where(Listing.id == order.listing_id))).scalar_one_or_none()
+        raise _checkout_failure(listing, buyer_id)
+    
+    db_order = _build_order(buyer_id, order.listing_id, price_asked, order.payment_method)
+    
+    db.add(db_order)
+    await db.commit()
+    await db.refresh(db_order)
+    return db_order
+
+
 def get_order(db: Session, order_id: int) -> Optional[Order]:
     """Busca order por ID"""
     return db.query(Order).filter(Order.id == order_id).first()
@@ -67,7 +107,8 @@ def get_user_orders(
     user_id: int,
     as_buyer: bool = True,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Order]:
     """Lista orders de um usuário"""
     if as_buyer:
@@ -76,24 +117,49 @@ def get_user_orders(
         # Busca através do listing
         query = db.query(Order).join(Listing).filter(Listing.seller_id == user_id)
     
-    return query.order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
+    return paginate(query, Order.created_at, Order.id, skip=skip, limit=limit, cursor=cursor).all()
 
 
-def complete_payment(db: Session, order_id: int) -> Optional[Order]:
-    """Completa pagamento (dinheiro ainda em escrow)"""
+def complete_payment(
+    db: Session,
+    order_id: int,
+    hold_ttl_seconds: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> Optional[Order]:
+    """Completa pagamento (dinheiro ainda em escrow).
+    
+    PENDING -> PAID e RESERVED -> SOLD são UPDATEs condicionais: se a reserva
+    expirou ou a varredura já devolveu o listing, nada muda e a transação é
+    desfeita (OrderStateConflictError)."""
+    now = now or datetime.utcnow()
+    hold_ttl_seconds = settings.reservation_hold_ttl if hold_ttl_seconds is None else hold_ttl_seconds
     db_order = get_order(db, order_id)
     
     if not db_order:
         return None
     
-    if db_order.payment_status != PaymentStatus.PENDING:
-        raise ValueError("Este pedido não está pendente")
-    
-    db_order.payment_status = PaymentStatus.PAID
-    db_order.completed_at = datetime.utcnow()
+    paid = db.execute(
+        update(Order)
+        .where(
+            Order.id == order_id,
+            Order.payment_status == PaymentStatus.PENDING,
+            # Mesmo prazo da varredura (release_expired_reservations)
+            Order.created_at >= now - timedelta(seconds=hold_ttl_seconds)
+        )
+        .values(payment_status=PaymentStatus.PAID, completed_at=now)
+    ).rowcount
+    
+    if not paid:
+        db.rollback()
+        db.refresh(db_order)
+        if db_order.payment_status != PaymentStatus.PENDING:
+            raise OrderStateConflictError("Este pedido não está pendente")
+        raise OrderStateConflictError("O prazo para pagar esta reserva expirou")
     
     # Marca listing como vendido
-    listing_service.mark_as_sold(db, db_order.listing_id)
+    if not listing_service.try_transition_listing(db, db_order.listing_id, ListingStatus.RESERVED, ListingStatus.SOLD):
+        db.rollback()
+        raise OrderStateConflictError("A reserva deste anúncio não está mais ativa")
     
     db.commit()
     db.refresh(db_order)
@@ -144,7 +210,7 @@ def mark_escrow_as_dispute(db: Session, order_id: int) -> Optional[Order]:
 
 
 def cancel_order(db: Session, order_id: int, user_id: int) -> Optional[Order]:
-    """Cancela pedido e libera listing"""
+    """Cancela pedido e libera listing (PENDING -> REFUNDED condicional, como complete_payment)"""
     db_order = get_order(db, order_id)
     
     if not db_order:
@@ -158,13 +224,21 @@ def cancel_order(db: Session, order_id: int, user_id: int) -> Optional[Order]:
     if db_order.buyer_id != user_id and listing.seller_id != user_id:
         raise PermissionError("Você não tem permissão para cancelar este pedido")
     
-    if db_order.payment_status == PaymentStatus.PAID:
-        raise ValueError("Pedidos pagos não podem ser cancelados (abra uma disputa)")
+    cancelled = db.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.payment_status == PaymentStatus.PENDING)
+        .values(payment_status=PaymentStatus.REFUNDED)
+    ).rowcount
     
-    db_order.payment_status = PaymentStatus.REFUNDED
+    if not cancelled:
+        db.rollback()
+        db.refresh(db_order)
+        if db_order.payment_status == PaymentStatus.PAID:
+            raise OrderStateConflictError("Pedidos pagos não podem ser cancelados (abra uma disputa)")
+        raise OrderStateConflictError("Este pedido não está pendente")
     
-    # Libera listing
-    listing_service.release_reservation(db, db_order.listing_id)
+    # Libera listing (a varredura pode já tê-lo devolvido para ACTIVE)
+    listing_service.try_transition_listing(db, db_order.listing_id, ListingStatus.RESERVED, ListingStatus.ACTIVE)
     
     db.commit()
     db.refresh(db_order)
@@ -189,12 +263,145 @@ def refund_order(db: Session, order_id: int) -> Optional[Order]:
     return db_order
 
 
+def release_expired_reservations(
+    db: Session,
+    hold_ttl_seconds: int,
+    now: Optional[datetime] = None
+) -> Dict[str, int]:
+    """Cancela pedidos PENDING além do prazo e devolve os listings para ACTIVE.
+    
+    Duas atualizações em lote na mesma transação, sem carregar objetos ORM."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=hold_ttl_seconds)
+    expired = and_(Order.payment_status == PaymentStatus.PENDING, Order.created_at < cutoff)
+    
+    # Listings primeiro: a subquery depende dos pedidos ainda estarem PENDING
+    release = update(Listing)\
+        .where(
+            Listing.status == ListingStatus.RESERVED,
+            Listing.id.in_(select(Order.listing_id).where(expired))
+        )\
+        .values(status=ListingStatus.ACTIVE, updated_at=now)
+    
+    if db.get_bind().dialect.update_returning:
+        released = db.execute(
+            release.returning(Listing.event_ticket_master_id, Listing.price_asked),
+            execution_options={"synchronize_session": False}
+        ).all()
+        for listing in released:
+            inventory_cache.record(
+                db, listing.event_ticket_master_id, listing.price_asked, ListingStatus.RESERVED, ListingStatus.ACTIVE
+            )
+        listings_released = len(released)
+    else:
+        listings_released = db.execute(release, execution_options={"synchronize_session": False}).rowcount
+        if listings_released:
+            inventory_cache.mark_stale(db)
+    
+    orders_expired = db.execute(
+        update(Order).where(expired).values(payment_status=PaymentStatus.REFUNDED),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    
+    db.commit()
+    return {"orders_expired": orders_expired, "listings_released": listings_released}
+
+
+def release_due_escrows(
+    db: Session,
+    release_after_days: int,
+    chunk_size: int = 5000,
+    now: Optional[datetime] = None,
+    max_chunks: Optional[int] = None
+) -> Dict[str, Any]:
+    """Libera em lote o escrow de pedidos pagos há mais de `release_after_days`.
+    
+    Pedidos com disputa aberta ficam retidos. Cada bloco (por ordem de ID) é
+    liberado com um UPDATE, a reputação é somada por vendedor (um UPDATE por
+    vendedor) e o checkpoint é gravado no mesmo commit, então uma falha no
+    meio retoma do último bloco concluído."""
+    now = now or datetime.utcnow()
+    deadline = now - timedelta(days=release_after_days)
+    open_dispute = select(Dispute.id)\
+        .where(Dispute.order_id == Order.id, Dispute.status == DisputeStatus.OPEN)\
+        .exists()
+    due = and_(
+        Order.payment_status == PaymentStatus.PAID,
+        Order.escrow_status == EscrowStatus.HELD,
+        Order.completed_at < deadline,
+        ~open_dispute
+    )
+    users = User.__table__
+    add_reputation = update(users)\
+        .where(users.c.id == bindparam("seller"))\
+        .values(reputation_score=users.c.reputation_score + bindparam("increment"))
+    returning = db.get_bind().dialect.update_returning
+    
+    start = time.perf_counter()
+    released = chunks = 0
+    sellers = set()
+    last_id = scheduler.get_checkpoint(db, ESCROW_RELEASE_JOB)
+    
+    while max_chunks is None or chunks < max_chunks:
+        candidates = select(Order.id, Listing.seller_id)\
+            .join(Listing, Listing.id == Order.listing_id)\
+            .where(Order.id > last_id, due)\
+            .order_by(Order.id)\
+            .limit(chunk_size)
+        if not returning:
+            # Sem RETURNING: trava os pedidos para que só este UPDATE possa liberá-los
+            candidates = candidates.with_for_update(of=Order)
+        rows = db.execute(candidates).all()
+        
+        if not rows:
+            # Backlog zerado: a próxima execução recomeça do início
+            scheduler.set_checkpoint(db, ESCROW_RELEASE_JOB, 0)
+            db.commit()
+            break
+        
+        order_ids = [row.id for row in rows]
+        release = update(Order)\
+            .where(Order.id.in_(order_ids), due)\
+            .values(escrow_status=EscrowStatus.RELEASED_TO_SELLER)
+        
+        # Só credita pedidos que realmente mudaram (uma disputa pode ter sido aberta)
+        if returning:
+            changed = set(db.execute(release.returning(Order.id), execution_options={"synchronize_session": False}).scalars())
+        else:
+            db.execute(release, execution_options={"synchronize_session": False})
+            changed = set(db.execute(
+                select(Order.id).where(Order.id.in_(order_ids), Order.escrow_status == EscrowStatus.RELEASED_TO_SELLER)
+            ).scalars())
+        rows = [row for row in rows if row.id in changed]
+        
+        increments = Counter(row.seller_id for row in rows)
+        if increments:
+            db.execute(add_reputation, [
+                {"seller": seller_id, "increment": count * REPUTATION_PER_SALE}
+                for seller_id, count in increments.items()
+            ])
+        
+        last_id = order_ids[-1]
+        scheduler.set_checkpoint(db, ESCROW_RELEASE_JOB, last_id)
+        db.commit()
+        
+        released += len(rows)
+        sellers.update(increments)
+        chunks += 1
+    
+    elapsed = time.perf_counter() - start
+    return {
+        "orders_released": released,
+        "sellers_credited": len(sellers),
+        "chunks": chunks,
+        "orders_per_second": round(released / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
 # ==================== STATISTICS ====================
 
 def get_seller_statistics(db: Session, seller_id: int) -> SellerStats:
     """Estatísticas do vendedor"""
-    from app.models.models import ListingStatus
-    
     total_listings = db.query(func.count(Listing.id))\
         .filter(Listing.seller_id == seller_id)\
         .scalar() or 0
@@ -0,0 +1,87 @@
+"""
+Paginação por cursor (keyset) sobre (chave de ordenação, id)
+
+O cursor é opaco para o cliente: base64 de um JSON com os valores da última
+linha da página. Com cursor, a consulta filtra `(chave, id) < (v, id)` e usa
+o índice composto em vez de descartar `skip` linhas.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Query as QueryParam, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, last_id: int) -> str:
+    """Gera cursor opaco a partir da última linha da página"""
+    if isinstance(sort_value, datetime):
+        payload = {"t": sort_value.isoformat(), "id": last_id}
+    else:
+        payload = {"v": sort_value, "id": last_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Lê (valor de ordenação, id) do cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value = datetime.fromisoformat(payload["t"]) if "t" in payload else payload["v"]
+        return sort_value, int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
+
+
+def paginate(
+    query,
+    sort_column,
+    id_column,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    descending: bool = True
+):
+    """Ordena por (chave, id) e aplica cursor (keyset) ou skip (offset).
+    
+    Aceita Query ou Select e devolve a consulta pronta para executar."""
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        position = tuple_(sort_column, id_column)
+        query = query.filter(position < (sort_value, last_id) if descending else position > (sort_value, last_id))
+    elif skip:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
+def set_next_cursor(response: Response, items: List[Any], limit: int, sort_attribute: str):
+    """Publica o cursor da próxima página no header X-Next-Cursor"""
+    if items and len(items) >= limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_attribute), last.id)
+
+
+def cursor_param(
+    cursor: Optional[str] = QueryParam(None, description="Cursor da próxima página (header X-Next-Cursor)")
+) -> Optional[str]:
+    """Dependency que valida o cursor recebido na query string"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    return cursor
@@ -0,0 +1,158 @@
+"""
+Cache em processo dos valores de face (EventTicketMaster) usados na regra dos 120%
+
+Os valores de face praticamente não mudam depois de publicados, então a
+validação de preço de create_listing/update_listing não precisa ir ao banco.
+O cache é aquecido por evento (o primeiro acesso carrega todas as categorias
+do evento), limitado em número de eventos (LRU) e invalidado quando uma
+categoria é criada, alterada ou removida pelo ORM. O TTL limita o tempo de
+uma entrada desatualizada em outros workers, que não recebem a invalidação.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import EventTicketMaster
+
+
+class PriceCeilingCache:
+    """Valores de face por categoria, agrupados por evento"""
+
+    def __init__(self, max_events: int, ttl_seconds: int, clock: Callable[[], float] = time.monotonic):
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._events: "OrderedDict[int, tuple]" = OrderedDict()  # event_id -> (carregado_em, {tm_id: face_value})
+        self._event_of: Dict[int, int] = {}  # ticket_master_id -> event_id
+        # Incrementada a cada invalidação: uma carga que começou antes dela não é guardada
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, ticket_master_id: int) -> Optional[float]:
+        event_id = self._event_of.get(ticket_master_id)
+        if event_id is None:
+            return None
+
+        loaded_at, face_values = self._events[event_id]
+        if self.clock() - loaded_at >= self.ttl_seconds:
+            self._drop(event_id)
+            return None
+
+        self._events.move_to_end(event_id)
+        return face_values.get(ticket_master_id)
+
+    def _drop(self, event_id: int):
+        _, face_values = self._events.pop(event_id, (None, {}))
+        for ticket_master_id in face_values:
+            self._event_of.pop(ticket_master_id, None)
+
+    def _store(self, event_id: int, face_values: Dict[int, float]):
+        self._drop(event_id)
+        self._events[event_id] = (self.clock(), face_values)
+        for ticket_master_id in face_values:
+            self._event_of[ticket_master_id] = event_id
+
+        while len(self._events) > self.max_events:
+            oldest = next(iter(self._events))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def get_face_value(self, db: Session, ticket_master_id: int) -> Optional[float]:
+        """Valor de face da categoria (None se não existir)"""
+        with self._lock:
+            face_value = self._lookup(ticket_master_id)
+            if face_value is not None:
+                self.hits += 1
+                return face_value
+            self.misses += 1
+            generation = self._generation
+
+        # Carrega todas as categorias do evento em uma consulta
+        event_id = select(EventTicketMaster.event_id)\
+            .where(EventTicketMaster.id == ticket_master_id)\
+            .scalar_subquery()
+        rows = db.execute(
+            select(EventTicketMaster.id, EventTicketMaster.event_id, EventTicketMaster.face_value)
+            .where(EventTicketMaster.event_id == event_id)
+        ).all()
+        if not rows:
+            return None
+
+        with self._lock:
+            # Uma categoria mudou (e foi commitada) durante a consulta: o valor lido pode ser o antigo
+            if self._generation == generation:
+                self._store(rows[0].event_id, {row.id: row.face_value for row in rows})
+        return next(row.face_value for row in rows if row.id == ticket_master_id)
+
+    def invalidate_event(self, event_id: int):
+        """Descarta as categorias em cache de um evento"""
+        with self._lock:
+            self._generation += 1
+            if event_id in self._events:
+                self._drop(event_id)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._events.clear()
+            self._event_of.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "events": len(self._events),
+                "ticket_masters": len(self._event_of),
+                "max_events": self.max_events,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+price_cache = PriceCeilingCache(settings.price_cache_max_events, settings.price_cache_ttl)
+
+
+# ==================== INVALIDAÇÃO ====================
+# As alterações são anotadas na sessão e aplicadas só após o commit, para que
+# nenhuma leitura concorrente recarregue o valor antigo ainda não commitado.
+
+_PENDING_KEY = "price_cache_events"
+
+
+def _mark_changed(mapper, connection, target: EventTicketMaster):
+    session = Session.object_session(target)
+    if session is None:
+        return
+
+    pending: Set[int] = session.info.setdefault(_PENDING_KEY, set())
+    pending.add(target.event_id)
+    pending.update(inspect(target).attrs.event_id.history.deleted or ())
+
+
+for _operation in ("after_insert", "after_update", "after_delete"):
+    event.listen(EventTicketMaster, _operation, _mark_changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session):
+    for event_id in session.info.pop(_PENDING_KEY, ()):
+        price_cache.invalidate_event(event_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
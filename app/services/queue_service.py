@@ -0,0 +1,287 @@
+"""
+Sala de espera (fila virtual) para vendas de eventos concorridos
+
+Cada evento com sala aberta tem uma fila FIFO de tickets numerados. A admissão
+segue um leaky bucket: `admit_rate` compradores por segundo avançam da fila, e
+só quem foi admitido pode criar pedido (com um token que expira).
+
+O estado fica em um store com subconjunto da API do Redis (get/set/incr/delete),
+então o mesmo código roda com o store em processo ou com um Redis compartilhado
+entre workers.
+
+Cada abertura da sala tem um id próprio: a numeração da fila e os tickets são
+dessa abertura, e tickets de uma abertura anterior não valem depois de reabrir.
+O uso do token é uma única chave por ticket (`:claim`): SET NX enquanto o pedido
+é criado e "used" depois dele, sem apagar, então nenhum segundo pedido consegue
+a chave mesmo tendo lido o ticket antes do primeiro terminar.
+"""
+
+import json
+import math
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+from app.schemas.schemas import QueueStatus
+
+
+# ==================== STORES ====================
+
+class InMemoryStore:
+    """Store em processo com a mesma interface usada do cliente Redis.
+
+    Serve de backend local e de substituto do Redis em desenvolvimento."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data: Dict[str, str] = {}
+        self._expires: Dict[str, float] = {}
+
+    def _expired(self, name: str) -> bool:
+        expires_at = self._expires.get(name)
+        if expires_at is not None and expires_at <= self._clock():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+            return True
+        return False
+
+    def get(self, name: str) -> Optional[str]:
+        with self._lock:
+            if self._expired(name):
+                return None
+            return self._data.get(name)
+
+    def set(self, name: str, value: Any, nx: bool = False, px: Optional[int] = None) -> bool:
+        with self._lock:
+            self._expired(name)
+            if nx and name in self._data:
+                return False
+            self._data[name] = str(value)
+            if px is not None:
+                self._expires[name] = self._clock() + px / 1000
+            else:
+                self._expires.pop(name, None)
+            return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            self._expired(name)
+            value = int(self._data.get(name, 0)) + amount
+            self._data[name] = str(value)
+            return value
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            removed = 0
+            for name in names:
+                removed += self._data.pop(name, None) is not None
+                self._expires.pop(name, None)
+            return removed
+
+
+def create_store():
+    """Cria o store configurado em QUEUE_BACKEND (memory ou redis)"""
+    if settings.queue_backend == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("QUEUE_BACKEND=redis requer o pacote redis instalado") from e
+        return redis.Redis.from_url(settings.redis_url, decode_responses=True)
+
+    return InMemoryStore()
+
+
+# ==================== WAITING ROOM ====================
+
+class WaitingRoom:
+    """Fila FIFO por evento com taxa de admissão configurável"""
+
+    LOCK_TTL_MS = 1000
+    CLAIM_TTL_MS = 30000  # Pedido em andamento com o token
+    TICKET_TTL_MS = 6 * 60 * 60 * 1000  # Tickets somem do store após 6h
+    CLAIM_USED = "used"
+
+    def __init__(self, store, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.clock = clock
+
+    # Chaves no store
+    @staticmethod
+    def _room_key(event_id: int) -> str:
+        return f"wr:room:{event_id}"
+
+    @classmethod
+    def _seq_key(cls, event_id: int, opening: str) -> str:
+        return f"{cls._room_key(event_id)}:{opening}:seq"
+
+    @staticmethod
+    def _ticket_key(token: str) -> str:
+        return f"wr:ticket:{token}"
+
+    @classmethod
+    def _claim_key(cls, token: str) -> str:
+        return f"{cls._ticket_key(token)}:claim"
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.store.get(key)
+        return json.loads(raw) if raw else None
+
+    def _save(self, key: str, data: Dict[str, Any], px: Optional[int] = None):
+        self.store.set(key, json.dumps(data), px=px)
+
+    # ----- Configuração (admin) -----
+
+    def open_room(self, event_id: int, admit_rate: float, token_ttl: int) -> Dict[str, Any]:
+        """Abre (ou reconfigura) a sala de espera de um evento"""
+        if admit_rate <= 0 or token_ttl <= 0:
+            raise ValueError("Taxa de admissão e validade do token devem ser positivas")
+
+        key = self._room_key(event_id)
+        room = self._load(key) or {"opening": secrets.token_hex(8), "admitted": 0.0, "advanced_at": self.clock()}
+        room.update({"event_id": event_id, "admit_rate": admit_rate, "token_ttl": token_ttl})
+        self._save(key, room)
+        return room
+
+    def close_room(self, event_id: int) -> bool:
+        """Fecha a sala de espera (pedidos voltam a ser livres)"""
+        key = self._room_key(event_id)
+        room = self._load(key)
+        if room is None:
+            return False
+        return self.store.delete(key, self._seq_key(event_id, room["opening"]), f"{key}:lock") > 0
+
+    def get_room(self, event_id: int) -> Optional[Dict[str, Any]]:
+        """Configuração e progresso da sala (None se fechada)"""
+        return self._load(self._room_key(event_id))
+
+    # ----- Fila -----
+
+    def _advance(self, event_id: int) -> Optional[Dict[str, Any]]:
+        """Avança a fila conforme o tempo decorrido (leaky bucket)"""
+        key = self._room_key(event_id)
+
+        # Apenas um worker avança por vez; os demais leem o último estado
+        if not self.store.set(f"{key}:lock", "1", nx=True, px=self.LOCK_TTL_MS):
+            return self._load(key)
+
+        try:
+            room = self._load(key)
+            if room is None:
+                return None
+
+            now = self.clock()
+            last_sequence = int(self.store.get(self._seq_key(event_id, room["opening"])) or 0)
+            budget = room["admitted"] + (now - room["advanced_at"]) * room["admit_rate"]
+
+            # Fila vazia não acumula crédito (evita rajadas depois de períodos ociosos)
+            room["admitted"] = min(float(last_sequence), budget)
+            room["advanced_at"] = now
+            self._save(key, room)
+            return room
+        finally:
+            self.store.delete(f"{key}:lock")
+
+    def join(self, event_id: int, user_id: int) -> Dict[str, Any]:
+        """Entra na fila e recebe um token de posição"""
+        room = self.get_room(event_id)
+        if room is None:
+            raise ValueError("Este evento não possui sala de espera aberta")
+
+        sequence = self.store.incr(self._seq_key(event_id, room["opening"]))
+        token = secrets.token_urlsafe(16)
+        ticket = {
+            "token": token,
+            "event_id": event_id,
+            "opening": room["opening"],
+            "user_id": user_id,
+            "sequence": sequence,
+            "admitted_at": None
+        }
+        self._save(self._ticket_key(token), ticket, px=self.TICKET_TTL_MS)
+        return self.status(token)
+
+    def status(self, token: str) -> Optional[Dict[str, Any]]:
+        """Posição na fila, estado e validade do token"""
+        ticket = self._load(self._ticket_key(token))
+        if ticket is None:
+            return None
+
+        room = self._advance(ticket["event_id"])
+        result = {
+            "token": token,
+            "event_id": ticket["event_id"],
+            "user_id": ticket["user_id"],
+            "position": 0,
+            "estimated_wait_seconds": 0.0,
+            "expires_at": None
+        }
+
+        if self.store.get(self._claim_key(token)) == self.CLAIM_USED:
+            result["status"] = QueueStatus.USED
+            return result
+
+        # Sala fechada: ninguém precisa mais de admissão
+        if room is None:
+            result["status"] = QueueStatus.ADMITTED
+            return result
+
+        # Ticket de uma abertura anterior da sala: a numeração recomeçou
+        if ticket.get("opening") != room["opening"]:
+            result["status"] = QueueStatus.EXPIRED
+            return result
+
+        ahead = ticket["sequence"] - math.floor(room["admitted"])
+        if ahead > 0:
+            result["status"] = QueueStatus.WAITING
+            result["position"] = ahead
+            result["estimated_wait_seconds"] = round(ahead / room["admit_rate"], 1)
+            return result
+
+        # A validade conta a partir da primeira vez que a admissão é observada
+        if ticket["admitted_at"] is None:
+            ticket["admitted_at"] = self.clock()
+            self._save(self._ticket_key(token), ticket, px=self.TICKET_TTL_MS)
+
+        expires_at = ticket["admitted_at"] + room["token_ttl"]
+        result["expires_at"] = expires_at
+        result["status"] = QueueStatus.ADMITTED if self.clock() < expires_at else QueueStatus.EXPIRED
+        return result
+
+    # ----- Gate de pedidos -----
+
+    def requires_admission(self, event_id: int) -> bool:
+        """Indica se pedidos do evento passam pela sala de espera"""
+        return self.store.get(self._room_key(event_id)) is not None
+
+    def claim(self, event_id: int, user_id: int, token: Optional[str]):
+        """Valida o token de admissão e o reserva para um pedido"""
+        if not token:
+            raise PermissionError("Evento com sala de espera: entre na fila para comprar")
+
+        ticket_status = self.status(token)
+        if ticket_status is None or ticket_status["event_id"] != event_id or ticket_status["user_id"] != user_id:
+            raise PermissionError("Token de admissão inválido")
+
+        if ticket_status["status"] == QueueStatus.WAITING:
+            raise PermissionError(f"Aguarde sua vez na fila (posição {ticket_status['position']})")
+
+        if ticket_status["status"] != QueueStatus.ADMITTED:
+            raise PermissionError("Token de admissão expirado ou já utilizado")
+
+        # Check-and-set atômico: falha se outro pedido está em andamento ou já usou o token
+        if not self.store.set(self._claim_key(token), "claimed", nx=True, px=self.CLAIM_TTL_MS):
+            raise PermissionError("Token de admissão já utilizado ou em uso")
+
+    def release(self, token: str, used: bool):
+        """Finaliza a reserva do token: "used" fica na chave se o pedido foi criado, senão ela é liberada"""
+        key = self._claim_key(token)
+        if used:
+            self.store.set(key, self.CLAIM_USED, px=self.TICKET_TTL_MS)
+        else:
+            self.store.delete(key)
+
+
+waiting_room = WaitingRoom(create_store())
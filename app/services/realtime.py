@@ -0,0 +1,186 @@
+"""
+Entrega do chat em tempo real via WebSocket
+
+Cada worker mantém um hub com as conexões abertas por sala. Os services
+publicam eventos (nova mensagem, confirmação de leitura) no broker; o broker
+entrega a todos os hubs inscritos e cada hub repassa só para as conexões da
+sala naquele worker. O LocalBroker atende um único processo; com vários
+workers, CHAT_BROKER=redis usa o pub/sub do Redis.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+from starlette.websockets import WebSocketDisconnect
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "chat:room:"
+
+
+# ==================== BROKERS ====================
+
+class LocalBroker:
+    """Broker em processo: entrega direto aos assinantes do próprio worker"""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[str, str], None]] = []
+
+    def subscribe(self, handler: Callable[[str, str], None]):
+        self._subscribers.append(handler)
+
+    def publish(self, channel: str, payload: str):
+        for handler in self._subscribers:
+            handler(channel, payload)
+
+    def close(self):
+        pass
+
+
+class RedisBroker:
+    """Broker sobre o pub/sub do Redis (entrega a todos os workers)"""
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._pubsub = None
+        self._thread = None
+
+    def subscribe(self, handler: Callable[[str, str], None]):
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.psubscribe(**{f"{CHANNEL_PREFIX}*": lambda m: handler(m["channel"], m["data"])})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.01, daemon=True)
+
+    def publish(self, channel: str, payload: str):
+        self._client.publish(channel, payload)
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+def create_broker():
+    """Cria o broker configurado em CHAT_BROKER (memory ou redis)"""
+    if settings.chat_broker == "redis":
+        try:
+            import redis  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("CHAT_BROKER=redis requer o pacote redis instalado") from e
+        return RedisBroker(settings.redis_url)
+
+    return LocalBroker()
+
+
+# ==================== HUB ====================
+
+class ChatHub:
+    """Conexões WebSocket abertas neste worker, agrupadas por sala"""
+
+    def __init__(self, broker, send_queue_size: int):
+        self.broker = broker
+        self.send_queue_size = send_queue_size
+        self._rooms: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped_slow = 0
+        broker.subscribe(self._on_broker_message)
+
+    def publish(self, chat_room_id: int, event: Dict[str, Any]):
+        """Publica evento para os participantes conectados (chamado de qualquer thread)"""
+        self.published += 1
+        self.broker.publish(f"{CHANNEL_PREFIX}{chat_room_id}", json.dumps(event, default=str))
+
+    def _on_broker_message(self, channel: str, payload: str):
+        chat_room_id = int(channel[len(CHANNEL_PREFIX):])
+        loop = self._loop
+        # Sala sem conexões neste worker: nem acorda o event loop
+        if loop is None or loop.is_closed() or chat_room_id not in self._rooms:
+            return
+        loop.call_soon_threadsafe(self._fan_out, chat_room_id, payload)
+
+    def _fan_out(self, chat_room_id: int, payload: str):
+        for queue in list(self._rooms.get(chat_room_id, ())):
+            # Cliente que não consome a tempo é desconectado (volta a sincronizar via GET)
+            if queue.qsize() >= self.send_queue_size:
+                self._rooms[chat_room_id].discard(queue)
+                queue.put_nowait(None)
+                self.dropped_slow += 1
+                continue
+            queue.put_nowait(payload)
+            self.delivered += 1
+
+    async def serve(
+        self,
+        websocket: WebSocket,
+        chat_room_id: int,
+        on_receive: Callable[[Dict[str, Any]], Awaitable[None]]
+    ):
+        """Mantém a conexão: envia os eventos da sala e repassa o que o cliente mandar"""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._rooms.setdefault(chat_room_id, set()).add(queue)
+        self.connections += 1
+        receiver = asyncio.create_task(self._receive(websocket, queue, on_receive))
+
+        try:
+            while True:
+                payload = await queue.get()
+                if payload is None:
+                    break
+                await websocket.send_text(payload)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            receiver.cancel()
+            self.connections -= 1
+            room = self._rooms.get(chat_room_id)
+            if room is not None:
+                room.discard(queue)
+                if not room:
+                    del self._rooms[chat_room_id]
+
+    async def _receive(
+        self,
+        websocket: WebSocket,
+        queue: asyncio.Queue,
+        on_receive: Callable[[Dict[str, Any]], Awaitable[None]]
+    ):
+        try:
+            while True:
+                try:
+                    data = json.loads(await websocket.receive_text())
+                except ValueError:
+                    continue
+                if isinstance(data, dict):
+                    await on_receive(data)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        except Exception:
+            logger.exception("Erro ao processar evento do WebSocket")
+        finally:
+            queue.put_nowait(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "rooms": len(self._rooms),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_slow": self.dropped_slow
+        }
+
+    def close(self):
+        self.broker.close()
+
+
+chat_hub = ChatHub(create_broker(), settings.chat_send_queue_size)
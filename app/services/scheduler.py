@@ -0,0 +1,133 @@
+"""
+Agendador simples de jobs periódicos em background
+
+Cada job roda em uma thread daemon própria, com sessão de banco nova a cada
+execução, e guarda métricas da última execução para consulta pelo admin.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.models import JobCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Executa `func(db)` a cada `interval` segundos"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[Session], Dict[str, Any]]):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.runs = 0
+        self.failures = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.totals: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """Executa o job imediatamente (também usado pelo loop)"""
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        start = time.perf_counter()
+        try:
+            result = self.func(db) or {}
+        except Exception:
+            db.rollback()
+            self.failures += 1
+            logger.exception("Job %s falhou", self.name)
+            return None
+        finally:
+            db.close()
+
+        self.runs += 1
+        self.last_run_at = datetime.utcnow()
+        self.last_duration = time.perf_counter() - start
+        self.last_result = result
+        for key, value in result.items():
+            if isinstance(value, int) and not isinstance(value, bool):
+                self.totals[key] = self.totals.get(key, 0) + value
+        logger.info("Job %s: %s (%.3fs)", self.name, result, self.last_duration)
+        return result
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_duration_seconds": self.last_duration,
+            "last_result": self.last_result,
+            "totals": self.totals
+        }
+
+
+# ==================== CHECKPOINTS ====================
+
+def get_checkpoint(db: Session, name: str) -> int:
+    """Último ID processado por um job em lote"""
+    checkpoint = db.get(JobCheckpoint, name)
+    return checkpoint.last_id if checkpoint else 0
+
+
+def set_checkpoint(db: Session, name: str, last_id: int):
+    """Grava o progresso (sem commit: vai junto com o lote processado)"""
+    checkpoint = db.get(JobCheckpoint, name)
+    if checkpoint is None:
+        db.add(JobCheckpoint(name=name, last_id=last_id))
+    else:
+        checkpoint.last_id = last_id
+
+
+# ==================== REGISTRO ====================
+
+JOBS: Dict[str, PeriodicJob] = {}
+
+
+def register_job(job: PeriodicJob) -> PeriodicJob:
+    """Registra job para iniciar junto com a aplicação"""
+    JOBS[job.name] = job
+    return job
+
+
+def start_all():
+    for job in JOBS.values():
+        job.start()
+
+
+def stop_all():
+    for job in JOBS.values():
+        job.stop()
+
+
+def get_metrics() -> List[Dict[str, Any]]:
+    return [job.metrics() for job in JOBS.values()]
@@ -1,8 +1,27 @@
 from sqlalchemy.orm import Session
-from app.models.models import SystemLog, Dispute, DisputeStatus
+from sqlalchemy import delete, select
+from app.models.models import SystemLog, LogCategory, Dispute, DisputeStatus
 from app.schemas.schemas import SystemLogCreate, DisputeCreate, DisputeUpdate
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+from app.services.pagination import paginate
+from app.services.audit_log import audit_writer, encode_record, decode_record, json_default
+from app.config import settings
+from typing import Optional, List, Dict, Any, Iterator
+from datetime import datetime, timedelta
+from itertools import groupby
+import gzip
+import json
+import os
+
+
+LOG_ARCHIVE_JOB = "log-archive"
+
+# Dias que cada categoria fica em system_logs antes de ir para os arquivos mensais
+LOG_RETENTION_DAYS = {
+    LogCategory.GENERAL: settings.log_retention_days,
+    LogCategory.SUSPICIOUS_MESSAGE: settings.log_retention_days_security,
+    LogCategory.DISPUTE: settings.log_retention_days_security,
+    LogCategory.MODERATION: settings.log_retention_days_security,
+}
 
 
 # ==================== SYSTEM LOGS ====================
@@ -12,16 +31,16 @@ def create_log(
     action: str,
     user_id: Optional[int] = None,
     ip_address: Optional[str] = None,
-    metadata: Optional[Dict[str, Any]] = None
-) -> SystemLog:
-    """Cria log de auditoria"""
-    db_log = SystemLog(
-        user_id=user_id,
-        action=action,
-        ip_address=ip_address,
-        log_metadata=metadata
-    )
+    metadata: Optional[Dict[str, Any]] = None,
+    category: LogCategory = LogCategory.GENERAL
+) -> Optional[SystemLog]:
+    """Cria log de auditoria (em lote pelo audit_writer; parado, grava na sessão do chamador)"""
+    line = encode_record(action, user_id=user_id, ip_address=ip_address, metadata=metadata, category=category)
+    if audit_writer.running:
+        audit_writer.write(line)
+        return None
     
+    db_log = SystemLog(**decode_record(line))
     db.add(db_log)
     db.commit()
     db.refresh(db_log)
@@ -31,27 +50,119 @@ def create_log(
 def get_logs(
     db: Session,
     user_id: Optional[int] = None,
+    category: Optional[LogCategory] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[SystemLog]:
-    """Lista logs com filtro opcional por usuário"""
+    """Lista logs com filtro opcional por usuário e categoria"""
     query = db.query(SystemLog)
     
     if user_id:
         query = query.filter(SystemLog.user_id == user_id)
     
-    return query.order_by(SystemLog.created_at.desc()).offset(skip).limit(limit).all()
+    if category:
+        query = query.filter(SystemLog.category == category)
+    
+    return paginate(query, SystemLog.created_at, SystemLog.id, skip=skip, limit=limit, cursor=cursor).all()
 
 
 def get_recent_suspicious_activities(db: Session, limit: int = 50) -> List[SystemLog]:
     """Lista atividades suspeitas recentes"""
     return db.query(SystemLog)\
-        .filter(SystemLog.action.ilike('%suspeita%'))\
-        .order_by(SystemLog.created_at.desc())\
+        .filter(SystemLog.category == LogCategory.SUSPICIOUS_MESSAGE)\
+        .order_by(SystemLog.created_at.desc(), SystemLog.id.desc())\
         .limit(limit)\
         .all()
 
 
+def archive_old_logs(
+    db: Session,
+    archive_dir: str,
+    retention_days: Optional[Dict[LogCategory, int]] = None,
+    chunk_size: int = 5000
+) -> Dict[str, Any]:
+    """Move para arquivos mensais (system_logs-AAAA-MM.jsonl.gz) os logs além da retenção da categoria.
+    
+    Os arquivos só recebem novos blocos gzip no fim; o lote só é apagado do banco
+    depois de gravado em disco (uma queda no meio repete o lote no arquivo)."""
+    retention_days = retention_days or LOG_RETENTION_DAYS
+    os.makedirs(archive_dir, exist_ok=True)
+    now = datetime.utcnow()
+    archived = 0
+    months = set()
+    
+    for category, days in retention_days.items():
+        cutoff = now - timedelta(days=days)
+        while True:
+            rows = db.execute(
+                select(SystemLog.__table__)
+                .where(SystemLog.category == category, SystemLog.created_at < cutoff)
+                .order_by(SystemLog.created_at, SystemLog.id)
+                .limit(chunk_size)
+            ).mappings().all()
+            if not rows:
+                break
+            
+            for month, month_rows in groupby(rows, key=lambda row: row["created_at"].strftime("%Y-%m")):
+                path = os.path.join(archive_dir, f"system_logs-{month}.jsonl.gz")
+                with open(path, "ab") as raw:
+                    with gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+                        for row in month_rows:
+                            archive.write((json.dumps(dict(row), default=json_default, ensure_ascii=False) + "\n").encode())
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                months.add(month)
+            
+            db.execute(delete(SystemLog).where(SystemLog.id.in_([row["id"] for row in rows])))
+            db.commit()
+            archived += len(rows)
+    
+    return {"logs_archived": archived, "months": len(months)}
+
+
+def log_archive_path(archive_dir: str, month: str) -> str:
+    """Caminho do arquivo mensal de `month` (AAAA-MM)"""
+    try:
+        valid = datetime.strptime(month, "%Y-%m").strftime("%Y-%m") == month
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"Mês inválido: {month} (use AAAA-MM)")
+    return os.path.join(archive_dir, f"system_logs-{month}.jsonl.gz")
+
+
+def list_log_archives(archive_dir: str) -> List[Dict[str, Any]]:
+    """Arquivos mensais disponíveis, do mais antigo ao mais recente"""
+    if not os.path.isdir(archive_dir):
+        return []
+    archives = []
+    for name in sorted(os.listdir(archive_dir)):
+        if name.startswith("system_logs-") and name.endswith(".jsonl.gz"):
+            archives.append({
+                "month": name[len("system_logs-"):-len(".jsonl.gz")],
+                "size_bytes": os.path.getsize(os.path.join(archive_dir, name))
+            })
+    return archives
+
+
+def read_archived_logs(
+    archive_dir: str,
+    month: str,
+    category: Optional[LogCategory] = None,
+    user_id: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """Lê um arquivo mensal de volta como parâmetros do INSERT em system_logs (ver decode_record)"""
+    with gzip.open(log_archive_path(archive_dir, month), "rt", encoding="utf-8") as archive:
+        for line in archive:
+            record = decode_record(line)
+            if category and record["category"] != category:
+                continue
+            if user_id and record["user_id"] != user_id:
+                continue
+            yield record
+
+
 # ==================== DISPUTES ====================
 
 def create_dispute(db: Session, reporter_id: int, dispute: DisputeCreate) -> Dispute:
@@ -75,6 +186,7 @@ def create_dispute(db: Session, reporter_id: int, dispute: DisputeCreate) -> Dis
     # Cria log
     create_log(
         db,
+        category=LogCategory.DISPUTE,
         action=f"Disputa criada contra usuário {dispute.reported_user_id}",
         user_id=reporter_id,
         metadata={"dispute_id": db_dispute.id, "reason": dispute.reason}
@@ -101,7 +213,8 @@ def get_disputes(
     status: Optional[DisputeStatus] = None,
     reported_user_id: Optional[int] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Dispute]:
     """Lista disputas com filtros"""
     query = db.query(Dispute)
@@ -112,12 +225,17 @@ def get_disputes(
     if reported_user_id:
         query = query.filter(Dispute.reported_user_id == reported_user_id)
     
-    return query.order_by(Dispute.created_at.desc()).offset(skip).limit(limit).all()
+    return paginate(query, Dispute.created_at, Dispute.id, skip=skip, limit=limit, cursor=cursor).all()
 
 
-def get_open_disputes(db: Session, skip: int = 0, limit: int = 100) -> List[Dispute]:
+def get_open_disputes(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> List[Dispute]:
     """Lista disputas abertas"""
-    return get_disputes(db, status=DisputeStatus.OPEN, skip=skip, limit=limit)
+    return get_disputes(db, status=DisputeStatus.OPEN, skip=skip, limit=limit, cursor=cursor)
 
 
 def get_user_disputes(
@@ -125,7 +243,8 @@ def get_user_disputes(
     user_id: int,
     as_reporter: bool = True,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Dispute]:
     """Lista disputas de um usuário"""
     query = db.query(Dispute)
@@ -135,7 +254,7 @@ def get_user_disputes(
     else:
         query = query.filter(Dispute.reported_user_id == user_id)
     
-    return query.order_by(Dispute.created_at.desc()).offset(skip).limit(limit).all()
+    return paginate(query, Dispute.created_at, Dispute.id, skip=skip, limit=limit, cursor=cursor).all()
 
 
 def update_dispute(
@@ -163,6 +282,7 @@ def update_dispute(
     # Cria log
     create_log(
         db,
+        category=LogCategory.DISPUTE,
         action=f"Disputa {dispute_id} atualizada",
         metadata={"dispute_id": dispute_id, "updates": update_data}
     )
@@ -204,6 +324,7 @@ def resolve_dispute(
     # Cria log
     create_log(
         db,
+        category=LogCategory.DISPUTE,
         action=f"Disputa {dispute_id} resolvida",
         metadata={
             "dispute_id": dispute_id,
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.models import User, UserDocument
 from app.schemas.schemas import UserCreate, UserUpdate, UserDocumentCreate
+from app.services.pagination import paginate
 from typing import Optional, List
 import hashlib
 
@@ -40,9 +41,12 @@ def get_user_by_cpf(db: Session, cpf: str) -> Optional[User]:
     return db.query(User).filter(User.cpf == cpf).first()
 
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    """Lista usuários"""
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[User]:
+    """Lista usuários (ordenados por ID)"""
+    return paginate(
+        db.query(User), User.id, User.id,
+        skip=skip, limit=limit, cursor=cursor, descending=False
+    ).all()
 
 
 def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
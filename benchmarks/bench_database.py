@@ -0,0 +1,105 @@
+"""
+Benchmark de throughput de leitura/escrita nas tabelas listings e orders
+Compara o engine padrão (sem PRAGMAs) com o engine configurado (WAL, mmap, pool)
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_database
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.models.models import (
+    Base, User, Event, EventTicketMaster, Listing, ListingStatus,
+    Order, PaymentStatus, EscrowStatus
+)
+from datetime import datetime
+
+THREADS = 16
+OPERATIONS_PER_THREAD = 200
+SEED_LISTINGS = 5000
+
+
+def seed(session_factory):
+    """Popula o banco com usuários, evento e listings"""
+    db = session_factory()
+    seller = User(full_name="Seller", cpf="00000000001", email="s@x.com", password_hash="x")
+    buyer = User(full_name="Buyer", cpf="00000000002", email="b@x.com", password_hash="x")
+    event = Event(title="Bench", venue="Arena", event_date=datetime(2030, 1, 1))
+    db.add_all([seller, buyer, event])
+    db.flush()
+    ticket_master = EventTicketMaster(event_id=event.id, category_name="Pista", face_value=100.0)
+    db.add(ticket_master)
+    db.flush()
+    db.add_all([
+        Listing(seller_id=seller.id, event_ticket_master_id=ticket_master.id, price_asked=100.0 + i % 20)
+        for i in range(SEED_LISTINGS)
+    ])
+    db.commit()
+    ids = (seller.id, buyer.id, ticket_master.id)
+    db.close()
+    return ids
+
+
+def run(label, engine):
+    """Executa leituras e escritas concorrentes e imprime ops/s"""
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seller_id, buyer_id, ticket_master_id = seed(session_factory)
+
+    def reader(_):
+        db = session_factory()
+        try:
+            for i in range(OPERATIONS_PER_THREAD):
+                db.query(Listing).filter(Listing.status == ListingStatus.ACTIVE)\
+                    .order_by(Listing.created_at.desc()).limit(100).all()
+                db.query(Order).filter(Order.buyer_id == buyer_id).limit(100).all()
+        finally:
+            db.close()
+
+    def writer(worker):
+        db = session_factory()
+        try:
+            for i in range(OPERATIONS_PER_THREAD):
+                listing = Listing(seller_id=seller_id, event_ticket_master_id=ticket_master_id, price_asked=110.0)
+                db.add(listing)
+                db.flush()
+                db.add(Order(
+                    buyer_id=buyer_id, listing_id=listing.id, total_amount=115.5, platform_fee=5.5,
+                    payment_status=PaymentStatus.PENDING, escrow_status=EscrowStatus.HELD
+                ))
+                db.commit()
+        finally:
+            db.close()
+
+    for name, fn in (("leitura", reader), ("escrita", writer), ("mista", None)):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            if fn is None:
+                jobs = [reader if w % 2 else writer for w in range(THREADS)]
+                list(pool.map(lambda job: job(0), jobs))
+            else:
+                list(pool.map(fn, range(THREADS)))
+        elapsed = time.perf_counter() - start
+        ops = THREADS * OPERATIONS_PER_THREAD
+        print(f"{label:<12} {name:<8} {ops / elapsed:>10.0f} ops/s  ({elapsed:.2f}s)")
+
+    engine.dispose()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_url = f"sqlite:///{os.path.join(tmp, 'baseline.db')}"
+        tuned_url = f"sqlite:///{os.path.join(tmp, 'tuned.db')}"
+
+        run("antes", create_engine(baseline_url, connect_args={"check_same_thread": False, "timeout": 30}))
+        run("depois", create_db_engine(tuned_url))
+
+
+if __name__ == "__main__":
+    main()
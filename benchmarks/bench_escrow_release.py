@@ -0,0 +1,101 @@
+"""
+Benchmark da liberação automática de escrow em lote
+Popula um backlog de pedidos PAID/HELD vencidos e mede pedidos/s
+
+Simula uma queda no meio da execução (max_chunks) para conferir que a
+retomada pelo checkpoint não reprocessa nem perde pedidos.
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_escrow_release [--orders 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.models.models import (
+    Base, User, Event, EventTicketMaster, Listing, ListingStatus,
+    Order, PaymentStatus, EscrowStatus, Dispute, DisputeStatus
+)
+from app.services import order_service
+
+SELLERS = 5_000
+INSERT_BATCH = 50_000
+
+
+def seed(engine, total_orders):
+    """Insere vendedores, listings vendidos e pedidos pagos há 30 dias"""
+    paid_at = datetime.utcnow() - timedelta(days=30)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"full_name": f"U{i}", "cpf": str(i).zfill(11), "email": f"u{i}@x.com", "password_hash": "x", "reputation_score": 0.0}
+            for i in range(SELLERS + 1)
+        ])
+        conn.execute(insert(Event), [{"title": "Bench", "venue": "Arena", "event_date": datetime(2030, 1, 1), "is_active": True}])
+        conn.execute(insert(EventTicketMaster), [{"event_id": 1, "category_name": "Pista", "face_value": 100.0}])
+
+    buyer_id = SELLERS + 1
+    for start in range(0, total_orders, INSERT_BATCH):
+        ids = range(start + 1, min(start + INSERT_BATCH, total_orders) + 1)
+        with engine.begin() as conn:
+            conn.execute(insert(Listing), [
+                {"id": i, "seller_id": 1 + i % SELLERS, "event_ticket_master_id": 1, "price_asked": 110.0, "status": ListingStatus.SOLD}
+                for i in ids
+            ])
+            conn.execute(insert(Order), [
+                {"id": i, "buyer_id": buyer_id, "listing_id": i, "total_amount": 115.5, "platform_fee": 5.5,
+                 "payment_status": PaymentStatus.PAID, "escrow_status": EscrowStatus.HELD, "completed_at": paid_at}
+                for i in ids
+            ])
+            # 1% dos pedidos com disputa aberta (devem continuar retidos)
+            conn.execute(insert(Dispute), [
+                {"order_id": i, "reporter_id": buyer_id, "reported_user_id": 1 + i % SELLERS, "reason": "x", "status": DisputeStatus.OPEN}
+                for i in ids if i % 100 == 0
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'escrow.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        start = time.perf_counter()
+        seed(engine, args.orders)
+        print(f"backlog de {args.orders} pedidos criado em {time.perf_counter() - start:.1f}s")
+
+        # Primeira execução "cai" depois de 10 blocos
+        db = session_factory()
+        partial = order_service.release_due_escrows(db, release_after_days=7, chunk_size=args.chunk, max_chunks=10)
+        db.close()
+        print(f"execução interrompida: {partial}")
+
+        start = time.perf_counter()
+        db = session_factory()
+        resumed = order_service.release_due_escrows(db, release_after_days=7, chunk_size=args.chunk)
+        elapsed = time.perf_counter() - start
+        print(f"retomada: {resumed}")
+
+        released = db.query(func.count(Order.id)).filter(Order.escrow_status == EscrowStatus.RELEASED_TO_SELLER).scalar()
+        reputation = db.query(func.sum(User.reputation_score)).scalar()
+        db.close()
+        engine.dispose()
+
+    expected = args.orders - args.orders // 100
+    print(f"liberados: {released} (esperado {expected})  reputação somada: {reputation:.0f}")
+    print(f"throughput da retomada: {resumed['orders_released'] / elapsed:.0f} pedidos/s")
+    assert released == expected == reputation
+
+
+if __name__ == "__main__":
+    main()
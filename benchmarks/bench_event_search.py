@@ -0,0 +1,114 @@
+"""
+Benchmark da busca de eventos: ILIKE '%termo%' vs índice full-text (FTS5)
+Popula N eventos e mede a latência mediana de buscas típicas do campo de busca
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_event_search [--events 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import Event
+from app.services import event_service
+
+ARTISTS = ["Coldplay", "Anitta", "Metallica", "Ivete Sangalo", "Gilberto Gil", "Iron Maiden",
+           "Marília Mendonça", "Jorge & Mateus", "Caetano Veloso", "Pitty", "Skank", "Titãs"]
+KINDS = ["Show", "Festival", "Turnê", "Acústico", "Tributo", "Encontro"]
+CITIES = ["São Paulo", "Rio de Janeiro", "Belo Horizonte", "Salvador", "Porto Alegre", "Curitiba",
+          "Goiânia", "Brasília", "Fortaleza", "Recife", "Manaus", "Belém", "Florianópolis", "Vitória",
+          "Natal", "João Pessoa", "Maceió", "Aracaju", "Teresina", "São Luís", "Cuiabá", "Campo Grande",
+          "Londrina", "Maringá", "Campinas", "Santos", "Ribeirão Preto", "Uberlândia", "Joinville", "Niterói"]
+VENUE_KINDS = ["Arena", "Estádio", "Teatro", "Espaço", "Centro de Convenções", "Casa de Shows", "Parque"]
+SYLLABLES = ["ba", "ca", "da", "fe", "gi", "lo", "ma", "no", "pa", "ri", "sa", "ta", "vo", "xe", "zu",
+             "bra", "cle", "dri", "flo", "gru", "pre", "tri", "lu", "mi", "ne", "ro", "su", "te", "vi", "ju"]
+
+# (termo digitado, descrição)
+SEARCHES = [
+    ("sao paulo", "sem acento"),
+    ("São Paulo", "com acento"),
+    ("metal", "prefixo"),
+    ("ivete", "palavra"),
+    ("turne coldplay", "duas palavras"),
+    ("brasilia teatro", "local"),
+    ("xyzabc", "sem resultado"),
+    ("show", "termo amplo"),
+]
+REPEAT = 10
+BATCH = 50_000
+
+
+def word(rng) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def seed(engine, total: int):
+    """Títulos com ~20k atrações distintas (e algumas famosas) em ~1000 locais"""
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1)
+    artists = ARTISTS + [f"{word(rng)} {word(rng)}" for _ in range(20_000)]
+    venues = [f"{rng.choice(VENUE_KINDS)} {word(rng)}, {rng.choice(CITIES)}" for _ in range(1000)]
+    with engine.begin() as conn:
+        for offset in range(0, total, BATCH):
+            conn.execute(insert(Event), [
+                {
+                    "title": f"{rng.choice(KINDS)} {rng.choice(artists)}",
+                    "venue": rng.choice(venues),
+                    "event_date": start + timedelta(minutes=offset + i),
+                    "is_active": rng.random() > 0.1
+                }
+                for i in range(min(BATCH, total - offset))
+            ])
+
+
+def measure(fn):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'search.db')}")
+        run_migrations(engine)
+
+        start = time.perf_counter()
+        seed(engine, args.events)
+        print(f"{args.events} eventos inseridos (com índice FTS5) em {time.perf_counter() - start:.1f}s")
+        db = sessionmaker(bind=engine)()
+
+        def ilike(term):
+            query = db.query(Event).filter(Event.is_active == True).filter(
+                (Event.title.ilike(f"%{term}%")) | (Event.venue.ilike(f"%{term}%"))
+            )
+            return query.order_by(Event.event_date, Event.id).limit(20).all()
+
+        print(f"Primeira página (20 itens), mediana de {REPEAT} execuções")
+        for term, label in SEARCHES:
+            ilike_ms, ilike_rows = measure(lambda: ilike(term))
+            fts_ms, fts_rows = measure(lambda: event_service.get_events(db, limit=20, search=term))
+            print(f"  {term!r:<18} {label:<14} ILIKE: {ilike_ms:8.2f} ms ({len(ilike_rows):>2})"
+                  f"   FTS5: {fts_ms:7.2f} ms ({len(fts_rows):>2})   {ilike_ms / max(fts_ms, 1e-6):6.0f}x")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark da exportação completa de system_logs
+Compara o streaming (NDJSON, CSV e NDJSON+gzip) com o caminho antigo: paginar
+/admin/logs por cursor, instanciando objetos ORM e SystemLogResponse por página
+
+Mede linhas/s de cada exportação; com --memory repete cada uma sob tracemalloc
+(bem mais lento) para medir o pico de memória Python.
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_export [--rows 1000000] [--memory]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import LogCategory, SystemLog, User
+from app.schemas.schemas import SystemLogResponse
+from app.services import export_service, system_service
+from app.services.pagination import encode_cursor
+
+PAGE_SIZE = 100
+USERS = 1_000
+ACTIONS = ["CHAT_MESSAGE_FLAGGED", "DISPUTE_CREATED", "ORDER_CREATED", "USER_LOGIN", "MODERATION_RULESET_ACTIVATED"]
+
+
+def seed(engine, rows: int):
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    categories = list(LogCategory)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "full_name": f"Usuário {i}", "cpf": f"{i:011d}", "email": f"u{i}@x.com", "password_hash": "x"}
+            for i in range(1, USERS + 1)
+        ])
+        for offset in range(0, rows, 50_000):
+            conn.execute(insert(SystemLog), [
+                {
+                    "user_id": rng.randrange(1, USERS + 1),
+                    "category": rng.choice(categories),
+                    "action": rng.choice(ACTIONS),
+                    "ip_address": f"10.0.{rng.randrange(256)}.{rng.randrange(256)}",
+                    "log_metadata": {"order_id": i, "reason": "mensagem com contato externo"},
+                    "created_at": start + timedelta(seconds=i * 3)
+                }
+                for i in range(offset, min(offset + 50_000, rows))
+            ])
+
+
+def paged_export(session_factory) -> int:
+    """Caminho antigo: páginas de /admin/logs serializadas com o schema de resposta"""
+    db = session_factory()
+    exported = 0
+    cursor = None
+    try:
+        while True:
+            logs = system_service.get_logs(db, limit=PAGE_SIZE, cursor=cursor)
+            for log in logs:
+                json.dumps(SystemLogResponse.model_validate(log).model_dump(mode="json"))
+            exported += len(logs)
+            if len(logs) < PAGE_SIZE:
+                return exported
+            cursor = encode_cursor(logs[-1].created_at, logs[-1].id)
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def streamed_export(session_factory, fmt: str, compress: bool) -> int:
+    return sum(len(chunk) for chunk in export_service.stream_export(
+        "logs", fmt, compress=compress, session_factory=session_factory
+    ))
+
+
+def measure(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def peak_memory(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--memory", action="store_true", help="mede o pico de memória (tracemalloc)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'export.db')}")
+        run_migrations(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        start = time.perf_counter()
+        seed(engine, args.rows)
+        print(f"{args.rows} logs criados em {time.perf_counter() - start:.1f}s")
+
+        cases = [
+            (f"paginado (páginas de {PAGE_SIZE}, ORM + Pydantic)", lambda: paged_export(session_factory), "linhas"),
+            ("streaming ndjson", lambda: streamed_export(session_factory, "ndjson", False), "bytes"),
+            ("streaming csv", lambda: streamed_export(session_factory, "csv", False), "bytes"),
+            ("streaming ndjson + gzip", lambda: streamed_export(session_factory, "ndjson", True), "bytes"),
+        ]
+        for label, fn, unit in cases:
+            elapsed, result = measure(fn)
+            size = f"{result / 1024 / 1024:8.1f} MB" if unit == "bytes" else f"{result:8d} linhas"
+            line = f"  {label:<42} {args.rows / elapsed:>9,.0f} linhas/s   {elapsed:6.1f}s   {size}"
+            if args.memory:
+                line += f"   pico {peak_memory(fn) / 1024 / 1024:6.1f} MB"
+            print(line)
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark do cache HTTP dos endpoints de catálogo
+Visitantes percorrem /events/, /events/upcoming, /events/{id}/ticket-masters e
+/listings/active (parte deles revalidando com If-None-Match), com um anúncio
+novo a cada N requisições. Compara o cache desligado (HTTP_CACHE_TTL=0, só
+ETag) com o cache de corpo e reporta req/s, hit ratio, 304 e bytes economizados.
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_http_cache [--requests 5000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine, get_db
+from app.main import app
+from app.migrations import run_migrations
+from app.models.models import User, Event, EventTicketMaster, Listing
+from app.schemas.schemas import ListingCreate
+from app.services import listing_service
+from app.services.http_cache import response_cache
+
+EVENTS = 200
+LISTINGS = 5_000
+REVALIDATING = 0.6  # fração das requisições que trazem o ETag da visita anterior
+
+
+def seed(engine):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "full_name": f"Vendedor {i}", "cpf": f"{i:011d}", "email": f"v{i}@x.com", "password_hash": "x"}
+            for i in range(1, 101)
+        ])
+        conn.execute(insert(Event), [
+            {"title": f"Show {i}", "venue": "Arena", "event_date": now + timedelta(days=i)}
+            for i in range(1, EVENTS + 1)
+        ])
+        conn.execute(insert(EventTicketMaster), [
+            {"event_id": (i % EVENTS) + 1, "category_name": f"Setor {i}", "face_value": 100.0}
+            for i in range(EVENTS * 3)
+        ])
+        conn.execute(insert(Listing), [
+            {"seller_id": rng.randrange(1, 101), "event_ticket_master_id": rng.randrange(1, EVENTS * 3 + 1),
+             "price_asked": round(rng.uniform(60, 120), 2)}
+            for _ in range(LISTINGS)
+        ])
+
+
+def run(client, session_factory, requests: int, write_every: int):
+    rng = random.Random(7)
+    paths = ["/events/", "/events/upcoming", "/listings/active"] + [f"/events/{i}/ticket-masters" for i in range(1, 21)]
+    etags = {}
+    statuses = {200: 0, 304: 0}
+    start = time.perf_counter()
+    for i in range(requests):
+        if write_every and i and i % write_every == 0:
+            db = session_factory()
+            listing_service.create_listing(db, 1, ListingCreate(event_ticket_master_id=1, price_asked=110))
+            db.close()
+        path = rng.choice(paths)
+        headers = {"If-None-Match": etags[path]} if path in etags and rng.random() < REVALIDATING else {}
+        response = client.get(path, headers=headers)
+        statuses[response.status_code] += 1
+        etags[path] = response.headers["etag"]
+    return requests / (time.perf_counter() - start), statuses
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--write-every", type=int, default=100, help="um anúncio novo a cada N requisições (0 = sem escritas)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'http_cache.db')}")
+        run_migrations(engine)
+        seed(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(app)
+        ttl = response_cache.ttl_seconds
+        print(f"{args.requests} requisições, {REVALIDATING:.0%} com If-None-Match, um anúncio novo a cada {args.write_every}")
+        try:
+            for label, cache_ttl in (("sem cache (só ETag)", 0), ("cache de corpo", ttl or 30)):
+                response_cache.clear()
+                response_cache.ttl_seconds = cache_ttl
+                before = response_cache.stats()
+                rate, statuses = run(client, session_factory, args.requests, args.write_every)
+                stats = response_cache.stats()
+                hits = stats["hits"] - before["hits"]
+                misses = stats["misses"] - before["misses"]
+                saved = stats["bytes_saved"] - before["bytes_saved"]
+                served = stats["bytes_served"] - before["bytes_served"]
+                print(f"  {label:20s} {rate:8.0f} req/s   hit ratio {hits / max(hits + misses, 1):6.1%}   "
+                      f"304: {statuses[304]:5d}   bytes economizados {saved / 1e6:7.1f} MB de {(saved + served) / 1e6:7.1f} MB")
+        finally:
+            response_cache.ttl_seconds = ttl
+            app.dependency_overrides.pop(get_db, None)
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark do inbox do chat: N+1 (salas + mensagens por sala) vs consulta única
+Um vendedor com 20k salas (5 mensagens cada) abre a lista de conversas
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_inbox
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import (
+    User, Event, EventTicketMaster, Listing, ListingStatus,
+    ChatRoom, ChatStatus, ChatMessage, ChatUnreadCounter
+)
+from app.services import chat_service
+from app.services.pagination import encode_cursor
+
+ROOMS = 20_000
+MESSAGES_PER_ROOM = 5
+PAGE_SIZE = 50
+DEEP_PAGE = 100
+REPEAT = 20
+SELLER_ID = 1
+
+
+def seed(engine):
+    """Vendedor 1, um comprador por sala e atividade espalhada em 90 dias"""
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    rooms, messages, counters = [], [], []
+    message_id = 0
+    for room_id in range(1, ROOMS + 1):
+        buyer_id = room_id + 1
+        created_at = start + timedelta(seconds=rng.randrange(90 * 86400))
+        sent_at = created_at
+        unread = 0
+        for _ in range(MESSAGES_PER_ROOM):
+            message_id += 1
+            sent_at += timedelta(minutes=rng.randrange(1, 600))
+            sender_id = rng.choice((buyer_id, SELLER_ID))
+            is_read = rng.random() < 0.7
+            unread += sender_id == buyer_id and not is_read
+            messages.append({
+                "id": message_id, "chat_room_id": room_id, "sender_id": sender_id,
+                "message_text": f"mensagem {message_id}", "is_read": is_read, "sent_at": sent_at
+            })
+        rooms.append({
+            "id": room_id, "listing_id": 1, "buyer_id": buyer_id, "seller_id": SELLER_ID,
+            "status": ChatStatus.OPEN, "created_at": created_at,
+            "last_message_id": message_id, "last_activity_at": sent_at
+        })
+        counters.append({"chat_room_id": room_id, "user_id": SELLER_ID, "unread_count": unread})
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "full_name": f"Usuário {i}", "cpf": f"{i:011d}", "email": f"u{i}@x.com", "password_hash": "x"}
+            for i in range(1, ROOMS + 2)
+        ])
+        conn.execute(insert(Event), [{"title": "Show", "venue": "Arena", "event_date": datetime(2030, 1, 1), "is_active": True}])
+        conn.execute(insert(EventTicketMaster), [{"event_id": 1, "category_name": "Pista", "face_value": 100.0}])
+        conn.execute(insert(Listing), [{"seller_id": SELLER_ID, "event_ticket_master_id": 1, "price_asked": 110.0, "status": ListingStatus.ACTIVE}])
+        conn.execute(insert(ChatRoom), rooms)
+        conn.execute(insert(ChatMessage), messages)
+        conn.execute(insert(ChatUnreadCounter), counters)
+
+
+def n_plus_one(db, cursor=None):
+    """Fluxo antigo da tela: lista as salas e busca as mensagens de cada uma"""
+    rooms = chat_service.get_user_chat_rooms(db, SELLER_ID, limit=PAGE_SIZE, cursor=cursor)
+    return [(room, chat_service.get_chat_messages(db, room.id)[-1]) for room in rooms]
+
+
+def measure(fn):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, rows
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'inbox.db')}")
+        run_migrations(engine)
+        seed(engine)
+        db = sessionmaker(bind=engine)()
+
+        # Cursores equivalentes ao início da página DEEP_PAGE em cada ordenação
+        skip = (DEEP_PAGE - 1) * PAGE_SIZE
+        previous = chat_service.get_user_chat_rooms(db, SELLER_ID, skip=skip - 1, limit=1)[0]
+        rooms_cursor = encode_cursor(previous.created_at, previous.id)
+        previous = chat_service.get_inbox(db, SELLER_ID, limit=skip)[-1]
+        inbox_cursor = encode_cursor(previous.last_activity_at, previous.id)
+
+        print(f"{ROOMS} salas do vendedor, {ROOMS * MESSAGES_PER_ROOM} mensagens, "
+              f"página de {PAGE_SIZE}, mediana de {REPEAT} execuções")
+        cases = [
+            ("primeira página", None, None),
+            (f"página {DEEP_PAGE}", rooms_cursor, inbox_cursor),
+        ]
+        for label, old_cursor, new_cursor in cases:
+            old_ms, old_rows = measure(lambda: n_plus_one(db, old_cursor))
+            db.expunge_all()
+            new_ms, new_rows = measure(lambda: chat_service.get_inbox(db, SELLER_ID, limit=PAGE_SIZE, cursor=new_cursor))
+            assert len(old_rows) == len(new_rows) == PAGE_SIZE
+            print(f"  {label:<16} N+1 ({PAGE_SIZE + 1} consultas): {old_ms:7.2f} ms   "
+                  f"inbox (1 consulta): {new_ms:6.2f} ms   ({old_ms / new_ms:.0f}x)")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark do resumo de estoque por evento (página do evento)
+Compara agregar no banco a cada requisição com o resumo mantido em memória,
+e mede o custo de aplicar uma transição (delta) durante um pico de vendas
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_inventory [--listings 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import User, Event, EventTicketMaster, Listing, ListingStatus
+from app.services.inventory_cache import InventoryCache
+
+SELLERS = 1_000
+CATEGORIES = ("Pista", "Pista Premium", "Cadeira", "Camarote")
+REPEAT = 200
+
+
+def seed(engine, listings: int):
+    rng = random.Random(42)
+    statuses = [ListingStatus.ACTIVE] * 7 + [ListingStatus.RESERVED, ListingStatus.SOLD, ListingStatus.CANCELLED]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "full_name": f"Vendedor {i}", "cpf": f"{i:011d}", "email": f"v{i}@x.com", "password_hash": "x"}
+            for i in range(1, SELLERS + 1)
+        ])
+        conn.execute(insert(Event), [{"title": "Mega show", "venue": "Estádio", "event_date": datetime(2030, 1, 1)}])
+        conn.execute(insert(EventTicketMaster), [
+            {"event_id": 1, "category_name": name, "face_value": 100.0} for name in CATEGORIES
+        ])
+        for offset in range(0, listings, 50_000):
+            conn.execute(insert(Listing), [
+                {
+                    "seller_id": rng.randrange(1, SELLERS + 1),
+                    "event_ticket_master_id": rng.randrange(1, len(CATEGORIES) + 1),
+                    "price_asked": round(rng.uniform(60, 120), 2),
+                    "status": rng.choice(statuses)
+                }
+                for _ in range(offset, min(offset + 50_000, listings))
+            ])
+
+
+def aggregate_in_db(db):
+    """Sem cache: contagem, mínimo e máximo por categoria a cada requisição (sem mediana)"""
+    return db.query(
+        Listing.event_ticket_master_id, Listing.status,
+        func.count(Listing.id), func.min(Listing.price_asked), func.max(Listing.price_asked)
+    )\
+        .join(EventTicketMaster, EventTicketMaster.id == Listing.event_ticket_master_id)\
+        .filter(EventTicketMaster.event_id == 1, Listing.status.in_((ListingStatus.ACTIVE, ListingStatus.RESERVED)))\
+        .group_by(Listing.event_ticket_master_id, Listing.status)\
+        .all()
+
+
+def measure(fn, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'inventory.db')}")
+        run_migrations(engine)
+        seed(engine, args.listings)
+        db = sessionmaker(bind=engine)()
+        cache = InventoryCache(max_events=10)
+
+        start = time.perf_counter()
+        summary = cache.get_summary(db, 1)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"{args.listings} anúncios, {summary['active_count']} ACTIVE e {summary['reserved_count']} RESERVED "
+              f"em {len(CATEGORIES)} categorias")
+
+        db_ms = measure(lambda: aggregate_in_db(db), repeat=5)
+        cached_ms = measure(lambda: cache.get_summary(db, 1))
+
+        # Pico de vendas: reserva e liberação alternadas de anúncios ACTIVE
+        rng = random.Random(1)
+        deltas = []
+        for _ in range(REPEAT):
+            ticket_master_id = rng.randrange(1, len(CATEGORIES) + 1)
+            price = cache._events[1].categories[ticket_master_id].prices[rng.randrange(1000)]
+            deltas.append([(ticket_master_id, ListingStatus.ACTIVE, price, -1), (ticket_master_id, ListingStatus.RESERVED, price, 1)])
+            deltas.append([(ticket_master_id, ListingStatus.RESERVED, price, -1), (ticket_master_id, ListingStatus.ACTIVE, price, 1)])
+        start = time.perf_counter()
+        for delta in deltas:
+            cache.apply(delta)
+        delta_us = (time.perf_counter() - start) / len(deltas) * 1_000_000
+        assert cache.get_summary(db, 1) == summary
+
+        print(f"  agregação no banco por requisição: {db_ms:8.2f} ms")
+        print(f"  carga inicial do cache:            {load_ms:8.2f} ms")
+        print(f"  resumo em memória:                 {cached_ms:8.3f} ms  ({db_ms / cached_ms:,.0f}x)")
+        print(f"  aplicar uma transição (delta):     {delta_us:8.1f} µs")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
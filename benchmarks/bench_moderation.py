@@ -0,0 +1,108 @@
+"""
+Microbenchmark da moderação de chat: laço de substrings (implementação anterior)
+vs autômato Aho-Corasick, com 5k palavras suspeitas e 1M mensagens
+
+A implementação anterior é medida em uma amostra (--legacy-sample) e projetada
+para o total, pois com 5k palavras ela levaria minutos.
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_moderation [--keywords 5000] [--messages 1000000]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from app.services.chat_service import SUSPICIOUS_KEYWORDS
+from app.services.moderation import ModerationEngine
+
+SYLLABLES = ["ba", "ce", "di", "fo", "gu", "la", "me", "ni", "po", "ru", "sa", "te", "vi", "xo", "zu", "tra", "pre", "cli"]
+WORDS = ["olá", "tudo", "bem", "o", "ingresso", "ainda", "está", "disponível", "posso", "pagar", "amanhã",
+         "qual", "setor", "é", "pista", "obrigado", "show", "vai", "ser", "incrível", "entrego", "na", "hora"]
+SUSPICIOUS = ["me chama no zap", "faz um pix", "11 98765-4321", "meu email é fulano@gmail.com",
+              "chave 123.456.789-00", "vamos fechar por fora do app"]
+
+
+def legacy_detect(message_text: str, keywords) -> tuple:
+    """Implementação anterior de detect_suspicious_content (para comparação)"""
+    message_lower = message_text.lower()
+
+    for keyword in keywords:
+        if keyword in message_lower:
+            return True, f"Palavra suspeita detectada: '{keyword}'"
+
+    phone_pattern = r'\b\d{2,3}[-.\s]?\d{4,5}[-.\s]?\d{4}\b'
+    if re.search(phone_pattern, message_text):
+        return True, "Número de telefone detectado"
+
+    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+    if re.search(email_pattern, message_text):
+        return True, "Email detectado"
+
+    return False, None
+
+
+def build_keywords(total: int, rng: random.Random) -> list:
+    keywords = list(SUSPICIOUS_KEYWORDS)
+    seen = set(keywords)
+    while len(keywords) < total:
+        keyword = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5)))
+        if keyword not in seen:
+            seen.add(keyword)
+            keywords.append(keyword)
+    return keywords
+
+
+def build_messages(rng: random.Random, distinct: int = 10_000) -> list:
+    messages = []
+    for _ in range(distinct):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 14))]
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(SUSPICIOUS))
+        messages.append(" ".join(words).capitalize())
+    return messages
+
+
+def run(fn, messages, total: int) -> tuple:
+    flagged = 0
+    start = time.perf_counter()
+    for i in range(total):
+        flagged += fn(messages[i % len(messages)])[0]
+    return time.perf_counter() - start, flagged
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keywords", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--legacy-sample", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    keywords = build_keywords(args.keywords, rng)
+    messages = build_messages(rng)
+
+    start = time.perf_counter()
+    engine = ModerationEngine(keywords)
+    print(f"{len(keywords)} palavras compiladas em {(time.perf_counter() - start) * 1000:.0f} ms "
+          f"({len(engine.automaton._goto)} estados)")
+
+    # Mesmas mensagens sinalizadas nas duas implementações (chave PIX só existe na nova)
+    for message in messages[:2000]:
+        flagged, reason = engine.check(message)
+        assert legacy_detect(message, keywords)[0] == flagged or reason == "Chave PIX detectada", message
+
+    sample = min(args.legacy_sample, args.messages)
+    legacy_seconds, _ = run(lambda m: legacy_detect(m, keywords), messages, sample)
+    legacy_us = legacy_seconds / sample * 1e6
+    print(f"  anterior     {legacy_us:8.2f} µs/mensagem  "
+          f"(amostra de {sample}; projeção para {args.messages}: {legacy_us * args.messages / 1e6:.0f} s)")
+
+    engine_seconds, flagged = run(engine.check, messages, args.messages)
+    engine_us = engine_seconds / args.messages * 1e6
+    print(f"  aho-corasick {engine_us:8.2f} µs/mensagem  "
+          f"({args.messages} mensagens em {engine_seconds:.1f} s, {flagged} sinalizadas, {legacy_us / engine_us:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark do livro de ofertas por categoria
+Uma categoria de um mega-evento com N anúncios ACTIVE: "ingresso mais barato"
+carregando os anúncios do evento e ordenando em Python vs o índice
+(event_ticket_master_id, status, price_asked, id)
+
+Repete para tamanhos crescentes para mostrar que melhor preço, próximos N e
+profundidade não crescem com a categoria.
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_order_book [--listings 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import User, Event, EventTicketMaster, Listing, ListingStatus
+from app.services import listing_service
+from app.services.pagination import encode_cursor
+
+SELLERS = 1_000
+FACE_VALUE = 100.0
+PAGE_SIZE = 20
+REPEAT = 50
+
+
+def seed(engine, listings: int):
+    """Categoria 1 com `listings` anúncios (80% ACTIVE) e uma categoria vizinha do mesmo evento"""
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1)
+    statuses = [ListingStatus.ACTIVE] * 8 + [ListingStatus.SOLD, ListingStatus.CANCELLED]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "full_name": f"Vendedor {i}", "cpf": f"{i:011d}", "email": f"v{i}@x.com", "password_hash": "x"}
+            for i in range(1, SELLERS + 1)
+        ])
+        conn.execute(insert(Event), [{"title": "Mega show", "venue": "Estádio", "event_date": datetime(2030, 1, 1)}])
+        conn.execute(insert(EventTicketMaster), [
+            {"event_id": 1, "category_name": name, "face_value": FACE_VALUE} for name in ("Pista Premium", "Pista")
+        ])
+        for offset in range(0, listings, 50_000):
+            conn.execute(insert(Listing), [
+                {
+                    "seller_id": rng.randrange(1, SELLERS + 1),
+                    "event_ticket_master_id": 1 + (i % 10 == 0),
+                    "price_asked": round(rng.uniform(60, FACE_VALUE * 1.20), 2),
+                    "status": rng.choice(statuses),
+                    "created_at": start + timedelta(seconds=i)
+                }
+                for i in range(offset, min(offset + 50_000, listings))
+            ])
+
+
+def cheapest_by_scan(db):
+    """Caminho antigo: anúncios ativos do evento (join com a categoria) e ordenação em Python"""
+    listings = listing_service.get_active_listings(db, event_id=1, limit=10_000_000)
+    return min((listing for listing in listings if listing.event_ticket_master_id == 1),
+               key=lambda listing: (listing.price_asked, listing.id))
+
+
+def measure(fn, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    sizes = sorted({min(size, args.listings) for size in (10_000, 100_000, args.listings)})
+    print(f"mediana de {REPEAT} execuções (varredura: 3)")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'book.db')}")
+            run_migrations(engine)
+            seed(engine, size)
+            db = sessionmaker(bind=engine)()
+
+            best = listing_service.get_best_offer(db, 1)
+            assert best.id == cheapest_by_scan(db).id
+            # Cursor no meio do livro: os próximos N a partir da mediana de preço
+            middle = listing_service.get_cheapest_listings(db, 1, limit=size // 4)[-1]
+            cursor = encode_cursor(middle.price_asked, middle.id)
+            db.expunge_all()
+
+            scan_ms = measure(lambda: cheapest_by_scan(db), repeat=3)
+            db.expunge_all()
+            best_ms = measure(lambda: listing_service.get_best_offer(db, 1))
+            next_ms = measure(lambda: listing_service.get_cheapest_listings(db, 1, limit=PAGE_SIZE, cursor=cursor))
+            depth_ms = measure(lambda: listing_service.get_price_depth(db, 1, bucket_size=1.0, levels=10))
+            print(f"  {size:>9} anúncios   varredura + sort: {scan_ms:9.2f} ms   melhor preço: {best_ms:5.2f} ms   "
+                  f"próximos {PAGE_SIZE}: {next_ms:5.2f} ms   profundidade (10 faixas): {depth_ms:5.2f} ms")
+
+            db.close()
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark de paginação: offset (skip/limit) vs cursor (keyset)
+Mede a latência da página 1000 (100 itens por página) em system_logs e listings
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_pagination
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.models.models import Base, User, Event, EventTicketMaster, Listing, ListingStatus, SystemLog
+from app.services import listing_service, system_service
+from app.services.pagination import encode_cursor
+
+ROWS = 200_000
+PAGE_SIZE = 100
+PAGE = 1000
+REPEAT = 20
+
+
+def seed(engine):
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"full_name": "U", "cpf": "00000000001", "email": "u@x.com", "password_hash": "x"}])
+        conn.execute(insert(Event), [{"title": "E", "venue": "V", "event_date": datetime(2030, 1, 1), "is_active": True}])
+        conn.execute(insert(EventTicketMaster), [{"event_id": 1, "category_name": "Pista", "face_value": 100.0}])
+        conn.execute(insert(SystemLog), [
+            {"user_id": 1, "action": f"acao {i}", "created_at": start + timedelta(seconds=i)}
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(Listing), [
+            {"seller_id": 1, "event_ticket_master_id": 1, "price_asked": 110.0,
+             "status": ListingStatus.ACTIVE, "created_at": start + timedelta(seconds=i // 3)}
+            for i in range(ROWS)
+        ])
+
+
+def measure(fn):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, rows
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'pages.db')}")
+        Base.metadata.create_all(bind=engine)
+        seed(engine)
+        db = sessionmaker(bind=engine)()
+        skip = (PAGE - 1) * PAGE_SIZE
+
+        cases = [
+            ("system_logs", lambda **kw: system_service.get_logs(db, limit=PAGE_SIZE, **kw)),
+            ("listings ativos", lambda **kw: listing_service.get_active_listings(db, limit=PAGE_SIZE, **kw)),
+        ]
+        print(f"{ROWS} linhas, página {PAGE} ({PAGE_SIZE} itens), mediana de {REPEAT} execuções")
+        for label, fetch in cases:
+            # Cursor equivalente ao fim da página anterior
+            previous = fetch(skip=skip - PAGE_SIZE)
+            cursor = encode_cursor(previous[-1].created_at, previous[-1].id)
+
+            offset_ms, offset_rows = measure(lambda: fetch(skip=skip))
+            cursor_ms, cursor_rows = measure(lambda: fetch(cursor=cursor))
+            assert [r.id for r in offset_rows] == [r.id for r in cursor_rows]
+            print(f"  {label:<16} offset: {offset_ms:7.2f} ms   cursor: {cursor_ms:7.2f} ms   ({offset_ms / cursor_ms:.0f}x)")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
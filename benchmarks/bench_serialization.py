@@ -0,0 +1,112 @@
+"""
+Benchmark da serialização das rotas de lista (tempo por 1k linhas)
+Caminho padrão do FastAPI (validar cada linha no response_model e depois gerar
+o JSON) vs FAST_JSON (linhas da projeção direto para orjson / json), para os
+anúncios com detalhes e para os eventos. Mede também consulta + serialização,
+com objetos ORM vs a projeção de EventResponse.
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_serialization [--rows 1000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app import serialization
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import User, Event, EventTicketMaster, Listing
+from app.schemas.schemas import EventResponse, ListingDetailResponse
+from app.services import event_service, listing_service
+
+REPEAT = 50
+
+
+def seed(engine, rows: int):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "full_name": "Vendedor", "cpf": "00000000001", "email": "v@x.com", "password_hash": "x"}])
+        conn.execute(insert(Event), [
+            {"title": f"Show {i}", "venue": "Arena", "description": "Turnê", "event_date": now + timedelta(days=1, minutes=i)}
+            for i in range(rows)
+        ])
+        conn.execute(insert(EventTicketMaster), [{"event_id": 1, "category_name": "Pista", "face_value": 100.0}])
+        conn.execute(insert(Listing), [
+            {"seller_id": 1, "event_ticket_master_id": 1, "price_asked": 100.0 + i % 20, "description": "Ingresso", "created_at": now - timedelta(seconds=i)}
+            for i in range(rows)
+        ])
+
+
+def pydantic_path(adapter: TypeAdapter, items) -> bytes:
+    """O que o FastAPI faz com response_model: valida (from_attributes), gera dicts e o JSONResponse os serializa"""
+    content = adapter.dump_python(adapter.validate_python(items, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows) -> bytes:
+    return serialization.dumps([row._asdict() for row in rows])
+
+
+def stdlib_path(rows) -> bytes:
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.dumps([row._asdict() for row in rows])
+    finally:
+        serialization.orjson = orjson
+
+
+def measure(fn, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'serialization.db')}")
+        run_migrations(engine)
+        seed(engine, args.rows)
+        db = sessionmaker(bind=engine)()
+
+        listings = listing_service.get_listing_details(db, limit=args.rows)
+        events = event_service.get_upcoming_events(db, limit=args.rows, as_rows=True)
+        listing_adapter = TypeAdapter(List[ListingDetailResponse])
+        event_adapter = TypeAdapter(List[EventResponse])
+        assert json.loads(fast_path(listings)) == json.loads(pydantic_path(listing_adapter, listings))
+
+        per_1k = 1000 / args.rows
+        encoder = "orjson" if serialization.orjson is not None else "json (orjson não instalado)"
+        print(f"ms por 1k linhas (mediana de {REPEAT}), encoder rápido: {encoder}")
+        for label, adapter, rows in (("anúncios com detalhes", listing_adapter, listings), ("eventos", event_adapter, events)):
+            validated_ms = measure(lambda: pydantic_path(adapter, rows)) * per_1k
+            fast_ms = measure(lambda: fast_path(rows)) * per_1k
+            stdlib_ms = measure(lambda: stdlib_path(rows)) * per_1k
+            print(f"  {label:22s} response_model: {validated_ms:6.2f}   FAST_JSON: {fast_ms:5.2f} ({validated_ms / fast_ms:4.1f}x)   "
+                  f"FAST_JSON sem orjson: {stdlib_ms:5.2f}")
+
+        orm_ms = measure(lambda: (pydantic_path(event_adapter, event_service.get_upcoming_events(db, limit=args.rows)), db.expunge_all()), 20) * per_1k
+        rows_ms = measure(lambda: fast_path(event_service.get_upcoming_events(db, limit=args.rows, as_rows=True)), 20) * per_1k
+        print(f"  eventos, consulta + JSON    objetos ORM + response_model: {orm_ms:6.2f}   projeção + FAST_JSON: {rows_ms:5.2f} ({orm_ms / rows_ms:4.1f}x)")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Simulação de uma abertura de vendas com compradores sintéticos
+Compara a taxa de escrita no banco com e sem sala de espera
+
+O tempo é simulado (relógio virtual) para que 10k compradores caibam em
+poucos segundos de execução; os pedidos são gravados de verdade em SQLite.
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_waiting_room
+"""
+
+import os
+import random
+import tempfile
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.models.models import Base, User, Event, EventTicketMaster, Listing
+from app.schemas.schemas import OrderCreate, QueueStatus
+from app.services import order_service
+from app.services.queue_service import InMemoryStore, WaitingRoom
+
+BUYERS = 10_000
+LISTINGS = 2_000
+ADMIT_RATE = 250  # compradores/segundo
+TICK = 0.1  # segundos simulados por passo
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def seed(session_factory):
+    """Cria vendedor, compradores, evento e listings"""
+    db = session_factory()
+    seller = User(full_name="Seller", cpf="00000000000", email="seller@x.com", password_hash="x")
+    db.add(seller)
+    db.add_all([
+        User(full_name=f"Buyer {i}", cpf=str(i + 1).zfill(11), email=f"b{i}@x.com", password_hash="x")
+        for i in range(BUYERS)
+    ])
+    event = Event(title="Mega Show", venue="Estádio", event_date=datetime(2030, 1, 1))
+    db.add(event)
+    db.flush()
+    ticket_master = EventTicketMaster(event_id=event.id, category_name="Pista", face_value=100.0)
+    db.add(ticket_master)
+    db.flush()
+    listings = [
+        Listing(seller_id=seller.id, event_ticket_master_id=ticket_master.id, price_asked=110.0)
+        for _ in range(LISTINGS)
+    ]
+    db.add_all(listings)
+    db.commit()
+    result = (event.id, [b for b in range(seller.id + 1, seller.id + 1 + BUYERS)], [l.id for l in listings])
+    db.close()
+    return result
+
+
+def checkout(session_factory, buyer_id, listing_ids):
+    """Uma tentativa de compra (sempre toca o banco)"""
+    db = session_factory()
+    try:
+        order_service.create_order(db, buyer_id, OrderCreate(listing_id=random.choice(listing_ids)))
+        return True
+    except ValueError:
+        return False
+    finally:
+        db.close()
+
+
+def simulate(label, use_waiting_room):
+    random.seed(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'sale.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        event_id, buyer_ids, listing_ids = seed(session_factory)
+
+        clock = VirtualClock()
+        writes_per_second = Counter()
+        sold = 0
+
+        if not use_waiting_room:
+            # Todos os compradores chegam no primeiro segundo
+            for buyer_id in buyer_ids:
+                sold += checkout(session_factory, buyer_id, listing_ids)
+                writes_per_second[0] += 1
+        else:
+            room = WaitingRoom(InMemoryStore(clock=clock), clock=clock)
+            room.open_room(event_id, admit_rate=ADMIT_RATE, token_ttl=60)
+            waiting = [(buyer_id, room.join(event_id, buyer_id)["token"]) for buyer_id in buyer_ids]
+
+            while waiting:
+                clock.now += TICK
+                admitted = 0
+                # Fila FIFO: depois do primeiro WAITING todos os demais também aguardam
+                for buyer_id, token in waiting:
+                    if room.status(token)["status"] != QueueStatus.ADMITTED:
+                        break
+                    room.claim(event_id, buyer_id, token)
+                    created = checkout(session_factory, buyer_id, listing_ids)
+                    room.release(token, used=created)
+                    sold += created
+                    writes_per_second[int(clock.now)] += 1
+                    admitted += 1
+                waiting = waiting[admitted:]
+
+        engine.dispose()
+
+    rates = [writes_per_second[s] for s in range(max(writes_per_second) + 1)]
+    print(f"\n{label}")
+    print(f"  vendidos: {sold}/{LISTINGS}  duração simulada: {len(rates)}s")
+    print(f"  escritas/s  pico: {max(rates)}  média: {sum(rates) / len(rates):.0f}  min: {min(rates)}")
+    print(f"  primeiros segundos: {rates[:10]}")
+
+
+def main():
+    simulate("Sem sala de espera", use_waiting_room=False)
+    simulate(f"Com sala de espera ({ADMIT_RATE}/s)", use_waiting_room=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Benchmark do chat em tempo real: conexões WebSocket ociosas + mensagens por segundo
+Sobe a API (uvicorn) em um banco temporário, abre N conexões (2 por sala), envia
+mensagens via POST na taxa pedida e mede:
+  - memória do servidor por conexão (VmRSS, Linux)
+  - latência entre o POST e a entrega no WebSocket (p50/p95/p99)
+
+Requer websockets (cliente e servidor) e httpx (pip install -r requirements-dev.txt).
+
+Execute a partir da raiz do projeto com: python -m benchmarks.bench_websocket [--connections 10000] [--rate 1000] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+import websockets
+from sqlalchemy import insert
+
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import User, Event, EventTicketMaster, Listing, ListingStatus, ChatRoom, ChatStatus
+
+
+def seed(database_url: str, rooms: int):
+    """Cria 2 usuários por sala (comprador e vendedor) e as salas"""
+    engine = create_db_engine(database_url)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"full_name": f"U{i}", "cpf": f"{i:011d}", "email": f"u{i}@x.com", "password_hash": "x"}
+            for i in range(1, 2 * rooms + 1)
+        ])
+        conn.execute(insert(Event), [{"title": "E", "venue": "V", "event_date": datetime(2030, 1, 1, 20), "is_active": True}])
+        conn.execute(insert(EventTicketMaster), [{"event_id": 1, "category_name": "Pista", "face_value": 100.0}])
+        conn.execute(insert(Listing), [{"seller_id": 2, "event_ticket_master_id": 1, "price_asked": 110.0, "status": ListingStatus.ACTIVE}])
+        conn.execute(insert(ChatRoom), [
+            {"listing_id": 1, "buyer_id": 2 * i + 1, "seller_id": 2 * i + 2, "status": ChatStatus.OPEN}
+            for i in range(rooms)
+        ])
+    engine.dispose()
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+async def run(base_url: str, ws_url: str, pid: int, args):
+    rooms = args.connections // 2
+    sent_at = {}
+    latencies = []
+
+    async def listen(ws):
+        async for raw in ws:
+            event = json.loads(raw)
+            if event["type"] == "message":
+                sequence = int(event["message"]["message_text"].split()[-1])
+                latencies.append(time.perf_counter() - sent_at[sequence])
+
+    # Aquecimento: pool de conexões do banco e threadpool já crescidos antes da medição
+    warmup = await asyncio.gather(*[
+        websockets.connect(f"{ws_url}/chat/rooms/{i // 2 + 1}/ws?user_id={i + 1}", ping_interval=None)
+        for i in range(min(200, args.connections))
+    ])
+    await asyncio.gather(*[ws.close() for ws in warmup])
+    await asyncio.sleep(1)
+
+    rss_before = rss_bytes(pid)
+    connections = []
+    start = time.perf_counter()
+    for offset in range(0, args.connections, 200):
+        batch = range(offset, min(offset + 200, args.connections))
+        connections += await asyncio.gather(*[
+            websockets.connect(f"{ws_url}/chat/rooms/{i // 2 + 1}/ws?user_id={i + 1}", ping_interval=None, max_queue=None)
+            for i in batch
+        ])
+    listeners = [asyncio.create_task(listen(ws)) for ws in connections]
+    await asyncio.sleep(2)
+    rss_after = rss_bytes(pid)
+    print(f"{len(connections)} conexões abertas em {time.perf_counter() - start:.1f}s")
+    print(f"  memória do servidor: {rss_before / 2**20:.0f} MB -> {rss_after / 2**20:.0f} MB "
+          f"({(rss_after - rss_before) / len(connections) / 1024:.1f} KB por conexão)")
+
+    total = args.rate * args.duration
+    errors = 0
+    limits = httpx.Limits(max_connections=args.http_clients, max_keepalive_connections=args.http_clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def send(sequence: int):
+            nonlocal errors
+            room = sequence % rooms + 1
+            sent_at[sequence] = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"/chat/rooms/{room}/messages",
+                    params={"sender_id": 2 * room - 1},
+                    json={"message_text": f"bench {sequence}"}
+                )
+                errors += response.status_code != 201
+            except httpx.HTTPError:
+                errors += 1
+
+        tasks = []
+        start = time.perf_counter()
+        for sequence in range(total):
+            delay = start + sequence / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(sequence)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    await asyncio.sleep(2)
+    for task in listeners:
+        task.cancel()
+    await asyncio.gather(*[ws.close() for ws in connections], return_exceptions=True)
+
+    expected = 2 * (total - errors)
+    print(f"{total} mensagens em {elapsed:.1f}s ({total / elapsed:.0f} msg/s, {errors} erros)")
+    print(f"  entregas: {len(latencies)}/{expected}")
+    if latencies:
+        print(f"  latência POST -> WebSocket: p50 {percentile(latencies, 0.5) * 1000:.1f} ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms  p99 {percentile(latencies, 0.99) * 1000:.1f} ms  "
+              f"(média {statistics.mean(latencies) * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--rate", type=int, default=1000, help="mensagens por segundo")
+    parser.add_argument("--duration", type=int, default=10, help="segundos enviando mensagens")
+    parser.add_argument("--http-clients", type=int, default=10, help="POSTs simultâneos (o SQLite serializa as escritas)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'ws.db')}"
+        seed(database_url, args.connections // 2)
+
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=database_url)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--ws", "websockets", "--log-level", "warning", "--backlog", "4096"],
+            env=env
+        )
+        try:
+            for _ in range(100):
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    time.sleep(0.1)
+            asyncio.run(run(f"http://127.0.0.1:{port}", f"ws://127.0.0.1:{port}", server.pid, args))
+        finally:
+            server.terminate()
+            server.wait(30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Teste de carga das rotas quentes (sync vs async)
+Mede req/s e latência p50/p99 com N clientes concorrentes
+
+Requer httpx (pip install -r requirements-dev.txt). Suba a API em cada modo e rode o script:
+
+    uvicorn app.main:app --port 8000                 # modo síncrono
+    DB_ASYNC=1 uvicorn app.main:app --port 8000      # modo async
+    python -m benchmarks.load_test --clients 500 --requests 20000
+"""
+
+import argparse
+import asyncio
+import secrets
+import statistics
+import time
+
+import httpx
+
+
+async def setup(client: httpx.AsyncClient):
+    """Cria usuários, evento, listings e uma sala de chat para o teste"""
+    suffix = secrets.token_hex(4)
+
+    async def create_user(name):
+        response = await client.post("/users/", json={
+            "full_name": name,
+            "cpf": str(secrets.randbelow(10**11)).zfill(11),
+            "email": f"{name}-{suffix}@loadtest.com",
+            "password": "senha123"
+        })
+        return response.json()["id"]
+
+    seller_id = await create_user("seller")
+    buyer_id = await create_user("buyer")
+    event = (await client.post("/events/", json={
+        "title": f"Load Test {suffix}", "venue": "Arena", "event_date": "2030-01-01T20:00:00"
+    })).json()
+    ticket_master = (await client.post("/events/ticket-masters", json={
+        "event_id": event["id"], "category_name": "Pista", "face_value": 100.0
+    })).json()
+    listing_ids = []
+    for _ in range(50):
+        listing = (await client.post(f"/listings/?seller_id={seller_id}", json={
+            "event_ticket_master_id": ticket_master["id"], "price_asked": 110.0
+        })).json()
+        listing_ids.append(listing["id"])
+    room = (await client.post(f"/chat/rooms?buyer_id={buyer_id}", json={"listing_id": listing_ids[0]})).json()
+    return event["id"], buyer_id, room["id"]
+
+
+async def run(base_url: str, clients: int, total_requests: int):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        event_id, buyer_id, room_id = await setup(client)
+
+        requests_plan = [
+            ("GET", f"/listings/active?event_id={event_id}", None),
+            ("GET", f"/chat/rooms/{room_id}/messages?limit=50", None),
+            ("POST", f"/chat/rooms/{room_id}/messages?sender_id={buyer_id}", {"message_text": "ainda disponível?"}),
+        ]
+        latencies = []
+        errors = 0
+        counter = iter(range(total_requests))
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                method, path, body = requests_plan[i % len(requests_plan)]
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"clientes: {clients}  requisições: {len(latencies)}  erros: {errors}")
+    print(f"throughput: {len(latencies) / elapsed:.0f} req/s")
+    print(f"p50: {statistics.median(latencies) * 1000:.1f} ms  p99: {p99 * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
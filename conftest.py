@@ -0,0 +1,73 @@
+"""
+Fixtures compartilhadas pelos testes: SQLite migrado em diretório temporário,
+sessões e TestClient com get_db apontando para ele
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine, get_db
+from app.main import app
+from app.migrations import run_migrations
+from app.schemas.schemas import UserCreate, EventCreate, EventTicketMasterCreate, ListingCreate
+from app.services import user_service, event_service, listing_service
+from app.services.http_cache import response_cache
+
+
+@pytest.fixture
+def engine():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'test.db')}")
+        run_migrations(engine)
+        yield engine
+        engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(session_factory):
+    """TestClient sem o context manager: startup (migrações, jobs, writer de auditoria) não roda"""
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    response_cache.clear()
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        response_cache.clear()
+
+
+@pytest.fixture
+def marketplace(db):
+    """Vendedor, dois compradores, um evento com uma categoria (valor de face 100) e um anúncio a 110"""
+    users = [
+        user_service.create_user(db, UserCreate(full_name=name, cpf=f"{i:011d}", email=f"{name}@x.com", password="senha123"))
+        for i, name in enumerate(("seller", "buyer", "other"), start=1)
+    ]
+    evt = event_service.create_event(db, EventCreate(title="Show", venue="Arena", event_date=datetime.utcnow() + timedelta(days=30)))
+    tm = event_service.create_ticket_master(db, EventTicketMasterCreate(event_id=evt.id, category_name="Pista", face_value=100))
+    listing = listing_service.create_listing(db, users[0].id, ListingCreate(event_ticket_master_id=tm.id, price_asked=110))
+    return {"seller": users[0].id, "buyer": users[1].id, "other": users[2].id,
+            "event": evt.id, "tm": tm.id, "listing": listing.id}
@@ -0,0 +1,108 @@
+"""
+Testes da gravação em lote dos logs de auditoria: lotes de spill deixados por
+um processo que caiu são regravados no start, o lote de um worker vivo não é
+tocado e um lote com falha de INSERT fica para o próximo flush
+
+Execute com: python -m pytest test_audit_log.py
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import func
+
+from app.models.models import SystemLog
+from app.services.audit_log import AuditLogWriter, encode_record
+
+# Processo filho: bufferiza registros, deixa uma linha cortada no spill e cai sem flush
+CRASHING_WORKER = """
+import os, sys
+from sqlalchemy.orm import sessionmaker
+from app.database import create_db_engine
+from app.services.audit_log import AuditLogWriter, encode_record
+
+writer = AuditLogWriter(1000, 3600, spill_dir=sys.argv[2], session_factory=sessionmaker(bind=create_db_engine(sys.argv[1])))
+writer.start()
+for i in range(int(sys.argv[3])):
+    writer.write(encode_record(f"acao {i}", metadata={"i": i}))
+with open(writer._spill.path, "a") as spill:
+    spill.write('{"user_id": null, "act')
+os._exit(1)
+"""
+
+
+@pytest.fixture
+def spill_dir(tmp_path):
+    return str(tmp_path / "spill")
+
+
+def _writer(session_factory, spill_dir, flush_interval=3600.0) -> AuditLogWriter:
+    return AuditLogWriter(1000, flush_interval, spill_dir=spill_dir, session_factory=session_factory)
+
+
+def _logged(db) -> int:
+    db.expire_all()
+    return db.query(func.count(SystemLog.id)).scalar()
+
+
+def _spill_files(spill_dir):
+    return [name for name in os.listdir(spill_dir) if name.endswith(".jsonl")]
+
+
+def test_spill_of_crashed_process_is_recovered_on_start(engine, session_factory, db, spill_dir):
+    os.makedirs(spill_dir)
+    subprocess.run(
+        [sys.executable, "-c", CRASHING_WORKER, str(engine.url), spill_dir, "250"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), check=False
+    )
+    assert len(_spill_files(spill_dir)) == 1
+    assert _logged(db) == 0
+
+    writer = _writer(session_factory, spill_dir)
+    writer.start()
+    writer.stop()
+
+    assert _logged(db) == 250  # a linha cortada é descartada
+    assert writer.stats()["recovered"] == 250
+    assert _spill_files(spill_dir) == []
+    actions = {row.action for row in db.query(SystemLog.action)}
+    assert actions == {f"acao {i}" for i in range(250)}
+
+
+def test_recover_skips_batch_of_live_worker(session_factory, db, spill_dir):
+    live = _writer(session_factory, spill_dir)
+    live.start()
+    for i in range(10):
+        live.write(encode_record(f"acao {i}"))
+
+    other = _writer(session_factory, spill_dir)
+    assert other.recover() == 0
+    assert _logged(db) == 0
+
+    live.stop()
+    assert _logged(db) == 10
+    assert _spill_files(spill_dir) == []
+
+
+def test_failed_batch_keeps_spill_until_written(session_factory, db, spill_dir, monkeypatch):
+    writer = _writer(session_factory, spill_dir)
+    writer.start()
+    for i in range(5):
+        writer.write(encode_record(f"acao {i}"))
+
+    insert = writer._insert
+
+    def failing(lines):
+        raise RuntimeError("banco fora")
+
+    monkeypatch.setattr(writer, "_insert", failing)
+    assert writer.flush() == 0
+    assert writer.stats()["failed_batches"] == 1 and writer.stats()["queue_depth"] == 5
+    assert len(_spill_files(spill_dir)) == 1
+
+    monkeypatch.setattr(writer, "_insert", insert)
+    writer.stop()
+    assert _logged(db) == 5
+    assert _spill_files(spill_dir) == []
@@ -0,0 +1,259 @@
+"""
+Testes do chat: leitura do histórico compactado (segmentos) junto com a tabela
+quente, com skip, limit e cursor, mensagens entre dois usuários (disputas),
+entrega em tempo real pelo WebSocket da sala e contadores de não lidas
+
+Execute com: python -m pytest test_chat.py
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+from starlette.websockets import WebSocketDisconnect
+
+from app.models.models import ChatMessage, ChatRoom, ChatMessageSegment, ChatUnreadCounter
+from app.routes import chat as chat_routes
+from app.schemas.schemas import ChatRoomCreate, ListingCreate
+from app.services import chat_archive, chat_service, listing_service
+from app.services.pagination import encode_cursor
+from app.services.realtime import chat_hub
+
+SEGMENT_SIZE = 10
+
+
+def _room(db, marketplace, listing_id=None) -> int:
+    room = chat_service.create_chat_room(db, marketplace["buyer"], ChatRoomCreate(listing_id=listing_id or marketplace["listing"]))
+    return room.id
+
+
+def _seed(db, room_id, sender_id, times):
+    """Mensagens com sent_at explícito e a sala apontando para a última (como send_message faria)"""
+    db.execute(insert(ChatMessage), [
+        {"chat_room_id": room_id, "sender_id": sender_id, "message_text": f"msg {room_id}-{i}", "sent_at": sent_at}
+        for i, sent_at in enumerate(times)
+    ])
+    last = db.query(ChatMessage).filter(ChatMessage.chat_room_id == room_id).order_by(ChatMessage.id.desc()).first()
+    db.execute(update(ChatRoom).where(ChatRoom.id == room_id).values(last_message_id=last.id, last_activity_at=last.sent_at))
+    db.commit()
+
+
+def _compact(db):
+    result = chat_archive.compact_chat_history(db, idle_days=0, segment_size=SEGMENT_SIZE)
+    assert result["segments_written"] > 0
+    return result
+
+
+def _ids(messages):
+    return [message.id for message in messages]
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """Conta os segmentos descomprimidos"""
+    calls = []
+    decode_segment = chat_archive.decode_segment
+
+    def counting(segment):
+        calls.append(segment.id)
+        return decode_segment(segment)
+
+    monkeypatch.setattr(chat_archive, "decode_segment", counting)
+    return calls
+
+
+@pytest.fixture
+def archived_room(db, marketplace):
+    """Sala com 45 mensagens: 44 em 5 segmentos (10+10+10+10+4) e a última na tabela quente, mais 5 quentes novas"""
+    room_id = _room(db, marketplace)
+    start = datetime.utcnow() - timedelta(days=2)
+    _seed(db, room_id, marketplace["buyer"], [start + timedelta(minutes=i) for i in range(45)])
+    _compact(db)
+    _seed(db, room_id, marketplace["seller"], [start + timedelta(minutes=100 + i) for i in range(5)])
+
+    full = chat_service.get_chat_messages(db, room_id, limit=1000)
+    assert len(full) == 50
+    assert db.query(ChatMessage).filter(ChatMessage.chat_room_id == room_id).count() == 6
+    return room_id, full
+
+
+# ==================== HISTÓRICO DA SALA ====================
+
+def test_pages_with_skip_match_full_history(db, archived_room):
+    room_id, full = archived_room
+    for skip, limit in [(0, 10), (5, 10), (38, 10), (44, 3), (40, 20), (47, 10), (60, 10)]:
+        page = chat_service.get_chat_messages(db, room_id, skip=skip, limit=limit)
+        assert _ids(page) == _ids(full[skip:skip + limit]), (skip, limit)
+
+
+def test_cursor_pages_walk_the_history_and_ignore_skip(db, archived_room):
+    room_id, full = archived_room
+    walked, cursor = [], None
+    while True:
+        # skip junto com cursor é ignorado, como em paginate
+        page = chat_service.get_chat_messages(db, room_id, skip=3 if cursor else 0, limit=7, cursor=cursor)
+        walked.extend(page)
+        if len(page) < 7:
+            break
+        cursor = encode_cursor(page[-1].sent_at, page[-1].id)
+    assert _ids(walked) == _ids(full)
+
+
+def test_skip_does_not_decompress_skipped_segments(db, archived_room, decoded):
+    room_id, full = archived_room
+    page = chat_service.get_chat_messages(db, room_id, skip=25, limit=10)
+
+    assert _ids(page) == _ids(full[25:35])
+    assert len(decoded) == 2  # mensagens 25-29 e 30-34, sem os dois primeiros segmentos
+
+
+def test_page_in_hot_table_decompresses_nothing(db, archived_room, decoded):
+    room_id, full = archived_room
+    assert _ids(chat_service.get_chat_messages(db, room_id, skip=44, limit=10)) == _ids(full[44:])
+    cursor = encode_cursor(full[44].sent_at, full[44].id)
+    assert _ids(chat_service.get_chat_messages(db, room_id, cursor=cursor)) == _ids(full[45:])
+    assert decoded == []
+
+
+# ==================== MENSAGENS ENTRE DOIS USUÁRIOS ====================
+
+def test_messages_between_merges_rooms_and_reads_only_needed_segments(db, marketplace, decoded):
+    second_listing = listing_service.create_listing(
+        db, marketplace["seller"], ListingCreate(event_ticket_master_id=marketplace["tm"], price_asked=105)
+    ).id
+    rooms = [_room(db, marketplace), _room(db, marketplace, second_listing)]
+    start = datetime.utcnow() - timedelta(days=2)
+    # As duas salas se intercalam no tempo: minutos pares na primeira, ímpares na segunda
+    for offset, room_id in enumerate(rooms):
+        _seed(db, room_id, marketplace["buyer"], [start + timedelta(minutes=2 * i + offset) for i in range(40)])
+    _compact(db)
+
+    every = chat_service.get_messages_between(db, marketplace["buyer"], marketplace["seller"])
+    assert len(every) == 80
+    assert [m.sent_at for m in every] == sorted(m.sent_at for m in every)
+    assert len(decoded) == db.query(ChatMessageSegment).count()
+
+    decoded.clear()
+    first = chat_service.get_messages_between(db, marketplace["buyer"], marketplace["seller"], limit=15)
+    assert _ids(first) == _ids(every[:15])
+    assert len(decoded) == 2  # o primeiro segmento de cada sala
+
+
+# ==================== TEMPO REAL ====================
+
+@pytest.fixture
+def live(client, session_factory, marketplace, monkeypatch):
+    """Sala nova; o WebSocket e a moderação abrem sessões no banco de teste"""
+    monkeypatch.setattr(chat_routes, "SessionLocal", session_factory)
+    monkeypatch.setattr(chat_service.moderation_pipeline, "session_factory", session_factory)
+    with session_factory() as db:
+        room_id = _room(db, marketplace)
+    return client, room_id
+
+
+def _wait_delivered(target, timeout=5.0):
+    """Espera o hub repassar eventos até o total `target` (falha em vez de travar no receive)"""
+    deadline = time.monotonic() + timeout
+    while chat_hub.stats()["delivered"] < target:
+        if time.monotonic() > deadline:
+            pytest.fail("evento não entregue pelo WebSocket")
+        time.sleep(0.01)
+
+
+def _send(client, room_id, sender_id, text):
+    response = client.post(f"/chat/rooms/{room_id}/messages", params={"sender_id": sender_id}, json={"message_text": text})
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_new_message_reaches_both_participants(live, marketplace):
+    client, room_id = live
+    url = f"/chat/rooms/{room_id}/ws"
+    with client.websocket_connect(url, params={"user_id": marketplace["buyer"]}) as buyer, \
+            client.websocket_connect(url, params={"user_id": marketplace["seller"]}) as seller:
+        delivered = chat_hub.stats()["delivered"]
+        sent = _send(client, room_id, marketplace["buyer"], "ainda tem o ingresso?")
+        _wait_delivered(delivered + 2)
+
+        for socket in (buyer, seller):
+            event = socket.receive_json()
+            assert event["type"] == "message"
+            assert event["message"]["id"] == sent["id"]
+            assert event["message"]["message_text"] == "ainda tem o ingresso?"
+
+
+def test_read_over_socket_confirms_to_sender(live, db, marketplace):
+    client, room_id = live
+    url = f"/chat/rooms/{room_id}/ws"
+    with client.websocket_connect(url, params={"user_id": marketplace["buyer"]}) as buyer, \
+            client.websocket_connect(url, params={"user_id": marketplace["seller"]}) as seller:
+        delivered = chat_hub.stats()["delivered"]
+        for text in ("oi", "tudo bem?"):
+            _send(client, room_id, marketplace["buyer"], text)
+        _wait_delivered(delivered + 4)
+        assert [buyer.receive_json()["type"] for _ in range(2)] == ["message"] * 2
+        assert [seller.receive_json()["type"] for _ in range(2)] == ["message"] * 2
+
+        seller.send_json({"type": "read"})
+        _wait_delivered(delivered + 6)
+        receipt = buyer.receive_json()
+        assert receipt["type"] == "read"
+        assert receipt["user_id"] == marketplace["seller"] and receipt["marked_as_read"] == 2
+
+    assert chat_service.get_unread_count(db, marketplace["seller"]) == 0
+
+
+def test_socket_of_non_participant_is_refused(live, marketplace):
+    client, room_id = live
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect(f"/chat/rooms/{room_id}/ws", params={"user_id": marketplace["other"]}) as socket:
+            socket.receive_json()
+    assert refused.value.code == 1008
+
+
+# ==================== NÃO LIDAS ====================
+
+def _unread(client, user_id):
+    body = client.get(f"/chat/user/{user_id}/unread").json()
+    assert client.get(f"/chat/user/{user_id}/unread-count").json()["unread_count"] == body["unread_count"]
+    return {room["chat_room_id"]: room["unread_count"] for room in body["rooms"]}
+
+
+def test_unread_counters_follow_sends_and_reads(live, marketplace):
+    client, room_id = live
+    for text in ("oi", "ainda tem?", "posso pagar hoje"):
+        _send(client, room_id, marketplace["buyer"], text)
+    _send(client, room_id, marketplace["seller"], "tenho sim")
+
+    assert _unread(client, marketplace["seller"]) == {room_id: 3}
+    assert _unread(client, marketplace["buyer"]) == {room_id: 1}
+
+    assert client.post(f"/chat/rooms/{room_id}/mark-read", params={"user_id": marketplace["seller"]}).json() == {"marked_as_read": 3}
+    assert _unread(client, marketplace["seller"]) == {}
+    assert _unread(client, marketplace["buyer"]) == {room_id: 1}
+
+
+def test_repair_fixes_drifted_and_missing_counters(live, db, marketplace):
+    client, room_id = live
+    for text in ("oi", "ainda tem?"):
+        _send(client, room_id, marketplace["buyer"], text)
+    _send(client, room_id, marketplace["seller"], "tenho sim")
+    clean_room = _room(db, marketplace, listing_service.create_listing(
+        db, marketplace["seller"], ListingCreate(event_ticket_master_id=marketplace["tm"], price_asked=105)
+    ).id)
+
+    # Contador do vendedor errado, o do comprador apagado e um contador fantasma numa sala sem mensagens
+    db.query(ChatUnreadCounter).filter(ChatUnreadCounter.user_id == marketplace["seller"], ChatUnreadCounter.chat_room_id == room_id)\
+        .update({"unread_count": 7})
+    db.query(ChatUnreadCounter).filter(ChatUnreadCounter.user_id == marketplace["buyer"], ChatUnreadCounter.chat_room_id == room_id)\
+        .delete()
+    db.query(ChatUnreadCounter).filter(ChatUnreadCounter.user_id == marketplace["buyer"], ChatUnreadCounter.chat_room_id == clean_room)\
+        .update({"unread_count": 4})
+    db.commit()
+    assert _unread(client, marketplace["seller"]) == {room_id: 7}
+
+    assert chat_service.repair_unread_counters(db, chunk_size=1) == {"rooms": 2, "repaired": 3}
+    assert _unread(client, marketplace["seller"]) == {room_id: 2}
+    assert _unread(client, marketplace["buyer"]) == {room_id: 1}
+    assert chat_service.repair_unread_counters(db) == {"rooms": 2, "repaired": 0}
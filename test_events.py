@@ -0,0 +1,93 @@
+"""
+Testes da busca de eventos no índice full-text: acentos, prefixos, filtros e
+ranking por relevância e data sobre todo o conjunto que casa com o termo
+
+Execute com: python -m pytest test_events.py
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.models.models import Event
+from app.services import event_service
+
+# Termo amplo: muito mais eventos casam do que cabem em uma página
+BROAD_MATCHES = 2100
+
+
+def _seed(db, events):
+    now = datetime.utcnow()
+    db.execute(insert(Event), [
+        {"venue": "Arena", "event_date": now + timedelta(days=1, minutes=i), "is_active": True, **event}
+        for i, event in enumerate(events)
+    ])
+    db.commit()
+
+
+def _titles(db, search, **kwargs):
+    return [event.title for event in event_service.get_events(db, search=search, **kwargs)]
+
+
+def test_search_ignores_accents_and_case(db):
+    _seed(db, [
+        {"title": "Festival de Inverno", "venue": "São Paulo"},
+        {"title": "Ópera na Praça", "venue": "Sao Paulo"},
+        {"title": "Rock", "venue": "Curitiba"},
+    ])
+
+    assert sorted(_titles(db, "sao paulo")) == ["Festival de Inverno", "Ópera na Praça"]
+    assert sorted(_titles(db, "SÃO PAULO")) == ["Festival de Inverno", "Ópera na Praça"]
+    assert _titles(db, "opera") == ["Ópera na Praça"]
+    assert _titles(db, "invern") == ["Festival de Inverno"]  # prefixo enquanto digita
+
+
+def test_search_ranks_title_matches_first(db):
+    _seed(db, [
+        {"title": "Noite no Parque", "venue": "Parque Jazz"},
+        {"title": "Jazz ao Vivo", "venue": "Teatro"},
+    ])
+
+    assert _titles(db, "jazz") == ["Jazz ao Vivo", "Noite no Parque"]
+
+
+def test_inactive_matches_do_not_crowd_out_active_events(db):
+    """Milhares de eventos recentes casam mas estão inativos: os ativos, mais antigos, aparecem"""
+    active = 30
+    inactive = BROAD_MATCHES
+    _seed(db,
+        [{"title": f"Show ativo {i}"} for i in range(active)]
+        + [{"title": f"Show cancelado {i}", "is_active": False} for i in range(inactive)]
+    )
+
+    found = _titles(db, "show", limit=100)
+    assert len(found) == active
+    assert all(title.startswith("Show ativo") for title in found)
+
+    assert len(_titles(db, "show", limit=100, active_only=False)) == 100
+    pages = [_titles(db, "show", skip=skip, limit=10) for skip in (0, 10, 20, 30)]
+    assert [len(page) for page in pages] == [10, 10, 10, 0]
+    assert len({title for page in pages for title in page}) == active
+
+
+def test_older_better_match_beats_newer_matches(db):
+    """O título exato foi cadastrado antes de milhares de eventos que também casam"""
+    _seed(db, [{"title": "Festival de Jazz"}])
+    _seed(db, [{"title": f"Noite de blues, rock e jazz ao vivo {i}", "venue": "Bar"} for i in range(BROAD_MATCHES)])
+
+    assert _titles(db, "festival jazz", limit=5)[0] == "Festival de Jazz"
+    assert _titles(db, "jazz", limit=5)[0] == "Festival de Jazz"
+
+
+def test_ties_are_ranked_by_event_date(db):
+    """Mesma relevância: o evento mais próximo vem primeiro, mesmo cadastrado antes dos outros"""
+    now = datetime.utcnow()
+    db.execute(insert(Event), [
+        {"title": "Show", "venue": "Arena", "event_date": now + timedelta(hours=1), "is_active": True, "description": "primeiro"}
+    ])
+    db.commit()
+    _seed(db, [{"title": "Show"} for _ in range(BROAD_MATCHES)])
+
+    first = event_service.get_events(db, search="show", limit=3)
+    assert first[0].description == "primeiro"
+    assert [event.event_date for event in first] == sorted(event.event_date for event in first)
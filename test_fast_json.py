@@ -0,0 +1,68 @@
+"""
+Conformidade das respostas com FAST_JSON
+Com FAST_JSON as rotas de lista não validam as linhas no response_model: este
+teste garante que as projeções têm exatamente os campos dos schemas e que cada
+rota devolve o mesmo JSON (e o mesmo X-Next-Cursor) nos dois modos
+
+Execute com: python -m pytest test_fast_json.py  (ou python test_fast_json.py)
+"""
+
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.schemas.schemas import EventResponse, ListingDetailResponse
+from app.services.event_service import EVENT_COLUMNS
+from app.services.http_cache import response_cache
+from app.services.listing_service import LISTING_DETAIL_COLUMNS
+from test_query_counts import api_client
+
+# Endpoint -> schema de cada item; limit pequeno para que o cursor apareça
+FAST_ENDPOINTS = {
+    "/events/": EventResponse,
+    "/events/?search=show": EventResponse,
+    "/events/upcoming": EventResponse,
+    "/listings/?limit=5": ListingDetailResponse,
+    "/listings/active?limit=5": ListingDetailResponse,
+    "/listings/active?event_id={event}": ListingDetailResponse,
+    "/listings/seller/{seller}?limit=5": ListingDetailResponse,
+    "/listings/order-book/{tm}?limit=5": ListingDetailResponse,
+}
+
+
+def test_projections_match_schemas():
+    assert [column.key for column in EVENT_COLUMNS] == list(EventResponse.model_fields)
+    assert {column.key for column in LISTING_DETAIL_COLUMNS} == set(ListingDetailResponse.model_fields)
+
+
+def fetch(client, path: str, fast: bool):
+    previous = settings.fast_json
+    settings.fast_json = fast
+    response_cache.clear()
+    try:
+        response = client.get(path)
+    finally:
+        settings.fast_json = previous
+    assert response.status_code == 200, f"{path}: {response.status_code} {response.text}"
+    return response
+
+
+def test_fast_json_matches_response_models():
+    with api_client() as (client, ids, _):
+        for endpoint, schema in FAST_ENDPOINTS.items():
+            path = endpoint.format(**ids)
+            validated = fetch(client, path, fast=False)
+            fast = fetch(client, path, fast=True)
+
+            assert fast.json(), f"{path}: lista vazia, o seed não cobre a rota"
+            assert fast.json() == validated.json(), f"{path}: JSON difere do response_model"
+            assert fast.headers.get("x-next-cursor") == validated.headers.get("x-next-cursor"), path
+            # O corpo rápido também precisa passar na validação do schema
+            TypeAdapter(List[schema]).validate_json(fast.content)
+
+
+if __name__ == "__main__":
+    test_projections_match_schemas()
+    test_fast_json_matches_response_models()
+    print("OK: respostas com FAST_JSON iguais às do response_model")
@@ -0,0 +1,88 @@
+"""
+Testes do resumo de estoque por evento: deltas das transições dos listings
+aplicados só após o commit, descartados no rollback e o cache sempre igual a
+uma leitura nova do banco
+
+Execute com: python -m pytest test_inventory.py
+"""
+
+import pytest
+
+from app.models.models import Listing, ListingStatus
+from app.schemas.schemas import ListingCreate, OrderCreate
+from app.services import inventory_cache as inventory_module, listing_service, order_service
+from app.services.inventory_cache import InventoryCache, inventory_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    inventory_cache.clear()
+    yield
+    inventory_cache.clear()
+
+
+def _summary(db, event_id) -> dict:
+    summary = inventory_cache.get_summary(db, event_id)
+    assert summary == InventoryCache(1).get_summary(db, event_id)  # igual a uma leitura nova do banco
+    return summary
+
+
+def _counts(summary) -> tuple:
+    return summary["active_count"], summary["reserved_count"], summary["min_price"], summary["max_price"]
+
+
+def test_committed_transitions_update_cached_summary(db, marketplace):
+    event_id = marketplace["event"]
+    assert _counts(_summary(db, event_id)) == (1, 0, 110, 110)
+    misses = inventory_cache.stats()["misses"]
+
+    listing_service.create_listing(db, marketplace["seller"], ListingCreate(event_ticket_master_id=marketplace["tm"], price_asked=95))
+    assert _counts(_summary(db, event_id)) == (2, 0, 95, 110)
+
+    order = order_service.create_order(db, marketplace["buyer"], OrderCreate(listing_id=marketplace["listing"]))
+    assert _counts(_summary(db, event_id)) == (1, 1, 95, 95)
+
+    order_service.cancel_order(db, order.id, marketplace["buyer"])
+    assert _counts(_summary(db, event_id)) == (2, 0, 95, 110)
+
+    stats = inventory_cache.stats()
+    assert stats["misses"] == misses and stats["drift"] == 0
+
+
+def test_rolled_back_changes_are_discarded(db, marketplace):
+    event_id = marketplace["event"]
+    before = _summary(db, event_id)
+    applied = inventory_cache.stats()["deltas_applied"]
+
+    listing = db.get(Listing, marketplace["listing"])
+    listing.price_asked = 90
+    db.add(Listing(seller_id=marketplace["seller"], event_ticket_master_id=marketplace["tm"], price_asked=100))
+    db.flush()  # os eventos do mapper já anotaram os deltas
+    assert listing_service.try_reserve_listing(db, marketplace["listing"], marketplace["buyer"]) is not None
+    db.rollback()
+
+    assert _summary(db, event_id) == before
+    assert inventory_cache.stats()["deltas_applied"] == applied
+
+    # A próxima transação não carrega deltas da que foi desfeita
+    listing_service.create_listing(db, marketplace["seller"], ListingCreate(event_ticket_master_id=marketplace["tm"], price_asked=99))
+    assert _counts(_summary(db, event_id)) == (2, 0, 99, 110)
+
+
+def test_bulk_transition_marks_whole_cache_stale(db, marketplace):
+    event_id = marketplace["event"]
+    _summary(db, event_id)
+
+    db.query(Listing).filter(Listing.id == marketplace["listing"]).update({"status": ListingStatus.SOLD}, synchronize_session=False)
+    inventory_module.mark_stale(db)
+    db.commit()
+
+    assert inventory_cache.stats()["events"] == 0
+    assert _counts(_summary(db, event_id)) == (0, 0, None, None)
+
+
+def test_inventory_route(client, marketplace):
+    body = client.get(f"/events/{marketplace['event']}/inventory").json()
+    assert body["active_count"] == 1
+    assert body["categories"][0]["category_name"] == "Pista" and body["categories"][0]["median_price"] == 110
+    assert client.get("/events/999999/inventory").status_code == 404
@@ -0,0 +1,120 @@
+"""
+Testes dos anúncios: paginação por cursor (X-Next-Cursor) percorrendo a
+listagem sem repetir nem pular anúncios, inclusive com created_at empatado, e
+livro de ofertas por categoria (melhor oferta, próximas N e profundidade)
+
+Execute com: python -m pytest test_listings.py
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app.models.models import Listing, ListingStatus
+from app.services.pagination import NEXT_CURSOR_HEADER
+
+
+def _seed(db, marketplace, prices, created_at=None, status=ListingStatus.ACTIVE) -> list:
+    """Anúncios da categoria do marketplace; com created_at fixo, todos empatam na ordenação"""
+    now = datetime.utcnow()
+    rows = db.execute(insert(Listing).returning(Listing.id), [
+        {"seller_id": marketplace["seller"], "event_ticket_master_id": marketplace["tm"], "price_asked": price,
+         "status": status, "created_at": created_at or now - timedelta(minutes=i)}
+        for i, price in enumerate(prices)
+    ]).scalars().all()
+    db.commit()
+    return rows
+
+
+def _walk(client, path, limit, **params):
+    """Segue o X-Next-Cursor até a última página; devolve os ids e o número de páginas"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        response = client.get(path, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids.extend(item["id"] for item in response.json())
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids, pages
+
+
+# ==================== CURSOR ====================
+
+def test_cursor_walk_matches_offset_pages(client, db, marketplace):
+    _seed(db, marketplace, [100 + i for i in range(20)])
+    _seed(db, marketplace, [105] * 12, created_at=datetime.utcnow() - timedelta(days=1))  # empate em created_at
+
+    full = [item["id"] for item in client.get("/listings/", params={"limit": 1000}).json()]
+    assert len(full) == 33
+    offset = [item["id"] for skip in range(0, 33, 5)
+              for item in client.get("/listings/", params={"skip": skip, "limit": 5}).json()]
+    assert offset == full
+
+    ids, pages = _walk(client, "/listings/", limit=5)
+    assert ids == full
+    assert pages == 7
+
+
+def test_cursor_walk_keeps_filters(client, db, marketplace):
+    _seed(db, marketplace, [100 + i for i in range(9)])
+    _seed(db, marketplace, [100] * 4, status=ListingStatus.CANCELLED)
+
+    ids, _ = _walk(client, "/listings/active", limit=4)
+    assert len(ids) == 10 and len(set(ids)) == 10
+    assert _walk(client, f"/listings/seller/{marketplace['seller']}", limit=4)[0] == \
+        [item["id"] for item in client.get(f"/listings/seller/{marketplace['seller']}").json()]
+
+
+def test_exact_last_page_ends_with_an_empty_page(client, db, marketplace):
+    """A última página cheia ainda publica cursor; a seguinte vem vazia e sem header"""
+    _seed(db, marketplace, [100] * 5)
+    response = client.get("/listings/", params={"limit": 6})
+    assert len(response.json()) == 6 and NEXT_CURSOR_HEADER in response.headers
+
+    last = client.get("/listings/", params={"limit": 6, "cursor": response.headers[NEXT_CURSOR_HEADER]})
+    assert last.json() == [] and NEXT_CURSOR_HEADER not in last.headers
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get("/listings/", params={"cursor": "nao-e-cursor"}).status_code == 400
+
+
+# ==================== LIVRO DE OFERTAS ====================
+
+def test_best_offer_and_next_listings_follow_price_then_id(client, db, marketplace):
+    tm = marketplace["tm"]
+    cheap = _seed(db, marketplace, [95, 95, 100])
+    _seed(db, marketplace, [90], status=ListingStatus.RESERVED)  # fora do livro
+
+    best = client.get(f"/listings/order-book/{tm}/best")
+    assert best.status_code == 200
+    assert best.json()["id"] == cheap[0] and best.json()["price_asked"] == 95
+
+    ids, pages = _walk(client, f"/listings/order-book/{tm}", limit=2)
+    assert ids == [cheap[0], cheap[1], cheap[2], marketplace["listing"]]
+    assert pages == 3  # a segunda página veio cheia: a terceira vem vazia
+    assert [item["price_asked"] for item in client.get(f"/listings/order-book/{tm}", params={"limit": 3}).json()] == [95, 95, 100]
+
+
+def test_best_offer_of_empty_book_is_404(client, db, marketplace):
+    listing = db.get(Listing, marketplace["listing"])
+    listing.status = ListingStatus.SOLD
+    db.commit()
+
+    assert client.get(f"/listings/order-book/{marketplace['tm']}/best").status_code == 404
+    assert client.get(f"/listings/order-book/{marketplace['tm']}").json() == []
+    assert client.get(f"/listings/order-book/{marketplace['tm']}/depth").json() == []
+
+
+def test_depth_counts_active_listings_per_bucket_from_best_price(client, db, marketplace):
+    _seed(db, marketplace, [85, 89.99, 90, 105, 119])
+    _seed(db, marketplace, [80], status=ListingStatus.CANCELLED)
+
+    depth = client.get(f"/listings/order-book/{marketplace['tm']}/depth", params={"bucket_size": 10, "levels": 3}).json()
+    assert depth == [
+        {"price_from": 80, "price_to": 90, "listings": 2},
+        {"price_from": 90, "price_to": 100, "listings": 1},
+        {"price_from": 100, "price_to": 110, "listings": 1},  # 110 e 119 ficam além das 3 faixas
+    ]
+    assert client.get(f"/listings/order-book/{marketplace['tm']}/depth", params={"bucket_size": 0}).status_code == 422
@@ -0,0 +1,137 @@
+"""
+Testes das migrações: um banco vazio, um banco no esquema inicial (anterior às
+migrações) e um banco migrado quando a versão 1 ainda criava as tabelas a partir
+dos models precisam terminar com o mesmo esquema, e esse esquema é o dos models;
+o DDL de add_column também é conferido no dialeto do PostgreSQL
+
+Execute com: python -m pytest test_migrations.py
+"""
+
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, create_mock_engine, inspect, text
+
+from app import migrations
+from app.migrations import MIGRATIONS, add_column, baseline_metadata, run_migrations, schema_migrations, migration_metadata
+from app.models.models import Base
+
+
+@pytest.fixture
+def new_engine():
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = []
+
+        def make(name):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, name)}")
+            engines.append(engine)
+            return engine
+
+        yield make
+        for engine in engines:
+            engine.dispose()
+
+
+def schema(engine) -> dict:
+    """Tabelas com colunas, índices e chaves estrangeiras, mais os objetos do sqlite_master"""
+    inspector = inspect(engine)
+    tables = {}
+    for table_name in inspector.get_table_names():
+        tables[table_name] = {
+            "columns": sorted((c["name"], str(c["type"]), c["nullable"]) for c in inspector.get_columns(table_name)),
+            "indexes": sorted((i["name"], tuple(i["column_names"]), bool(i["unique"])) for i in inspector.get_indexes(table_name)),
+            "foreign_keys": sorted(
+                (tuple(fk["constrained_columns"]), fk["referred_table"], tuple(fk["referred_columns"]))
+                for fk in inspector.get_foreign_keys(table_name)
+            ),
+        }
+    with engine.connect() as conn:
+        objects = sorted(conn.execute(text("SELECT type, name FROM sqlite_master WHERE type IN ('trigger', 'view')")).all())
+    return {"tables": tables, "objects": objects}
+
+
+def test_empty_and_baseline_databases_converge(new_engine):
+    empty = new_engine("empty.db")
+    assert run_migrations(empty) == [m.version for m in MIGRATIONS]
+
+    baseline = new_engine("baseline.db")
+    baseline_metadata.create_all(baseline)
+    with baseline.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, full_name, cpf, email, password_hash) VALUES (1, 'Ana', '1', 'a@x.com', 'x')"))
+    run_migrations(baseline)
+
+    assert schema(baseline) == schema(empty)
+    with baseline.connect() as conn:
+        assert conn.execute(text("SELECT full_name FROM users WHERE id = 1")).scalar_one() == "Ana"
+
+
+def test_databases_created_from_models_converge(new_engine):
+    """Bancos em que a versão 1 rodou create_all dos models só aplicam o que falta"""
+    empty = new_engine("empty.db")
+    run_migrations(empty)
+
+    legacy = new_engine("legacy.db")
+    with legacy.begin() as conn:
+        migration_metadata.create_all(bind=conn)
+        for migration in MIGRATIONS[:10]:
+            if migration.version == 1:
+                Base.metadata.create_all(bind=conn)
+            else:
+                migration.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version, description=migration.description, applied_at=datetime.utcnow()
+            ))
+    assert run_migrations(legacy) == [m.version for m in MIGRATIONS if m.version > 10]
+
+    assert schema(legacy) == schema(empty)
+
+
+def test_migrated_schema_matches_models(new_engine):
+    """Toda mudança nos models precisa de uma migração"""
+    migrated = new_engine("migrated.db")
+    run_migrations(migrated)
+    models = new_engine("models.db")
+    Base.metadata.create_all(models)
+
+    migrated_tables = schema(migrated)["tables"]
+    migrated_tables.pop("schema_migrations")
+    # Tabelas do FTS5 só existem nos bancos migrados
+    fts_tables = {name for name in migrated_tables if name.startswith("events_fts")}
+    assert fts_tables
+    for name in fts_tables:
+        migrated_tables.pop(name)
+    assert migrated_tables == schema(models)["tables"]
+
+
+# ==================== DDL EM OUTROS DIALETOS ====================
+
+class _NoColumns:
+    def get_columns(self, table_name):
+        return []
+
+
+def _add_column_ddl(url, table_name, column_name, monkeypatch) -> list:
+    """Comandos que add_column emitiria em um banco do dialeto de `url` (sem conectar)"""
+    statements = []
+    mock = create_mock_engine(url, lambda ddl, *args: statements.append(str(ddl.compile(dialect=mock.dialect)).strip()))
+    monkeypatch.setattr(migrations, "inspect", lambda conn: _NoColumns())
+    add_column(mock, table_name, column_name)
+    return statements
+
+
+def test_add_enum_column_creates_type_on_postgresql(monkeypatch):
+    assert _add_column_ddl("postgresql://", "system_logs", "category", monkeypatch) == [
+        "CREATE TYPE logcategory AS ENUM ('GENERAL', 'SUSPICIOUS_MESSAGE', 'DISPUTE', 'MODERATION')",
+        "ALTER TABLE system_logs ADD COLUMN category logcategory",
+    ]
+    assert _add_column_ddl("sqlite://", "system_logs", "category", monkeypatch) == [
+        "ALTER TABLE system_logs ADD COLUMN category VARCHAR(18)",
+    ]
+
+
+def test_add_plain_column_on_postgresql(monkeypatch):
+    assert _add_column_ddl("postgresql://", "chat_rooms", "last_activity_at", monkeypatch) == [
+        "ALTER TABLE chat_rooms ADD COLUMN last_activity_at TIMESTAMP WITHOUT TIME ZONE",
+    ]
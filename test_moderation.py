@@ -0,0 +1,188 @@
+"""
+Testes da moderação do chat: motivos do filtro inline e da verificação
+profunda, troca de ruleset concorrendo com a recarga periódica e pipeline da
+verificação profunda (lotes com falha voltam à fila, revisão manual quando as
+tentativas acabam, pool recriado)
+
+Execute com: python -m pytest test_moderation.py
+"""
+
+import os
+import signal
+
+import pytest
+
+from app.models.models import ChatMessage, ChatRoom, SystemLog
+from app.schemas.schemas import ModerationRulesetCreate
+from app.services import moderation_service, moderation_pipeline as pipeline_module
+from app.services.chat_service import SUSPICIOUS_KEYWORDS, moderation_rules
+from app.services.moderation import DeepModerationEngine, ModerationEngine, ModerationRules, spelled_numbers
+from app.services.moderation_pipeline import MANUAL_REVIEW_REASON, ModerationPipeline, ModerationTask
+
+OBFUSCATED = "me chama no w h a t s a p p"
+
+
+@pytest.fixture
+def default_rules():
+    moderation_rules.reset()
+    yield moderation_rules
+    moderation_rules.reset()
+
+
+@pytest.fixture
+def messages(db, marketplace):
+    """Uma mensagem ofuscada (só a verificação profunda pega) e uma limpa"""
+    room = ChatRoom(listing_id=marketplace["listing"], buyer_id=marketplace["buyer"], seller_id=marketplace["seller"])
+    db.add(room)
+    db.flush()
+    rows = [ChatMessage(chat_room_id=room.id, sender_id=marketplace["buyer"], message_text=text)
+            for text in (OBFUSCATED, "oi, ainda tem o ingresso?")]
+    db.add_all(rows)
+    db.commit()
+    return [ModerationTask(row.id, room.id, row.sender_id, row.message_text) for row in rows]
+
+
+def _pipeline(session_factory, workers=0, max_retries=2) -> ModerationPipeline:
+    return ModerationPipeline(
+        ModerationRules(SUSPICIOUS_KEYWORDS), workers=workers, queue_size=100, batch_size=10,
+        flush_interval=0.01, session_factory=session_factory, max_retries=max_retries
+    )
+
+
+def _flags(db, tasks):
+    db.expire_all()
+    return [(row.flagged_by_system, row.flagged_reason) for row in (db.get(ChatMessage, task.message_id) for task in tasks)]
+
+
+def _failing(times: int):
+    """deep_check_batch que falha nas primeiras `times` chamadas"""
+    calls = {"count": 0}
+    deep_check_batch = pipeline_module.deep_check_batch
+
+    def check(*args):
+        calls["count"] += 1
+        if calls["count"] <= times:
+            raise RuntimeError("falha simulada")
+        return deep_check_batch(*args)
+    return check
+
+
+# ==================== MOTIVOS ====================
+
+def test_inline_check_reports_every_reason():
+    assert ModerationEngine(SUSPICIOUS_KEYWORDS).check("me passa teu pix, ou manda pro joao@mail.com") == (
+        True, "Palavra suspeita detectada: 'pix'; Palavra suspeita detectada: '@'; Email detectado"
+    )
+    assert ModerationEngine(SUSPICIOUS_KEYWORDS).check("ingresso de meia entrada") == (False, None)
+
+
+def test_deep_check_reports_every_reason():
+    reasons = DeepModerationEngine(SUSPICIOUS_KEYWORDS).find_reasons(
+        "chama no w h a t s a p p ou telegran: nove nove oito sete seis cinco quatro tres dois um"
+    )
+    assert reasons == [
+        "Palavra suspeita ofuscada: 'whatsapp'",
+        "Palavra suspeita aproximada: 'telegram' ~ 'telegran'",
+        "Número de telefone por extenso detectado",
+    ]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("nove nove oito sete seis cinco quatro tres dois", ["998765432"]),
+    ("11 9 meia meia um 2 3 4 5", ["1196612345"]),  # um e meia no meio de outros números
+    ("tenho um ingresso de meia entrada por 12345678", []),
+    ("são 2 ingressos, um de 150 e uma de 200", []),
+    ("uma meia e dois", ["16", "2"]),
+])
+def test_spelled_numbers_only_treat_articles_as_digits_inside_runs(text, expected):
+    assert spelled_numbers(text) == expected
+
+
+def test_ambiguous_number_words_do_not_flag_prices():
+    engine = DeepModerationEngine(SUSPICIOUS_KEYWORDS)
+    assert engine.find_reasons("um ingresso de meia entrada, 1 2 3 4 5 6 7 8 reais no total") == []
+    assert engine.find_reasons("liga: um um nove oito sete seis cinco quatro tres dois") == [
+        "Número de telefone por extenso detectado"
+    ]
+
+
+# ==================== RULESETS ====================
+
+def test_swap_never_goes_back_to_an_older_version(default_rules):
+    default_rules.swap(5, ["pix"])
+    assert default_rules.swap(4, ["zap"]).version == 5
+    assert default_rules.active.engine.check("me passa o pix")[0]
+    assert default_rules.reset().version == 0
+
+
+def test_reload_racing_with_publish_keeps_newest_ruleset(db, default_rules, monkeypatch):
+    """A recarga leu a versão 1; antes de trocar, uma publicação ativou a versão 2"""
+    moderation_service.publish_ruleset(db, ModerationRulesetCreate(keywords=["pix"]))
+    default_rules.reset()
+    get_ruleset = moderation_service.get_ruleset
+
+    def get_ruleset_then_publish(db, version):
+        ruleset = get_ruleset(db, version)
+        moderation_service.publish_ruleset(db, ModerationRulesetCreate(keywords=["pix", "telegram"]))
+        return ruleset
+
+    monkeypatch.setattr(moderation_service, "get_ruleset", get_ruleset_then_publish)
+    result = moderation_service.reload_rules(db)
+
+    assert result == {"version": 2, "reloaded": 0}
+    assert default_rules.version == 2
+    assert default_rules.active.engine.check("chama no telegram")[0]
+
+
+# ==================== PIPELINE ====================
+
+def test_failed_batch_is_retried(db, session_factory, messages, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "deep_check_batch", _failing(times=2))
+    pipeline = _pipeline(session_factory, max_retries=2)
+    pipeline.start()
+    for task in messages:
+        assert pipeline.try_submit(task)
+    pipeline.stop()
+
+    assert _flags(db, messages) == [(True, "Palavra suspeita ofuscada: 'whatsapp'"), (False, None)]
+    stats = pipeline.stats()
+    assert stats["processed"] == 2 and stats["retries"] >= 2 and stats["manual_review"] == 0
+
+
+def test_exhausted_retries_flag_messages_for_review(db, session_factory, messages, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "deep_check_batch", _failing(times=100))
+    pipeline = _pipeline(session_factory, max_retries=1)
+    pipeline.start()
+    for task in messages:
+        assert pipeline.try_submit(task)
+    pipeline.stop()
+
+    assert _flags(db, messages) == [(True, MANUAL_REVIEW_REASON)] * 2
+    assert pipeline.stats()["manual_review"] == 2
+    logs = db.query(SystemLog).filter(SystemLog.user_id == messages[0].sender_id).all()
+    assert {log.log_metadata["stage"] for log in logs} == {"review"}
+
+
+def test_inline_failure_after_stop_is_flagged_for_review(db, session_factory, messages, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "deep_check_batch", _failing(times=1))
+    pipeline = _pipeline(session_factory)
+    assert pipeline.submit(messages[0]) is False  # parado: verifica no chamador
+
+    assert _flags(db, messages[:1]) == [(True, MANUAL_REVIEW_REASON)]
+
+
+def test_broken_pool_is_recreated(db, session_factory, messages):
+    pipeline = _pipeline(session_factory, workers=1)
+    pipeline.start()
+    try:
+        broken = pipeline._executor
+        for pid in list(broken._processes):
+            os.kill(pid, signal.SIGKILL)
+        for task in messages:
+            assert pipeline.try_submit(task)
+    finally:
+        pipeline.stop()
+
+    assert pipeline._executor is None  # encerrado no stop
+    assert pipeline.stats()["pool_restarts"] == 1
+    assert _flags(db, messages) == [(True, "Palavra suspeita ofuscada: 'whatsapp'"), (False, None)]
@@ -0,0 +1,210 @@
+"""
+Testes do checkout e do ciclo de vida dos pedidos: reserva condicional
+(compare-and-swap), pagamento e cancelamento concorrendo com a varredura de
+reservas expiradas, e os jobs em lote (varredura e liberação de escrow com
+checkpoint) retomando sem reprocessar nem perder pedidos
+
+Execute com: python -m pytest test_orders.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.sql.dml import Update
+
+from app.models.models import Dispute, DisputeStatus, EscrowStatus, Listing, ListingStatus, Order, PaymentStatus, User
+from app.schemas.schemas import OrderCreate
+from app.services import listing_service, order_service, scheduler
+
+HOLD_TTL = 900
+
+
+def _order(db, buyer_id, listing_id) -> Order:
+    return order_service.create_order(db, buyer_id, OrderCreate(listing_id=listing_id))
+
+
+def _status(db, model, row_id):
+    db.expire_all()
+    row = db.get(model, row_id)
+    return row.payment_status if model is Order else row.status
+
+
+# ==================== CHECKOUT ====================
+
+def test_second_checkout_of_same_listing_conflicts(db, session_factory, marketplace):
+    """O segundo comprador já tinha lido o anúncio como ACTIVE: a reserva condicional não afeta nenhuma linha"""
+    with session_factory() as other_db:
+        assert listing_service.get_listing(other_db, marketplace["listing"]).status == ListingStatus.ACTIVE
+        first = _order(db, marketplace["buyer"], marketplace["listing"])
+
+        with pytest.raises(order_service.CheckoutConflictError):
+            _order(other_db, marketplace["other"], marketplace["listing"])
+
+    assert db.query(Order).filter(Order.listing_id == marketplace["listing"]).count() == 1
+    assert _status(db, Order, first.id) == PaymentStatus.PENDING
+    assert _status(db, Listing, marketplace["listing"]) == ListingStatus.RESERVED
+
+
+def test_checkout_errors_map_to_http_status(client, marketplace):
+    url = "/orders/?buyer_id={}"
+    body = {"listing_id": marketplace["listing"]}
+    assert client.post(url.format(marketplace["seller"]), json=body).status_code == 400  # próprio anúncio
+    assert client.post(url.format(marketplace["buyer"]), json={"listing_id": 999999}).status_code == 400
+
+    created = client.post(url.format(marketplace["buyer"]), json=body)
+    assert created.status_code == 201
+    assert created.json()["total_amount"] == pytest.approx(110 * (1 + order_service.PLATFORM_FEE_PERCENTAGE))
+    conflict = client.post(url.format(marketplace["other"]), json=body)
+    assert conflict.status_code == 409
+    assert conflict.json()["detail"] == "Este anúncio não está disponível"
+
+
+# ==================== PAGAMENTO x VARREDURA ====================
+
+def test_payment_after_sweeper_released_listing_conflicts(db, marketplace):
+    """A varredura expira o pedido, outro comprador reserva o anúncio: o pagamento atrasado não pode vendê-lo"""
+    late = _order(db, marketplace["buyer"], marketplace["listing"])
+    after_deadline = datetime.utcnow() + timedelta(seconds=HOLD_TTL + 1)
+
+    swept = order_service.release_expired_reservations(db, HOLD_TTL, now=after_deadline)
+    assert swept == {"orders_expired": 1, "listings_released": 1}
+    second = _order(db, marketplace["other"], marketplace["listing"])
+
+    with pytest.raises(order_service.OrderStateConflictError):
+        order_service.complete_payment(db, late.id, hold_ttl_seconds=HOLD_TTL, now=after_deadline)
+
+    assert _status(db, Order, late.id) == PaymentStatus.REFUNDED
+    assert _status(db, Order, second.id) == PaymentStatus.PENDING
+    assert _status(db, Listing, marketplace["listing"]) == ListingStatus.RESERVED
+    order_service.complete_payment(db, second.id, hold_ttl_seconds=HOLD_TTL)
+    assert _status(db, Listing, marketplace["listing"]) == ListingStatus.SOLD
+
+
+def test_payment_after_deadline_conflicts_before_sweep(db, marketplace):
+    """Prazo vencido mas a varredura ainda não passou: o pagamento também é recusado"""
+    order = _order(db, marketplace["buyer"], marketplace["listing"])
+    after_deadline = datetime.utcnow() + timedelta(seconds=HOLD_TTL + 1)
+
+    with pytest.raises(order_service.OrderStateConflictError):
+        order_service.complete_payment(db, order.id, hold_ttl_seconds=HOLD_TTL, now=after_deadline)
+    assert _status(db, Order, order.id) == PaymentStatus.PENDING
+    assert _status(db, Listing, marketplace["listing"]) == ListingStatus.RESERVED
+
+    # A varredura seguinte devolve o anúncio normalmente
+    order_service.release_expired_reservations(db, HOLD_TTL, now=after_deadline)
+    assert _status(db, Listing, marketplace["listing"]) == ListingStatus.ACTIVE
+
+
+def test_sweeper_skips_paid_orders(db, marketplace):
+    order = _order(db, marketplace["buyer"], marketplace["listing"])
+    order_service.complete_payment(db, order.id, hold_ttl_seconds=HOLD_TTL)
+
+    swept = order_service.release_expired_reservations(db, HOLD_TTL, now=datetime.utcnow() + timedelta(days=1))
+    assert swept == {"orders_expired": 0, "listings_released": 0}
+    assert _status(db, Order, order.id) == PaymentStatus.PAID
+    assert _status(db, Listing, marketplace["listing"]) == ListingStatus.SOLD
+
+
+def test_cancel_after_sweep_conflicts_and_keeps_new_reservation(db, marketplace):
+    late = _order(db, marketplace["buyer"], marketplace["listing"])
+    order_service.release_expired_reservations(db, HOLD_TTL, now=datetime.utcnow() + timedelta(seconds=HOLD_TTL + 1))
+    _order(db, marketplace["other"], marketplace["listing"])
+
+    with pytest.raises(order_service.OrderStateConflictError):
+        order_service.cancel_order(db, late.id, marketplace["buyer"])
+    assert _status(db, Listing, marketplace["listing"]) == ListingStatus.RESERVED
+
+
+def test_payment_and_cancel_conflicts_return_409(client, db, marketplace):
+    order = _order(db, marketplace["buyer"], marketplace["listing"])
+    assert client.post(f"/orders/{order.id}/complete-payment").status_code == 200
+    assert client.post(f"/orders/{order.id}/complete-payment").status_code == 409
+    assert client.post(f"/orders/{order.id}/cancel?user_id={marketplace['buyer']}").status_code == 409
+    assert client.post("/orders/999999/complete-payment").status_code == 404
+
+
+# ==================== JOBS EM LOTE ====================
+
+def _seed_orders(db, marketplace, count, **order_values):
+    """`count` anúncios do vendedor, cada um com um pedido do comprador"""
+    first = db.query(Listing).count() + 1
+    db.execute(insert(Listing), [
+        {"seller_id": marketplace["seller"], "event_ticket_master_id": marketplace["tm"], "price_asked": 100.0,
+         "status": ListingStatus.SOLD}
+        for _ in range(count)
+    ])
+    db.execute(insert(Order), [
+        {"buyer_id": marketplace["buyer"], "listing_id": listing_id, "total_amount": 105.0, **order_values}
+        for listing_id in range(first, first + count)
+    ])
+    db.commit()
+
+
+def test_sweeper_expires_each_stale_reservation_once(db, marketplace):
+    old = datetime.utcnow() - timedelta(seconds=HOLD_TTL + 60)
+    _seed_orders(db, marketplace, 30, payment_status=PaymentStatus.PENDING, created_at=old)
+    db.query(Listing).filter(Listing.status == ListingStatus.SOLD).update({"status": ListingStatus.RESERVED})
+    db.commit()
+    fresh = _order(db, marketplace["other"], marketplace["listing"])
+
+    assert order_service.release_expired_reservations(db, HOLD_TTL) == {"orders_expired": 30, "listings_released": 30}
+    assert order_service.release_expired_reservations(db, HOLD_TTL) == {"orders_expired": 0, "listings_released": 0}
+    assert _status(db, Order, fresh.id) == PaymentStatus.PENDING
+    assert db.query(Listing).filter(Listing.status == ListingStatus.RESERVED).count() == 1
+
+
+def test_escrow_release_resumes_from_checkpoint(db, marketplace, monkeypatch):
+    """Uma execução interrompida e outra que falha no meio de um bloco: cada pedido é creditado uma única vez"""
+    completed = datetime.utcnow() - timedelta(days=30)
+    _seed_orders(db, marketplace, 10, payment_status=PaymentStatus.PAID, escrow_status=EscrowStatus.HELD, completed_at=completed)
+
+    # Interrompida depois do primeiro bloco (commit com o checkpoint)
+    first = order_service.release_due_escrows(db, 7, chunk_size=3, max_chunks=1)
+    assert first["orders_released"] == 3
+    assert scheduler.get_checkpoint(db, order_service.ESCROW_RELEASE_JOB) == 3
+
+    # Falha antes do commit do bloco seguinte: nada dele fica gravado
+    def crash(*args):
+        raise RuntimeError("queda")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(scheduler, "set_checkpoint", crash)
+        with pytest.raises(RuntimeError):
+            order_service.release_due_escrows(db, 7, chunk_size=3)
+    db.rollback()
+    assert db.query(Order).filter(Order.escrow_status == EscrowStatus.RELEASED_TO_SELLER).count() == 3
+
+    rest = order_service.release_due_escrows(db, 7, chunk_size=3)
+    assert rest["orders_released"] == 7 and rest["chunks"] == 3
+    assert db.query(Order).filter(Order.escrow_status == EscrowStatus.HELD).count() == 0
+    assert db.get(User, marketplace["seller"]).reputation_score == 10 * order_service.REPUTATION_PER_SALE
+    assert scheduler.get_checkpoint(db, order_service.ESCROW_RELEASE_JOB) == 0
+
+    assert order_service.release_due_escrows(db, 7, chunk_size=3)["orders_released"] == 0
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_escrow_release_skips_dispute_opened_mid_chunk(db, marketplace, monkeypatch, returning):
+    """Disputa aberta entre o SELECT e o UPDATE do bloco: o pedido fica retido e não rende reputação"""
+    completed = datetime.utcnow() - timedelta(days=30)
+    _seed_orders(db, marketplace, 5, payment_status=PaymentStatus.PAID, escrow_status=EscrowStatus.HELD, completed_at=completed)
+    disputed = db.query(Order.id).order_by(Order.id).first().id
+    monkeypatch.setattr(db.get_bind().dialect, "update_returning", returning)
+
+    execute = db.execute
+
+    def open_dispute_before_release(statement, *args, **kwargs):
+        if isinstance(statement, Update) and statement.table.name == "orders" and not db.query(Dispute).count():
+            db.add(Dispute(order_id=disputed, reporter_id=marketplace["buyer"], reported_user_id=marketplace["seller"],
+                           reason="ingresso inválido", status=DisputeStatus.OPEN))
+            db.flush()
+        return execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", open_dispute_before_release)
+    result = order_service.release_due_escrows(db, 7, chunk_size=10)
+
+    assert result["orders_released"] == 4
+    assert db.get(User, marketplace["seller"]).reputation_score == 4 * order_service.REPUTATION_PER_SALE
+    db.expire_all()
+    assert db.get(Order, disputed).escrow_status == EscrowStatus.HELD
@@ -0,0 +1,53 @@
+"""
+Testes do cache de valores de face da regra dos 120%: invalidação no commit e
+carga concorrente com a alteração de uma categoria
+
+Execute com: python -m pytest test_price_cache.py
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.models import EventTicketMaster
+from app.services.price_cache import price_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    price_cache.clear()
+    yield
+    price_cache.clear()
+
+
+def _set_face_value(session_factory, tm_id, face_value):
+    with session_factory() as session:
+        session.get(EventTicketMaster, tm_id).face_value = face_value
+        session.commit()
+
+
+def test_commit_invalidates_cached_event(db, session_factory, marketplace):
+    assert price_cache.get_face_value(db, marketplace["tm"]) == 100
+    assert price_cache.get_face_value(db, marketplace["tm"]) == 100
+    assert price_cache.stats()["hits"] >= 1
+
+    _set_face_value(session_factory, marketplace["tm"], 150)
+    assert price_cache.get_face_value(db, marketplace["tm"]) == 150
+
+
+def test_load_racing_with_update_is_not_cached(db, session_factory, marketplace, monkeypatch):
+    """A carga leu o valor antigo e a alteração foi commitada antes de ela guardar o resultado"""
+    price_cache.clear()  # create_listing do marketplace já aqueceu o evento
+    execute = db.execute
+
+    def execute_then_commit_update(*args, **kwargs):
+        rows = execute(*args, **kwargs).all()
+        _set_face_value(session_factory, marketplace["tm"], 200)
+        return SimpleNamespace(all=lambda: rows)
+
+    monkeypatch.setattr(db, "execute", execute_then_commit_update)
+    assert price_cache.get_face_value(db, marketplace["tm"]) == 100
+    monkeypatch.undo()
+
+    assert price_cache.stats()["events"] == 0
+    assert price_cache.get_face_value(db, marketplace["tm"]) == 200
@@ -0,0 +1,206 @@
+"""
+Teste de regressão do número de consultas SQL por requisição
+Chama os endpoints GET da API contra um SQLite migrado, com páginas cheias o
+bastante para que um lazy load por linha (N+1) apareça, e falha se algum deles
+emitir mais que MAX_QUERIES_PER_REQUEST comandos SQL
+
+Execute com: python -m pytest test_query_counts.py  (ou python test_query_counts.py)
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine, get_db
+from app.main import app
+from app.migrations import run_migrations
+from app.schemas.schemas import (
+    UserCreate, EventCreate, EventTicketMasterCreate, ListingCreate,
+    OrderCreate, ChatRoomCreate, ChatMessageCreate, DisputeCreate
+)
+from app.services import (
+    user_service, event_service, listing_service, order_service,
+    chat_service, system_service
+)
+from app.services.http_cache import response_cache
+
+# Linhas por página nos seeds: uma consulta por linha estoura qualquer orçamento fixo
+ROWS = 25
+
+MAX_QUERIES_PER_REQUEST = 3
+
+# Endpoints com orçamento próprio, com o motivo
+QUERY_BUDGETS = {
+    "/orders/stats/seller/{seller}": (5, "agregados independentes, número fixo de consultas"),
+    "/orders/stats/buyer/{buyer}": (4, "agregados independentes, número fixo de consultas"),
+}
+
+
+def seed(db):
+    """Um vendedor com ROWS anúncios, pedidos e salas de chat, e um comprador"""
+    seller = user_service.create_user(db, UserCreate(full_name="Seller", cpf="00000000001", email="s@x.com", password="senha123"))
+    buyer = user_service.create_user(db, UserCreate(full_name="Buyer", cpf="00000000002", email="b@x.com", password="senha123"))
+    evt = event_service.create_event(db, EventCreate(title="Show", venue="Arena", event_date=datetime.utcnow() + timedelta(days=30)))
+    masters = [
+        event_service.create_ticket_master(db, EventTicketMasterCreate(event_id=evt.id, category_name=name, face_value=100))
+        for name in ("Pista", "Camarote")
+    ]
+    listings = [
+        listing_service.create_listing(db, seller.id, ListingCreate(event_ticket_master_id=masters[i % 2].id, price_asked=110))
+        for i in range(2 * ROWS)
+    ]
+    orders = [order_service.create_order(db, buyer.id, OrderCreate(listing_id=listing.id)) for listing in listings[:ROWS]]
+    rooms = []
+    for listing in listings[ROWS:]:
+        room = chat_service.create_chat_room(db, buyer.id, ChatRoomCreate(listing_id=listing.id))
+        chat_service.send_message(db, room.id, buyer.id, ChatMessageCreate(message_text="me chama no whatsapp"))
+        rooms.append(room)
+    for _ in range(ROWS):
+        chat_service.send_message(db, rooms[0].id, seller.id, ChatMessageCreate(message_text="oi"))
+    dispute = system_service.create_dispute(
+        db, buyer.id, DisputeCreate(reported_user_id=seller.id, order_id=orders[0].id, reason="x")
+    )
+    return {"seller": seller.id, "buyer": buyer.id, "event": evt.id, "tm": masters[0].id,
+            "listing": listings[0].id, "order": orders[0].id, "room": rooms[0].id, "dispute": dispute.id}
+
+
+ENDPOINTS = [
+    "/users/",
+    "/users/{seller}",
+    "/users/{seller}/documents",
+    "/events/",
+    "/events/upcoming",
+    "/events/{event}",
+    "/events/{event}/inventory",
+    "/events/{event}/ticket-masters",
+    "/events/ticket-masters/{tm}",
+    "/listings/",
+    "/listings/active",
+    "/listings/active?event_id={event}",
+    "/listings/seller/{seller}",
+    "/listings/{listing}",
+    "/listings/order-book/{tm}",
+    "/listings/order-book/{tm}/best",
+    "/listings/order-book/{tm}/depth?bucket_size=5",
+    "/orders/{order}",
+    "/orders/user/{buyer}/purchases",
+    "/orders/user/{seller}/sales",
+    "/orders/stats/seller/{seller}",
+    "/orders/stats/buyer/{buyer}",
+    "/chat/rooms/{room}",
+    "/chat/rooms/user/{buyer}",
+    "/chat/rooms/{room}/messages",
+    "/chat/user/{buyer}/inbox",
+    "/chat/messages/flagged",
+    "/chat/user/{seller}/unread-count",
+    "/chat/user/{seller}/unread",
+    "/admin/disputes",
+    "/admin/disputes/open",
+    "/admin/disputes/{dispute}",
+    "/admin/disputes/{dispute}/messages",
+    "/admin/disputes/user/{buyer}/reported",
+    "/admin/disputes/user/{seller}/received",
+    "/admin/logs",
+    "/admin/logs/suspicious",
+    "/admin/users/{seller}/reputation-impact",
+    "/admin/moderation/rulesets",
+]
+
+
+@contextmanager
+def api_client():
+    """TestClient da API sobre um SQLite migrado e semeado; retorna (client, ids, comandos SQL capturados)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'counts.db')}")
+        run_migrations(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = session_factory()
+        ids = seed(db)
+        db.close()
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        app.dependency_overrides[get_db] = override_get_db
+        event.listen(engine, "before_cursor_execute", capture)
+        response_cache.clear()
+        try:
+            # Sem o context manager: startup (migrações, jobs, writer de auditoria) não roda
+            yield TestClient(app), ids, statements
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+            app.dependency_overrides.pop(get_db, None)
+            response_cache.clear()
+            engine.dispose()
+
+
+def count_queries() -> dict:
+    """Retorna {endpoint: (status HTTP, comandos SQL emitidos)}"""
+    counts = {}
+    with api_client() as (client, ids, statements):
+        for endpoint in ENDPOINTS:
+            statements.clear()
+            response = client.get(endpoint.format(**ids))
+            counts[endpoint] = (response.status_code, len(statements))
+    return counts
+
+
+def test_endpoints_stay_within_query_budget():
+    counts = count_queries()
+    failed = {endpoint: status for endpoint, (status, _) in counts.items() if status != 200}
+    assert not failed, f"Endpoints com erro: {failed}"
+
+    budgets = {endpoint: QUERY_BUDGETS.get(endpoint, (MAX_QUERIES_PER_REQUEST,))[0] for endpoint in counts}
+    over = {
+        endpoint: (queries, budgets[endpoint])
+        for endpoint, (_, queries) in counts.items()
+        if queries > budgets[endpoint]
+    }
+    report = "\n".join(f"{endpoint}: {queries} consultas (máximo {budget})" for endpoint, (queries, budget) in over.items())
+    assert not over, f"Endpoints acima do orçamento de consultas (N+1?):\n{report}"
+
+
+
+def test_catalog_cache_revalidates_without_queries():
+    """Catálogo repetido vem do cache sem SQL, If-None-Match vira 304 e um anúncio novo invalida"""
+    with api_client() as (client, ids, statements):
+        first = client.get("/listings/active")
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and first.headers["x-cache"] == "MISS"
+
+        statements.clear()
+        cached = client.get("/listings/active")
+        assert cached.headers["x-cache"] == "HIT" and cached.content == first.content
+        not_modified = client.get("/listings/active", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304 and not not_modified.content
+        assert not statements, f"Resposta em cache foi ao banco: {statements}"
+
+        client.post(f"/listings/?seller_id={ids['seller']}", json={"event_ticket_master_id": ids["tm"], "price_asked": 105})
+        changed = client.get("/listings/active", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        # Tabelas não alteradas continuam em cache
+        client.get("/events/")
+        statements.clear()
+        assert client.get("/events/").headers["x-cache"] == "HIT" and not statements
+
+if __name__ == "__main__":
+    for endpoint, (status, queries) in count_queries().items():
+        print(f"{queries:4d}  {status}  {endpoint}")
+    test_endpoints_stay_within_query_budget()
+    test_catalog_cache_revalidates_without_queries()
+    print("OK: nenhum endpoint acima do orçamento de consultas")
@@ -0,0 +1,190 @@
+"""
+Teste de regressão dos planos de consulta (EXPLAIN QUERY PLAN)
+Executa as consultas quentes dos services contra um SQLite migrado e falha se
+alguma delas cair em varredura completa de tabela (SCAN sem índice)
+
+Execute com: python -m pytest test_query_plans.py  (ou python test_query_plans.py)
+"""
+
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.migrations import run_migrations
+from app.models.models import Base, ListingStatus, DisputeStatus, LogCategory
+from app.schemas.schemas import (
+    UserCreate, EventCreate, EventTicketMasterCreate, ListingCreate,
+    OrderCreate, ChatRoomCreate, ChatMessageCreate, DisputeCreate
+)
+from app.services.pagination import encode_cursor
+from app.services.inventory_cache import InventoryCache
+from app.services import (
+    user_service, event_service, listing_service, order_service,
+    chat_service, chat_archive, system_service, export_service
+)
+
+# "SCAN tabela" sem "USING INDEX" é varredura completa (subconsultas materializadas não contam)
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+# Consultas que podem varrer a tabela, com o motivo
+ALLOWED_FULL_SCANS = {
+    "user.get_users": "ordenada pela chave primária, para no LIMIT",
+}
+
+
+def seed(db):
+    """Cria o mínimo de dados para que todos os caminhos sejam exercitados"""
+    seller = user_service.create_user(db, UserCreate(full_name="Seller", cpf="00000000001", email="s@x.com", password="senha123"))
+    buyer = user_service.create_user(db, UserCreate(full_name="Buyer", cpf="00000000002", email="b@x.com", password="senha123"))
+    evt = event_service.create_event(db, EventCreate(title="Show", venue="Arena", event_date=datetime.utcnow() + timedelta(days=30)))
+    tm = event_service.create_ticket_master(db, EventTicketMasterCreate(event_id=evt.id, category_name="Pista", face_value=100))
+    listing = listing_service.create_listing(db, seller.id, ListingCreate(event_ticket_master_id=tm.id, price_asked=110))
+    spare = listing_service.create_listing(db, seller.id, ListingCreate(event_ticket_master_id=tm.id, price_asked=105))
+    room = chat_service.create_chat_room(db, buyer.id, ChatRoomCreate(listing_id=listing.id))
+    return {"seller": seller.id, "buyer": buyer.id, "event": evt.id, "tm": tm.id,
+            "listing": listing.id, "spare": spare.id, "room": room.id}
+
+
+def hot_queries(ids):
+    """Chamadas de service cujas consultas são verificadas"""
+    s, b = ids["seller"], ids["buyer"]
+    now = datetime.utcnow()
+    return {
+        "user.get_users": lambda db: user_service.get_users(db),
+        "user.get_user_by_email": lambda db: user_service.get_user_by_email(db, "s@x.com"),
+        "user.get_user_by_cpf": lambda db: user_service.get_user_by_cpf(db, "00000000001"),
+        "user.get_user_documents": lambda db: user_service.get_user_documents(db, s),
+        "event.get_events": lambda db: event_service.get_events(db),
+        "event.get_events(search)": lambda db: event_service.get_events(db, search="show"),
+        "event.get_upcoming_events": lambda db: event_service.get_upcoming_events(db),
+        "event.get_ticket_masters_by_event": lambda db: event_service.get_ticket_masters_by_event(db, ids["event"]),
+        "listing.get_listings": lambda db: listing_service.get_listings(db),
+        "listing.get_listings(status)": lambda db: listing_service.get_listings(db, status=ListingStatus.ACTIVE),
+        "listing.get_active_listings(event)": lambda db: listing_service.get_active_listings(db, event_id=ids["event"]),
+        "listing.get_seller_listings": lambda db: listing_service.get_seller_listings(db, s),
+        "listing.get_listing_detail": lambda db: listing_service.get_listing_detail(db, ids["listing"]),
+        "listing.get_listing_details": lambda db: listing_service.get_listing_details(db),
+        "listing.get_listing_details(active, event)": lambda db: listing_service.get_listing_details(
+            db, event_id=ids["event"], status=ListingStatus.ACTIVE
+        ),
+        "listing.get_listing_details(seller)": lambda db: listing_service.get_listing_details(db, seller_id=s),
+        "listing.get_best_offer": lambda db: listing_service.get_best_offer(db, ids["tm"]),
+        "listing.get_cheapest_listings": lambda db: listing_service.get_cheapest_listings(db, ids["tm"]),
+        "listing.get_cheapest_listings(cursor)": lambda db: listing_service.get_cheapest_listings(
+            db, ids["tm"], cursor=encode_cursor(105.0, ids["spare"])
+        ),
+        "listing.get_price_depth": lambda db: listing_service.get_price_depth(db, ids["tm"]),
+        "inventory_cache.get_summary": lambda db: InventoryCache(max_events=1).get_summary(db, ids["event"]),
+        "listing.get_listing_event_id": lambda db: listing_service.get_listing_event_id(db, ids["listing"]),
+        "order.create_order": lambda db: order_service.create_order(db, b, OrderCreate(listing_id=ids["listing"])),
+        "order.get_user_orders(buyer)": lambda db: order_service.get_user_orders(db, b),
+        "order.get_user_orders(seller)": lambda db: order_service.get_user_orders(db, s, as_buyer=False),
+        "order.get_seller_statistics": lambda db: order_service.get_seller_statistics(db, s),
+        "order.get_buyer_statistics": lambda db: order_service.get_buyer_statistics(db, b),
+        "order.release_expired_reservations": lambda db: order_service.release_expired_reservations(db, 3600),
+        "order.release_due_escrows": lambda db: order_service.release_due_escrows(db, 7),
+        "chat.create_chat_room(existing)": lambda db: chat_service.create_chat_room(db, b, ChatRoomCreate(listing_id=ids["listing"])),
+        "chat.get_user_chat_rooms": lambda db: chat_service.get_user_chat_rooms(db, b),
+        "chat.get_inbox": lambda db: chat_service.get_inbox(db, s),
+        "chat.get_inbox(cursor)": lambda db: chat_service.get_inbox(db, s, cursor=encode_cursor(datetime.utcnow(), 1)),
+        "chat.send_message": lambda db: chat_service.send_message(db, ids["room"], b, ChatMessageCreate(message_text="chama no zap")),
+        "chat.get_chat_messages": lambda db: chat_service.get_chat_messages(db, ids["room"]),
+        "chat.mark_messages_as_read": lambda db: chat_service.mark_messages_as_read(db, ids["room"], s),
+        "chat.get_unread_count": lambda db: chat_service.get_unread_count(db, s),
+        "chat.get_unread_by_room": lambda db: chat_service.get_unread_by_room(db, b),
+        "chat.repair_unread_counters": lambda db: chat_service.repair_unread_counters(db),
+        "chat.get_flagged_messages": lambda db: chat_service.get_flagged_messages(db),
+        "chat.get_messages_between": lambda db: chat_service.get_messages_between(db, b, s),
+        "chat_archive.compact_chat_history": lambda db: chat_archive.compact_chat_history(db, 0),
+        "system.create_dispute": lambda db: system_service.create_dispute(db, b, DisputeCreate(reported_user_id=s, reason="x")),
+        "system.get_logs": lambda db: system_service.get_logs(db),
+        "system.get_logs(user)": lambda db: system_service.get_logs(db, user_id=b),
+        "system.get_logs(category)": lambda db: system_service.get_logs(db, category=LogCategory.DISPUTE),
+        "system.archive_old_logs": lambda db: system_service.archive_old_logs(db, tempfile.gettempdir()),
+        "export.logs": lambda db: b"".join(export_service.stream_export("logs", session_factory=lambda: db)),
+        "export.logs(range, category)": lambda db: b"".join(export_service.stream_export(
+            "logs", "csv", start=now - timedelta(days=1), end=now, filters={"category": LogCategory.DISPUTE.value},
+            session_factory=lambda: db
+        )),
+        "export.logs(user)": lambda db: b"".join(export_service.stream_export("logs", filters={"user_id": b}, session_factory=lambda: db)),
+        "export.orders(range)": lambda db: b"".join(export_service.stream_export(
+            "orders", start=now - timedelta(days=1), end=now, compress=True, session_factory=lambda: db
+        )),
+        "system.get_disputes": lambda db: system_service.get_disputes(db),
+        "system.get_disputes(status)": lambda db: system_service.get_disputes(db, status=DisputeStatus.OPEN),
+        "system.get_disputes(reported)": lambda db: system_service.get_disputes(db, reported_user_id=s),
+        "system.get_user_disputes(reporter)": lambda db: system_service.get_user_disputes(db, b),
+        "system.get_user_reputation_impact": lambda db: system_service.get_user_reputation_impact(db, s),
+        "system.get_recent_suspicious_activities": lambda db: system_service.get_recent_suspicious_activities(db),
+    }
+
+
+def collect_full_scans():
+    """Retorna {consulta: [(detalhe do plano, SQL)]} das varreduras completas"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        run_migrations(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = session_factory()
+        ids = seed(db)
+        db.close()
+
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")) and not executemany:
+                captured.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        scans = {}
+        try:
+            for name, call in hot_queries(ids).items():
+                captured.clear()
+                db = session_factory()
+                try:
+                    call(db)
+                finally:
+                    db.close()
+
+                statements = list(captured)
+                captured.clear()
+                with engine.connect() as conn:
+                    for statement, parameters in statements:
+                        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                        for row in plan:
+                            scan = FULL_SCAN.match(row[-1])
+                            if scan and scan.group(1) in Base.metadata.tables:
+                                scans.setdefault(name, []).append((row[-1], statement))
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+            engine.dispose()
+
+    return scans
+
+
+def test_hot_queries_use_indexes():
+    scans = collect_full_scans()
+    unexpected = {name: found for name, found in scans.items() if name not in ALLOWED_FULL_SCANS}
+
+    report = "\n".join(
+        f"{name}: {detail}\n    {' '.join(statement.split())}"
+        for name, found in unexpected.items()
+        for detail, statement in found
+    )
+    assert not unexpected, f"Consultas com varredura completa de tabela:\n{report}"
+
+
+if __name__ == "__main__":
+    scans = collect_full_scans()
+    for name, found in scans.items():
+        status = "permitido" if name in ALLOWED_FULL_SCANS else "FALHA"
+        for detail, _ in found:
+            print(f"[{status}] {name}: {detail}")
+    test_hot_queries_use_indexes()
+    print("OK: nenhuma consulta quente fora da lista permitida faz varredura completa")
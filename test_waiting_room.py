@@ -0,0 +1,94 @@
+"""
+Testes da sala de espera: tokens de admissão de uso único, inclusive com um
+segundo pedido que leu o ticket antes do primeiro terminar, e reabertura da sala
+
+Execute com: python -m pytest test_waiting_room.py
+"""
+
+import pytest
+
+from app.schemas.schemas import QueueStatus
+from app.services.queue_service import InMemoryStore, WaitingRoom, waiting_room
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def room():
+    clock = FakeClock()
+    return WaitingRoom(InMemoryStore(clock=clock), clock=clock), clock
+
+
+def _admitted_ticket(room, clock, event_id=1, user_id=7):
+    room.open_room(event_id, admit_rate=1, token_ttl=60)
+    ticket = room.join(event_id, user_id)
+    clock.now += 1
+    assert room.status(ticket["token"])["status"] == QueueStatus.ADMITTED
+    return ticket["token"]
+
+
+def test_token_is_single_use(room):
+    room, clock = room
+    token = _admitted_ticket(room, clock)
+
+    room.claim(1, 7, token)
+    with pytest.raises(PermissionError):
+        room.claim(1, 7, token)  # pedido simultâneo com o mesmo token
+
+    room.release(token, used=True)
+    assert room.status(token)["status"] == QueueStatus.USED
+    with pytest.raises(PermissionError):
+        room.claim(1, 7, token)
+
+
+def test_claim_with_stale_status_after_use_is_rejected(room, monkeypatch):
+    """Segundo pedido leu o ticket (ADMITTED) antes do primeiro marcá-lo como usado"""
+    room, clock = room
+    token = _admitted_ticket(room, clock)
+    stale = room.status(token)
+
+    room.claim(1, 7, token)
+    room.release(token, used=True)
+
+    monkeypatch.setattr(room, "status", lambda _token: stale)
+    with pytest.raises(PermissionError):
+        room.claim(1, 7, token)
+
+
+def test_failed_order_gives_token_back(room):
+    room, clock = room
+    token = _admitted_ticket(room, clock)
+
+    room.claim(1, 7, token)
+    room.release(token, used=False)
+    room.claim(1, 7, token)
+
+
+def test_reopened_room_invalidates_previous_tickets(room):
+    room, clock = room
+    old = _admitted_ticket(room, clock)
+    room.close_room(1)
+
+    room.open_room(1, admit_rate=1, token_ttl=60)
+    new = room.join(1, 8)
+    assert new["status"] == QueueStatus.WAITING and new["position"] == 1
+    assert room.status(old)["status"] == QueueStatus.EXPIRED
+    with pytest.raises(PermissionError):
+        room.claim(1, 7, old)
+
+
+def test_order_with_used_token_is_forbidden(client, db, marketplace, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(waiting_room, "store", InMemoryStore(clock=clock))
+    monkeypatch.setattr(waiting_room, "clock", clock)
+    token = _admitted_ticket(waiting_room, clock, marketplace["event"], marketplace["buyer"])
+
+    url = f"/orders/?buyer_id={marketplace['buyer']}&admission_token={token}"
+    assert client.post(url, json={"listing_id": marketplace["listing"]}).status_code == 201
+    assert client.post(url, json={"listing_id": marketplace["listing"]}).status_code == 403